@@ -0,0 +1,69 @@
+"""
+Benchmark: um cliente HTTP por CEP (comportamento antigo) vs. cliente compartilhado com pool de conexões.
+
+Uso:
+    python -m benchmarks.bench_client --requisicoes 2000 --concorrencia 10
+"""
+
+import argparse
+import asyncio
+import time
+
+from httpx import AsyncClient
+
+from benchmarks.stub_server import StubServer
+from cepfoliummap.client import create_client
+
+
+async def run_sem_pool(url, ceps, concorrencia):
+    semaforo = asyncio.Semaphore(concorrencia)
+
+    async def buscar(cep):
+        async with semaforo:
+            async with AsyncClient(base_url=url, timeout=60) as client:
+                response = await client.get(f"api/cep/v2/{cep}")
+                response.json()
+
+    await asyncio.gather(*(buscar(cep) for cep in ceps))
+
+
+async def run_com_pool(url, ceps, concorrencia):
+    semaforo = asyncio.Semaphore(concorrencia)
+
+    async with create_client() as client:
+
+        async def buscar(cep):
+            async with semaforo:
+                response = await client.get(f"{url}api/cep/v2/{cep}")
+                response.json()
+
+        await asyncio.gather(*(buscar(cep) for cep in ceps))
+
+
+def medir(func, url, ceps, concorrencia):
+    inicio = time.perf_counter()
+    asyncio.run(func(url, ceps, concorrencia))
+    duracao = time.perf_counter() - inicio
+    return len(ceps) / duracao
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requisicoes", type=int, default=2000)
+    parser.add_argument("--concorrencia", type=int, default=10)
+    args = parser.parse_args()
+
+    ceps = [f"{i:08d}" for i in range(args.requisicoes)]
+
+    with StubServer() as server:
+        antes = medir(run_sem_pool, server.url, ceps, args.concorrencia)
+        depois = medir(run_com_pool, server.url, ceps, args.concorrencia)
+
+    print(f"Requisições: {args.requisicoes} | Concorrência: {args.concorrencia}")
+    print(f"Sem pool (um cliente por CEP): {antes:10.1f} req/s")
+    print(f"Com pool (cliente compartilhado): {depois:10.1f} req/s")
+    print(f"Ganho: {depois / antes:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Benchmark: latência por CEP com e sem consultas "hedged" (HEDGE_PROVEDORES), contra o servidor local.
+
+A BrasilAPI v2 do servidor local responde com latência "--latencia" e, em uma parte "--cauda" das requisições, com
+"--latencia-cauda" segundos a mais; a v1 (sem coordenadas) tem a sua própria latência. Cada cenário usa um motor novo
+(timeouts e atrasos adaptativos partem do zero) e mede, por CEP, o tempo até o resultado: percentis, duração total e
+requisições feitas ao servidor (o custo das requisições de reserva).
+
+Uso:
+    python -m benchmarks.bench_hedge --ceps 2000 --cauda 0.05 --latencia-cauda 3 --saida hedge.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.stub_server import StubConfig, StubServer
+
+
+async def consultar(ceps, hedge, provedores, concorrencia, diretorio):
+    from cepfoliummap.engine import CepFoliumMapEngine
+    from cepfoliummap.provedores import consultar_com_hedge, criar_provedores
+
+    async with CepFoliumMapEngine(
+        max_at_once=concorrencia,
+        max_per_second=10_000,
+        cache_path=os.path.join(diretorio, "cache.sqlite3"),
+        indice_path=None,
+        hedge=hedge,
+        hedge_provedores=provedores,
+    ) as engine:
+        client = await engine.abrir_cliente()
+        todos = criar_provedores(engine.limiters)
+        cadeia = [todos[nome] for nome in engine.hedge_provedores]
+        contadores = Counter()
+        semaforo = asyncio.Semaphore(concorrencia)
+        latencias = []
+        encontrados = 0
+
+        async def buscar(cep):
+            nonlocal encontrados
+
+            async with semaforo:
+                inicio = time.perf_counter()
+                result = await consultar_com_hedge(client, cadeia, cep, contadores)
+                latencias.append(time.perf_counter() - inicio)
+                encontrados += bool(result)
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(buscar(cep) for cep in ceps))
+        duracao = time.perf_counter() - inicio
+
+        timeouts = {
+            nome: round(limiter.timeout(), 2)
+            for nome, limiter in engine.limiters.items()
+        }
+
+    latencias = np.array(latencias) * 1000
+    return {
+        "segundos": round(duracao, 3),
+        "encontrados": encontrados,
+        "latencia_ms": {
+            "p50": round(float(np.percentile(latencias, 50)), 1),
+            "p90": round(float(np.percentile(latencias, 90)), 1),
+            "p99": round(float(np.percentile(latencias, 99)), 1),
+            "max": round(float(latencias.max()), 1),
+        },
+        "hedges": contadores["hedges"],
+        "hedges_vencedores": contadores["hedges_vencedores"],
+        "timeouts_s": timeouts,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--ceps", type=int, default=2000)
+    parser.add_argument("--concorrencia", type=int, default=50)
+    parser.add_argument("--latencia", type=float, default=0.02)
+    parser.add_argument("--latencia-variacao", type=float, default=0.02)
+    parser.add_argument("--cauda", type=float, default=0.05)
+    parser.add_argument("--latencia-cauda", type=float, default=3.0)
+    parser.add_argument("--latencia-v1", type=float, default=0.05)
+    parser.add_argument("--erros", type=float, default=0.0)
+    parser.add_argument(
+        "--provedores", nargs="+", default=["brasilapi", "brasilapi_v1"]
+    )
+    parser.add_argument("--saida", help="Arquivo JSON com os resultados")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+
+    config = StubConfig(
+        latencia=args.latencia,
+        latencia_variacao=args.latencia_variacao,
+        cauda=args.cauda,
+        latencia_cauda=args.latencia_cauda,
+        erros=args.erros,
+        sem_coordenadas=0.05,
+        nao_encontrados=0.02,
+        apis={"brasilapi_v1": StubConfig(latencia=args.latencia_v1)},
+    )
+    ceps = [f"{i:08d}" for i in range(10_000_000, 10_000_000 + args.ceps)]
+
+    resultados = {}
+    with StubServer(config) as server:
+        # As URLs e a espera entre tentativas são lidas (decouple) na importação do cepfoliummap:
+        os.environ["BRASILAPI_URL"] = f"{server.url}api/cep/v2/"
+        os.environ["BRASILAPI_V1_URL"] = f"{server.url}api/cep/v1/"
+        os.environ["GEOCODE_URL"] = server.url
+        os.environ["RETRY_BACKOFF_BASE"] = "0.01"
+        # Conexões suficientes para as requisições de reserva (sem fila no pool do cliente):
+        os.environ["POOL_MAX_CONNECTIONS"] = str(args.concorrencia * 4)
+        os.environ["POOL_MAX_KEEPALIVE"] = str(args.concorrencia * 4)
+
+        for nome, hedge in (("sem_hedge", False), ("com_hedge", True)):
+            antes = server.contadores
+            with tempfile.TemporaryDirectory() as diretorio:
+                resultado = asyncio.run(
+                    consultar(
+                        ceps, hedge, args.provedores, args.concorrencia, diretorio
+                    )
+                )
+            resultado["servidor"] = {
+                chave: valor - antes.get(chave, 0)
+                for chave, valor in server.contadores.items()
+            }
+            resultados[nome] = resultado
+
+            latencia = resultado["latencia_ms"]
+            print(
+                f"{nome:>10} | {resultado['segundos']:>7.2f}s | p50 {latencia['p50']:>7.1f}ms | "
+                f"p90 {latencia['p90']:>7.1f}ms | p99 {latencia['p99']:>7.1f}ms | max {latencia['max']:>7.1f}ms | "
+                f"reservas {resultado['hedges']} ({resultado['hedges_vencedores']} vencedoras) | "
+                f"requisições {sum(v for k, v in resultado['servidor'].items() if k.startswith('brasilapi'))}",
+                file=sys.stderr,
+            )
+
+    texto = json.dumps(
+        {"benchmark": "hedge", "parametros": vars(args), "resultados": resultados},
+        indent=2,
+        ensure_ascii=False,
+    )
+    if args.saida:
+        Path(args.saida).write_text(texto, encoding="utf8")
+    else:
+        print(texto)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Benchmark: leitura de planilhas (get_dataframe) por formato, com tempo e pico de memória.
+
+Cada leitura é feita em um processo novo, para que o pico de memória (ru_maxrss) de um formato não contamine o
+dos outros. As planilhas sintéticas têm colunas extras (ignoradas na leitura) e CEPs numéricos (sem zeros à esquerda).
+
+Uso:
+    python -m benchmarks.bench_ingestao --linhas 100000 --formatos csv parquet xlsx
+"""
+
+import argparse
+import multiprocessing
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.memoria import memoria, zerar_pico
+from cepfoliummap.cep import normalize_ceps
+
+FORMATOS = ("csv", "parquet", "xlsx", "xls")
+
+# Limite de linhas do formato .xls:
+_XLS_MAX_LINHAS = 65_535
+
+
+def gerar_planilha(linhas, seed=0):
+    rng = np.random.default_rng(seed)
+
+    return pd.DataFrame(
+        {
+            "cep": rng.integers(1_000_000, 99_999_999, linhas),
+            "grupo": rng.choice(["A", "B", "C", "D"], linhas),
+            "texto": np.char.add("Cliente ", np.arange(linhas).astype(str)),
+            "observacao": np.char.add(
+                "Observação longa ", np.arange(linhas).astype(str)
+            ),
+            "valor": rng.random(linhas),
+            "data": pd.Timestamp("2024-01-01"),
+        }
+    )
+
+
+def salvar(dataframe, filename):
+    formato = Path(filename).suffix
+    if formato == ".csv":
+        dataframe.to_csv(filename, index=False)
+    elif formato == ".parquet":
+        dataframe.to_parquet(filename, index=False)
+    elif formato == ".xlsx":
+        dataframe.to_excel(filename, index=False)
+    elif formato == ".xls":
+        import xlwt
+
+        workbook = xlwt.Workbook()
+        sheet = workbook.add_sheet("planilha")
+        for coluna, nome in enumerate(dataframe.columns):
+            sheet.write(0, coluna, nome)
+            for linha, valor in enumerate(dataframe[nome].astype(str), start=1):
+                sheet.write(linha, coluna, valor)
+        workbook.save(filename)
+
+
+def _ler(filename, resultados):
+    # Executado em um processo novo (pandas já importado antes da medição):
+    from cepfoliummap.planilha import get_dataframe
+
+    zerar_pico()
+    antes, _ = memoria()
+    inicio = time.perf_counter()
+    dataframe = get_dataframe(filename)
+    tempo = time.perf_counter() - inicio
+    _, pico = memoria()
+
+    resultados.put((tempo, pico - antes, len(dataframe)))
+
+
+def medir(filename):
+    contexto = multiprocessing.get_context("spawn")
+    resultados = contexto.Queue()
+    processo = contexto.Process(target=_ler, args=(filename, resultados))
+    processo.start()
+    resultado = resultados.get()
+    processo.join()
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--linhas", type=int, default=100_000)
+    parser.add_argument(
+        "--formatos", nargs="+", choices=FORMATOS, default=["csv", "parquet", "xlsx"]
+    )
+    args = parser.parse_args()
+
+    dataframe = gerar_planilha(args.linhas)
+
+    # Normalização dos CEPs: apply (implementação antiga) vs. vetorizada
+    ceps = dataframe["cep"].astype(float)
+    inicio = time.perf_counter()
+    ceps.apply(lambda x: str(x).replace(".", "").replace("-", ""))
+    tempo_apply = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    normalize_ceps(ceps)
+    tempo_vetorizado = time.perf_counter() - inicio
+    print(
+        f"Normalização de {args.linhas} CEPs: apply {tempo_apply:.3f}s | vetorizada {tempo_vetorizado:.3f}s"
+    )
+
+    print(f"{'formato':>8} {'arquivo (MB)':>13} {'leitura (s)':>12} {'pico (MB)':>10}")
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        for formato in args.formatos:
+            if formato == "xls" and args.linhas > _XLS_MAX_LINHAS:
+                print(
+                    f"{formato:>8} {'-':>13} {'-':>12} {'-':>10}  (máx. {_XLS_MAX_LINHAS} linhas)"
+                )
+                continue
+
+            filename = str(Path(diretorio) / f"planilha.{formato}")
+            salvar(dataframe, filename)
+            tamanho = Path(filename).stat().st_size / 1024**2
+
+            tempo, pico, linhas = medir(filename)
+            assert linhas == args.linhas
+
+            print(f"{formato:>8} {tamanho:>13.1f} {tempo:>12.3f} {pico:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Benchmark: custo do log nas consultas (um registro por requisição do httpx em INFO, várias mensagens por CEP em DEBUG).
+
+Compara os handlers síncronos no logger raiz (comportamento antigo: FileHandler e RichHandler executados por quem
+registra a mensagem, ex.: o event loop das consultas) com a fila (config_logging: QueueHandler na thread de quem
+registra, formatação e escrita em um QueueListener) e com o log desligado. Cada configuração roda em um processo
+novo, com o terminal redirecionado para /dev/null (o Rich ainda formata cada mensagem, sem cores), consultando CEPs
+únicos no servidor local sem latência, para que o log seja uma parte visível do tempo. Também é medido o custo de
+uma mensagem na thread que a registra.
+
+Uso:
+    python -m benchmarks.bench_logging --ceps 5000 --niveis INFO DEBUG --saida logging.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.stub_server import StubConfig, StubServer
+
+CONFIGURACOES = ("desligado", "sincrono", "fila")
+
+
+def configurar_sincrono(nivel):
+    # Comportamento antigo de config_logging (handlers executados na thread de quem registra a mensagem):
+    from rich.logging import RichHandler
+
+    logging.basicConfig(
+        level=nivel,
+        encoding="utf-8",
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        handlers=[
+            logging.FileHandler(
+                encoding="utf-8",
+                filename=f"logs/{datetime.now():%Y-%m-%d-%H-%M-%S}.log",
+                mode="w",
+            ),
+            RichHandler(rich_tracebacks=True),
+        ],
+    )
+    logging.getLogger("httpcore").setLevel(logging.WARNING)
+
+
+def configurar(configuracao, nivel):
+    if configuracao == "desligado":
+        logging.basicConfig(level=logging.CRITICAL)
+    elif configuracao == "sincrono":
+        configurar_sincrono(nivel)
+    else:
+        from cepfoliummap.config import config_logging
+
+        os.environ["LOGGING_LEVEL"] = nivel
+        config_logging()
+
+
+def _executar(configuracao, nivel, ceps, diretorio, resultados):
+    # Executado em um processo novo, com o terminal redirecionado:
+    import pandas as pd
+
+    from cepfoliummap.config import stop_logging
+    from cepfoliummap.engine import CepFoliumMapEngine
+
+    os.chdir(diretorio)
+    Path("logs").mkdir(exist_ok=True)
+    Path("consultas").mkdir(exist_ok=True)
+    nulo = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(nulo, sys.stdout.fileno())
+    os.dup2(nulo, sys.stderr.fileno())
+
+    configurar(configuracao, nivel)
+
+    async def consultar():
+        async with CepFoliumMapEngine(
+            max_at_once=50,
+            max_per_second=10_000,
+            geocode_max_per_second=10_000,
+            cache_path=os.path.join(diretorio, "cache.sqlite3"),
+            indice_path=None,
+            hedge=False,
+        ) as engine:
+            await engine.consultar_ceps(pd.DataFrame({"cep": ceps}))
+
+    inicio = time.perf_counter()
+    asyncio.run(consultar())
+    segundos = time.perf_counter() - inicio
+
+    # Custo de uma mensagem (com argumentos distintos) na thread que a registra:
+    registro = logging.getLogger("cepfoliummap.bench")
+    mensagens = 10_000
+    inicio = time.perf_counter()
+    for i in range(mensagens):
+        registro.info("Mensagem %d do benchmark | CEP: %s", i, ceps[i % len(ceps)])
+    por_mensagem = (time.perf_counter() - inicio) / mensagens
+
+    # Tempo até a fila ser esvaziada (gravada no arquivo e no terminal):
+    inicio = time.perf_counter()
+    stop_logging()
+    esvaziar = time.perf_counter() - inicio
+
+    resultados.put(
+        {
+            "segundos": round(segundos, 3),
+            "ceps_por_segundo": round(len(ceps) / segundos, 1),
+            "us_por_mensagem": round(por_mensagem * 1e6, 2),
+            "segundos_esvaziar_fila": round(esvaziar, 3),
+        }
+    )
+
+
+def medir(configuracao, nivel, ceps):
+    with tempfile.TemporaryDirectory() as diretorio:
+        contexto = multiprocessing.get_context("spawn")
+        resultados = contexto.Queue()
+        processo = contexto.Process(
+            target=_executar,
+            args=(configuracao, nivel, ceps, diretorio, resultados),
+        )
+        processo.start()
+        resultado = resultados.get()
+        processo.join()
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--ceps", type=int, default=5_000)
+    parser.add_argument(
+        "--niveis", nargs="+", choices=("INFO", "DEBUG"), default=["INFO", "DEBUG"]
+    )
+    parser.add_argument(
+        "--configuracoes", nargs="+", choices=CONFIGURACOES, default=CONFIGURACOES
+    )
+    parser.add_argument("--saida", help="Arquivo JSON com os resultados")
+    args = parser.parse_args()
+
+    ceps = [f"{1_000_000 + i * 7:08d}" for i in range(args.ceps)]
+
+    print(
+        f"{'nível':>6} {'configuração':>13} {'tempo (s)':>10} {'CEPs/s':>9} {'µs/mensagem':>12} {'esvaziar (s)':>13}",
+        file=sys.stderr,
+    )
+
+    resultados = []
+    with StubServer(StubConfig()) as server:
+        # Lidos (decouple) na importação do cepfoliummap, nos processos das medições:
+        os.environ["BRASILAPI_URL"] = f"{server.url}api/cep/v2/"
+        os.environ["BRASILAPI_V1_URL"] = f"{server.url}api/cep/v1/"
+        os.environ["GEOCODE_URL"] = server.url
+        os.environ["JOURNAL"] = "False"
+        os.environ["RELATORIO"] = "False"
+
+        for nivel in args.niveis:
+            for configuracao in args.configuracoes:
+                if configuracao == "desligado" and nivel != args.niveis[0]:
+                    continue
+                resultado = {
+                    "nivel": nivel,
+                    "configuracao": configuracao,
+                    **medir(configuracao, nivel, ceps),
+                }
+                resultados.append(resultado)
+                print(
+                    f"{nivel:>6} {configuracao:>13} {resultado['segundos']:>10.2f} {resultado['ceps_por_segundo']:>9.0f} "
+                    f"{resultado['us_por_mensagem']:>12.2f} {resultado['segundos_esvaziar_fila']:>13.3f}",
+                    file=sys.stderr,
+                )
+
+    texto = json.dumps(
+        {"benchmark": "logging", "parametros": vars(args), "resultados": resultados},
+        indent=2,
+        ensure_ascii=False,
+    )
+    if args.saida:
+        Path(args.saida).write_text(texto, encoding="utf8")
+    else:
+        print(texto)
+
+
+if __name__ == "__main__":
+    main()
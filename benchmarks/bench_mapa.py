@@ -0,0 +1,231 @@
+"""
+Benchmark: tempo de geração e tamanho do HTML do mapa, modos "marcadores", "rapido", "densidade" e "blocos", com e
+sem o agrupamento das linhas de um mesmo local (MAPA_AGRUPAR_LOCAIS). No modo "blocos", também o tamanho dos blocos
+gravados ao lado do HTML e, com "--comprimir", o tamanho do HTML em gzip.
+
+Com "--por-local N", as linhas se concentram em linhas / N locais (distribuição de Zipf, como vários clientes no
+mesmo prédio). Com "--navegador", mede também o tempo até os marcadores aparecerem em um Chromium headless (requer
+"pip install playwright" e "playwright install chromium"), com o mapa servido por HTTP; no modo "blocos", o tempo
+até o primeiro desenho (círculos por bloco) e, após aproximar o mapa do ponto mais frequente, até os marcadores.
+
+Uso:
+    python -m benchmarks.bench_mapa --linhas 1000 10000 100000
+    python -m benchmarks.bench_mapa --linhas 10000 100000 --por-local 20 --navegador
+"""
+
+import argparse
+import functools
+import os
+import tempfile
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from cepfoliummap.constants import MAPA_BLOCOS_ZOOM
+from cepfoliummap.mapa import (
+    MODO_BLOCOS,
+    MODO_DENSIDADE,
+    MODO_MARCADORES,
+    MODO_RAPIDO,
+    gerar_mapa,
+    salvar_mapa,
+)
+
+
+def gerar_pontos(linhas, grupos=5, seed=0, por_local=1):
+    rng = np.random.default_rng(seed)
+
+    if por_local > 1:
+        # Locais repetidos: cada linha sorteia um local (e o grupo do local), com poucos locais muito frequentes
+        locais = max(linhas // por_local, 1)
+        local = (rng.zipf(1.5, linhas) - 1) % locais
+        return pd.DataFrame(
+            {
+                "cep": np.char.zfill(
+                    rng.integers(1_000_000, 99_999_999, locais).astype(str), 8
+                )[local],
+                "grupo": rng.choice([f"Grupo {i}" for i in range(grupos)], locais)[
+                    local
+                ],
+                "latitude": rng.uniform(-33.0, 5.0, locais)[local],
+                "longitude": rng.uniform(-73.0, -35.0, locais)[local],
+                "icon": rng.choice(["home", "star", None], linhas),
+                "color": rng.choice(["red", "green", "blue", None], linhas),
+                "texto": [f"Cliente {i}" for i in range(linhas)],
+            }
+        )
+
+    return pd.DataFrame(
+        {
+            "cep": np.char.zfill(
+                rng.integers(1_000_000, 99_999_999, linhas).astype(str), 8
+            ),
+            "grupo": rng.choice([f"Grupo {i}" for i in range(grupos)], linhas),
+            "latitude": rng.uniform(-33.0, 5.0, linhas),
+            "longitude": rng.uniform(-73.0, -35.0, linhas),
+            "icon": rng.choice(["home", "star", None], linhas),
+            "color": rng.choice(["red", "green", "blue", None], linhas),
+            "texto": [f"Cliente {i}" for i in range(linhas)],
+        }
+    )
+
+
+def medir(dataframe, modo, agrupar=False, navegador=False, comprimir=False):
+    with tempfile.TemporaryDirectory() as diretorio:
+        filename = os.path.join(diretorio, "mapa.html")
+
+        contadores = {}
+        inicio = time.perf_counter()
+        salvar_mapa(
+            gerar_mapa(dataframe, modo, agrupar=agrupar),
+            filename,
+            comprimir_arquivos=comprimir,
+            contadores=contadores,
+        )
+        duracao = time.perf_counter() - inicio
+
+        renderizacao = None
+        if navegador:
+            # Ponto mais frequente: onde os marcadores do modo "blocos" são carregados após aproximar o mapa
+            centro = None
+            if modo == MODO_BLOCOS:
+                centro = dataframe.groupby(["latitude", "longitude"]).size().idxmax()
+            renderizacao = renderizar(filename, centro)
+
+        return duracao, contadores, renderizacao
+
+
+def renderizar(filename, centro=None, timeout_ms=300_000):
+    """
+    Tempo (s) entre abrir o HTML (servido por HTTP) em um Chromium headless e o primeiro marcador, cluster, célula
+    ou círculo ser desenhado. Com "centro" (latitude, longitude), retorna também o tempo entre aproximar o mapa desse
+    ponto (no zoom MAPA_BLOCOS_ZOOM) e o primeiro marcador aparecer.
+    """
+
+    from playwright.sync_api import sync_playwright
+
+    servidor = ThreadingHTTPServer(
+        ("127.0.0.1", 0),
+        functools.partial(
+            _SilentHandler, directory=str(Path(filename).resolve().parent)
+        ),
+    )
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{servidor.server_port}/{Path(filename).name}"
+
+    try:
+        with sync_playwright() as playwright:
+            browser = playwright.chromium.launch()
+            try:
+                page = browser.new_page()
+                inicio = time.perf_counter()
+                page.goto(url, wait_until="domcontentloaded")
+                page.wait_for_selector(
+                    ".leaflet-marker-icon, .leaflet-interactive, canvas.leaflet-zoom-animated",
+                    timeout=timeout_ms,
+                )
+                primeiro = time.perf_counter() - inicio
+                if centro is None:
+                    return primeiro, None
+
+                inicio = time.perf_counter()
+                page.evaluate(
+                    """([lat, lng, zoom]) => {
+                        var nome = Object.keys(window).find((chave) => chave.startsWith("map_"));
+                        window[nome].setView([lat, lng], zoom, {animate: false});
+                    }""",
+                    [float(centro[0]), float(centro[1]), MAPA_BLOCOS_ZOOM + 2],
+                )
+                page.wait_for_selector(".leaflet-marker-icon", timeout=timeout_ms)
+                return primeiro, time.perf_counter() - inicio
+            finally:
+                browser.close()
+    finally:
+        servidor.shutdown()
+
+
+class _SilentHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--linhas", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument(
+        "--max-marcadores",
+        type=int,
+        default=10_000,
+        help="Tamanho máximo em que o modo marcadores também é medido",
+    )
+    parser.add_argument(
+        "--por-local",
+        type=int,
+        default=1,
+        help="Média de linhas por local (1 = sem locais repetidos)",
+    )
+    parser.add_argument(
+        "--navegador",
+        action="store_true",
+        help="Mede o tempo de renderização em um Chromium headless (playwright)",
+    )
+    parser.add_argument(
+        "--comprimir",
+        action="store_true",
+        help="Grava também as versões .gz/.br e mostra o tamanho do HTML em gzip",
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'linhas':>10} {'modo':>12} {'agrupado':>9} {'tempo (s)':>10} {'HTML (MB)':>10} {'blocos (MB)':>12}"
+        + (f" {'HTML gzip (MB)':>15}" if args.comprimir else "")
+        + (f" {'navegador (s)':>14} {'marcadores (s)':>15}" if args.navegador else "")
+    )
+
+    for linhas in args.linhas:
+        dataframe = gerar_pontos(linhas, por_local=args.por_local)
+
+        # (modo, agrupar): o agrupamento não se aplica ao modo densidade
+        casos = [
+            (MODO_RAPIDO, False),
+            (MODO_RAPIDO, True),
+            (MODO_DENSIDADE, False),
+            (MODO_BLOCOS, True),
+        ]
+        if linhas <= args.max_marcadores:
+            casos[:0] = [(MODO_MARCADORES, False), (MODO_MARCADORES, True)]
+
+        for modo, agrupar in casos:
+            duracao, contadores, renderizacao = medir(
+                dataframe, modo, agrupar, args.navegador, args.comprimir
+            )
+            primeiro, marcadores = renderizacao or (None, None)
+            print(
+                f"{linhas:>10} {modo:>12} {'sim' if agrupar else 'não':>9} {duracao:>10.2f} "
+                f"{contadores['html_bytes'] / 1e6:>10.2f} {contadores.get('blocos_bytes', 0) / 1e6:>12.2f}"
+                + (
+                    f" {contadores['html_comprimido_bytes'] / 1e6:>15.2f}"
+                    if args.comprimir
+                    else ""
+                )
+                + (
+                    f" {primeiro:>14.2f} "
+                    + (
+                        f"{marcadores:>15.2f}"
+                        if marcadores is not None
+                        else f"{'-':>15}"
+                    )
+                    if args.navegador
+                    else ""
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Benchmark: pico de memória residente (RSS) de uma execução completa (engine.executar), por milhão de linhas.
+
+Cada tamanho é executado em um processo novo, para que o pico de um não contamine o dos outros. Todos os CEPs da
+planilha já estão no cache local, então a execução não faz requisições e mede apenas o caminho dos DataFrames:
+leitura, filtro dos CEPs a consultar, preenchimento das coordenadas e o mapa no modo "densidade" (cujo tamanho
+depende das células ocupadas, não das linhas). Também é medida a memória do DataFrame lido (memory_usage(deep=True)).
+
+Uso:
+    python -m benchmarks.bench_memoria --linhas 1000000 2000000 --saida memoria.json
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.bench_ingestao import salvar
+from benchmarks.bench_pipeline import gerar_planilha
+from benchmarks.memoria import memoria, zerar_pico
+
+
+def preencher_cache(planilha, cache_path, seed=0):
+    """
+    Grava no cache local um resultado com coordenadas (como texto, igual à BrasilAPI) para cada CEP da planilha.
+    """
+
+    from cepfoliummap.cache import CepCache
+    from cepfoliummap.planilha import get_dataframe
+
+    ceps = get_dataframe(planilha)["cep"].dropna().unique()
+    rng = np.random.default_rng(seed)
+    latitudes = rng.uniform(-33.0, 5.0, len(ceps)).round(7)
+    longitudes = rng.uniform(-73.0, -35.0, len(ceps)).round(7)
+
+    with CepCache(cache_path) as cache:
+        cache.put_many(
+            {
+                cep: {
+                    "cep": cep,
+                    "state": "SP",
+                    "location": {
+                        "type": "Point",
+                        "coordinates": {"latitude": str(lat), "longitude": str(lng)},
+                    },
+                }
+                for cep, lat, lng in zip(ceps, latitudes, longitudes)
+            }
+        )
+
+    return len(ceps)
+
+
+def _executar(planilha, cache_path, diretorio, resultados):
+    # Executado em um processo novo (pandas, folium e o motor já importados antes da medição):
+    from cepfoliummap.engine import CepFoliumMapEngine
+    from cepfoliummap.planilha import get_dataframe
+
+    os.chdir(diretorio)
+    Path("consultas").mkdir(exist_ok=True)
+
+    async def executar():
+        async with CepFoliumMapEngine(
+            cache_path=cache_path, indice_path=None
+        ) as engine:
+            return await engine.executar(
+                planilha,
+                arquivo_mapa=os.path.join(diretorio, "mapa.html"),
+                modo_mapa="densidade",
+                modo_prefixos="desligado",
+                relatorio=False,
+            )
+
+    zerar_pico()
+    antes, _ = memoria()
+    inicio = time.perf_counter()
+    asyncio.run(executar())
+    segundos = time.perf_counter() - inicio
+    _, pico = memoria()
+
+    dataframe = get_dataframe(planilha)
+    resultados.put(
+        {
+            "segundos": round(segundos, 2),
+            "pico_mb": round(pico - antes, 1),
+            "dataframe_mb": round(dataframe.memory_usage(deep=True).sum() / 1024**2, 1),
+            "dtypes": {
+                coluna: str(dtype) for coluna, dtype in dataframe.dtypes.items()
+            },
+        }
+    )
+
+
+def medir(planilha, cache_path, diretorio):
+    contexto = multiprocessing.get_context("spawn")
+    resultados = contexto.Queue()
+    processo = contexto.Process(
+        target=_executar, args=(planilha, cache_path, diretorio, resultados)
+    )
+    processo.start()
+    resultado = resultados.get()
+    processo.join()
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--linhas", type=int, nargs="+", default=[1_000_000, 2_000_000])
+    parser.add_argument(
+        "--unicos", type=float, default=0.2, help="Proporção de CEPs únicos"
+    )
+    parser.add_argument("--grupos", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--saida", help="Arquivo JSON com os resultados")
+    args = parser.parse_args()
+
+    # Lido (decouple) na importação do cepfoliummap, no processo da medição:
+    os.environ["JOURNAL"] = "False"
+
+    print(
+        f"{'linhas':>10} {'ceps':>9} {'tempo (s)':>10} {'pico (MB)':>10} {'MB/milhão':>10} {'DataFrame (MB)':>15}",
+        file=sys.stderr,
+    )
+
+    resultados = []
+    for linhas in args.linhas:
+        with tempfile.TemporaryDirectory() as diretorio:
+            planilha = os.path.join(diretorio, "planilha.csv")
+            cache_path = os.path.join(diretorio, "cache.sqlite3")
+            salvar(
+                gerar_planilha(linhas, args.unicos, args.grupos, args.seed), planilha
+            )
+            ceps = preencher_cache(planilha, cache_path, args.seed)
+
+            resultado = {
+                "linhas": linhas,
+                "ceps_unicos": ceps,
+                **medir(planilha, cache_path, diretorio),
+            }
+            resultado["pico_mb_por_milhao"] = round(
+                resultado["pico_mb"] * 1_000_000 / linhas, 1
+            )
+            resultados.append(resultado)
+
+        print(
+            f"{linhas:>10} {ceps:>9} {resultado['segundos']:>10.2f} {resultado['pico_mb']:>10.1f} "
+            f"{resultado['pico_mb_por_milhao']:>10.1f} {resultado['dataframe_mb']:>15.1f}",
+            file=sys.stderr,
+        )
+
+    texto = json.dumps(
+        {"benchmark": "memoria", "parametros": vars(args), "resultados": resultados},
+        indent=2,
+        ensure_ascii=False,
+    )
+    if args.saida:
+        Path(args.saida).write_text(texto, encoding="utf8")
+    else:
+        print(texto)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""
+Benchmark: todas as etapas de uma execução (leitura, consulta, preenchimento, geração e gravação do mapa), sem rede.
+
+A BrasilAPI e o Geocode são substituídos pelo servidor local (stub_server), com latência, erros, limitação e CEPs
+sem coordenadas configuráveis. As planilhas sintéticas repetem CEPs como uma planilha real (poucos CEPs muito
+frequentes e muitos raros) e têm grupos de tamanhos desiguais. Os resultados (tempo, vazão e pico de memória por
+etapa, tamanho do HTML e contadores do servidor e dos limitadores) são gravados em JSON para acompanhar regressões.
+
+Uso:
+    python -m benchmarks.bench_pipeline --linhas 1000 10000 100000 --latencia 0.02 --throttle 0.01 --saida bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_ingestao import salvar
+from benchmarks.memoria import memoria, zerar_pico
+from benchmarks.stub_server import StubConfig, StubServer
+
+FORMATOS = ("csv", "parquet", "xlsx")
+
+
+def gerar_planilha(linhas, unicos=0.2, grupos=8, seed=0):
+    """
+    Gera uma planilha sintética no formato de entrada (colunas "cep", "grupo", "icon", "color" e "texto").
+
+    Args:
+        linhas (int): Quantidade de linhas
+        unicos (float): Proporção de CEPs únicos em relação às linhas
+        grupos (int): Quantidade de grupos
+        seed (int): Semente do gerador aleatório
+
+    Returns:
+        pd.DataFrame
+    """
+
+    rng = np.random.default_rng(seed)
+
+    # Frequência dos CEPs e dos grupos segue uma lei de potência (Zipf):
+    def zipf(n, expoente):
+        pesos = 1 / np.arange(1, n + 1) ** expoente
+        return pesos / pesos.sum()
+
+    total_ceps = max(int(linhas * unicos), 1)
+    ceps = np.char.zfill(
+        rng.choice(99_999_999, total_ceps, replace=False).astype(str), 8
+    )
+    ceps = pd.Series(rng.choice(ceps, linhas, p=zipf(total_ceps, 0.8)))
+
+    # Alguns CEPs com máscara ("01310-100"), como em planilhas digitadas:
+    mascarados = rng.random(linhas) < 0.1
+    ceps = ceps.where(~mascarados, ceps.str[:5] + "-" + ceps.str[5:])
+
+    return pd.DataFrame(
+        {
+            "cep": ceps,
+            "grupo": rng.choice(
+                [f"Grupo {i}" for i in range(grupos)], linhas, p=zipf(grupos, 1.0)
+            ),
+            "icon": rng.choice(["home", "star", "circle-info", None], linhas),
+            "color": rng.choice(["red", "green", "blue", None], linhas),
+            "texto": np.char.add("Cliente ", np.arange(linhas).astype(str)),
+        }
+    )
+
+
+def medir(etapas, nome, quantidade, func, *args):
+    """
+    Executa uma etapa e registra tempo, vazão (itens por segundo) e pico de memória (acima do uso anterior).
+    """
+
+    zerar_pico()
+    antes, _ = memoria()
+    inicio = time.perf_counter()
+    resultado = func(*args)
+    if asyncio.iscoroutine(resultado):
+        resultado = asyncio.run(resultado)
+    segundos = time.perf_counter() - inicio
+    _, pico = memoria()
+
+    etapas[nome] = {
+        "segundos": round(segundos, 4),
+        "itens": quantidade,
+        "por_segundo": round(quantidade / segundos, 1) if segundos > 0 else None,
+        "pico_mb": round(max(pico - antes, 0.0), 1),
+    }
+    return resultado
+
+
+async def consultar(dataframe, args, diretorio):
+    from cepfoliummap.engine import CepFoliumMapEngine
+
+    async with CepFoliumMapEngine(
+        max_at_once=args.concorrencia,
+        max_per_second=args.taxa,
+        geocode_max_per_second=args.taxa,
+        cache_path=os.path.join(diretorio, "cache.sqlite3"),
+        indice_path=None,
+    ) as engine:
+        results = await engine.consultar_ceps(dataframe)
+        limitadores = {
+            nome: {
+                "sucessos": limiter.sucessos,
+                "throttles": limiter.throttles,
+                "falhas": limiter.falhas,
+                "retries": limiter.retries,
+            }
+            for nome, limiter in engine.limiters.items()
+        }
+
+    return results, limitadores
+
+
+def executar(linhas, args, server):
+    from cepfoliummap.engine import populate_dataframe_coordinates
+    from cepfoliummap.mapa import gerar_mapa, salvar_mapa
+    from cepfoliummap.planilha import get_dataframe
+
+    etapas = {}
+    contadores_antes = server.contadores
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        # export_results grava em "consultas/" (relativo ao diretório atual):
+        cwd = os.getcwd()
+        os.chdir(diretorio)
+        try:
+            Path("consultas").mkdir()
+
+            planilha = os.path.join(diretorio, f"planilha.{args.formato}")
+            salvar(
+                gerar_planilha(linhas, args.unicos, args.grupos, args.seed), planilha
+            )
+
+            dataframe = medir(etapas, "get_dataframe", linhas, get_dataframe, planilha)
+            ceps_unicos = dataframe["cep"].nunique()
+
+            results, limitadores = medir(
+                etapas,
+                "consultar_ceps",
+                ceps_unicos,
+                consultar,
+                dataframe,
+                args,
+                diretorio,
+            )
+
+            df_coordenadas = medir(
+                etapas,
+                "populate_dataframe_coordinates",
+                linhas,
+                populate_dataframe_coordinates,
+                dataframe,
+                results,
+            )
+            mapa = medir(
+                etapas, "gerar_mapa", linhas, gerar_mapa, df_coordenadas, args.modo_mapa
+            )
+            html = medir(
+                etapas,
+                "salvar_mapa",
+                linhas,
+                salvar_mapa,
+                mapa,
+                os.path.join(diretorio, "mapa.html"),
+            )
+            html_bytes = os.path.getsize(html)
+        finally:
+            os.chdir(cwd)
+
+    contadores = server.contadores
+    return {
+        "linhas": linhas,
+        "ceps_unicos": int(ceps_unicos),
+        "sem_coordenadas": int(
+            (
+                df_coordenadas["latitude"].isna() | df_coordenadas["longitude"].isna()
+            ).sum()
+        ),
+        "html_bytes": html_bytes,
+        "segundos": round(sum(etapa["segundos"] for etapa in etapas.values()), 4),
+        "etapas": etapas,
+        "servidor": {
+            chave: valor - contadores_antes.get(chave, 0)
+            for chave, valor in contadores.items()
+        },
+        "limitadores": limitadores,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--linhas", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--formato", choices=FORMATOS, default="csv")
+    parser.add_argument(
+        "--unicos", type=float, default=0.2, help="Proporção de CEPs únicos"
+    )
+    parser.add_argument("--grupos", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--modo-mapa", default="auto")
+    parser.add_argument(
+        "--concorrencia", type=int, default=50, help="Requisições simultâneas"
+    )
+    parser.add_argument(
+        "--taxa", type=float, default=1000, help="Requisições por segundo (por API)"
+    )
+    parser.add_argument(
+        "--backoff",
+        type=float,
+        default=0.01,
+        help="Base da espera entre tentativas (RETRY_BACKOFF_BASE)",
+    )
+
+    servidor = parser.add_argument_group("servidor local")
+    for campo, valor in asdict(StubConfig()).items():
+        if isinstance(valor, float):
+            servidor.add_argument(
+                f"--{campo.replace('_', '-')}", type=float, default=valor
+            )
+
+    parser.add_argument("--saida", help="Arquivo JSON com os resultados")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR)
+
+    config = StubConfig(
+        **{
+            campo: getattr(args, campo)
+            for campo, valor in asdict(StubConfig()).items()
+            if isinstance(valor, float)
+        }
+    )
+
+    with StubServer(config) as server:
+        # As URLs e a espera entre tentativas são lidas (decouple) na importação do cepfoliummap:
+        os.environ["BRASILAPI_URL"] = f"{server.url}api/cep/v2/"
+        os.environ["BRASILAPI_V1_URL"] = f"{server.url}api/cep/v1/"
+        os.environ["GEOCODE_URL"] = server.url
+        os.environ["RETRY_BACKOFF_BASE"] = str(args.backoff)
+        os.environ["JOURNAL"] = "False"
+
+        resultados = []
+        for linhas in args.linhas:
+            resultado = executar(linhas, args, server)
+            resultados.append(resultado)
+
+            print(
+                f"{linhas:>9} linhas | {resultado['ceps_unicos']:>8} CEPs | "
+                + " | ".join(
+                    f"{nome} {etapa['segundos']:.2f}s"
+                    for nome, etapa in resultado["etapas"].items()
+                )
+                + f" | HTML {resultado['html_bytes'] / 1e6:.1f} MB",
+                file=sys.stderr,
+            )
+
+    relatorio = {
+        "benchmark": "pipeline",
+        "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "ambiente": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "plataforma": platform.platform(),
+        },
+        "parametros": {
+            chave: valor
+            for chave, valor in vars(args).items()
+            if chave not in ("saida", "verbose")
+        },
+        "resultados": resultados,
+    }
+
+    texto = json.dumps(relatorio, indent=2, ensure_ascii=False)
+    if args.saida:
+        Path(args.saida).write_text(texto, encoding="utf8")
+    else:
+        print(texto)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark: populate_dataframe_coordinates vetorizado vs. implementação antiga (iterrows + .at).
+
+Uso:
+    python -m benchmarks.bench_populate --linhas 10000 100000 1000000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from cepfoliummap.engine import populate_dataframe_coordinates
+
+
+def populate_iterrows(dataframe, api_results):
+    # Implementação antiga, mantida apenas como referência (resultado e tempo):
+    df_coordenadas = dataframe.copy()
+
+    for index, row in df_coordenadas.iterrows():
+        if pd.notna(row["latitude"]) and pd.notna(row["longitude"]):
+            continue
+
+        cep = row["cep"]
+        coordenadas = (
+            api_results.get(cep, {}).get("location", {}).get("coordinates", {})
+        )
+
+        df_coordenadas.at[index, "latitude"] = coordenadas.get("latitude", np.nan)
+        df_coordenadas.at[index, "longitude"] = coordenadas.get("longitude", np.nan)
+
+    return df_coordenadas
+
+
+def gerar_dados(linhas, seed=0):
+    """
+    Gera um DataFrame sintético (5 linhas por CEP em média, 10% das linhas já com coordenadas) e os resultados
+    da API (80% dos CEPs com coordenadas, 10% sem coordenadas e 10% não encontrados).
+    """
+
+    rng = np.random.default_rng(seed)
+
+    unicos = max(linhas // 5, 1)
+    ceps = np.char.zfill(rng.integers(1_000_000, 99_999_999, unicos).astype(str), 8)
+
+    dataframe = pd.DataFrame({"cep": rng.choice(ceps, linhas)})
+    dataframe["latitude"] = None
+    dataframe["longitude"] = None
+    com_coordenadas = rng.random(linhas) < 0.1
+    dataframe.loc[com_coordenadas, "latitude"] = "-10.0"
+    dataframe.loc[com_coordenadas, "longitude"] = "-50.0"
+
+    api_results = {}
+    for cep, sorteio in zip(ceps, rng.random(unicos)):
+        if sorteio < 0.8:
+            coordinates = {"latitude": "-23.55", "longitude": "-46.63"}
+        elif sorteio < 0.9:
+            coordinates = {}
+        else:
+            continue
+        api_results[cep] = {"cep": cep, "location": {"coordinates": coordinates}}
+
+    return dataframe, api_results
+
+
+def medir(func, dataframe, api_results):
+    inicio = time.perf_counter()
+    resultado = func(dataframe, api_results)
+    return resultado, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--linhas", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument(
+        "--max-referencia",
+        type=int,
+        default=100_000,
+        help="Tamanho máximo em que a implementação antiga também é medida",
+    )
+    args = parser.parse_args()
+
+    print(f"{'linhas':>10} {'iterrows (s)':>14} {'vetorizado (s)':>16} {'ganho':>8}")
+
+    for linhas in args.linhas:
+        dataframe, api_results = gerar_dados(linhas)
+        # A implementação atual atualiza o DataFrame no próprio lugar (coordenadas em float32):
+        novo, tempo_novo = medir(
+            populate_dataframe_coordinates, dataframe.copy(), api_results
+        )
+
+        if linhas <= args.max_referencia:
+            antigo, tempo_antigo = medir(populate_iterrows, dataframe, api_results)
+            for coluna in ("latitude", "longitude"):
+                antigo[coluna] = antigo[coluna].astype(np.float32)
+            pd.testing.assert_frame_equal(novo, antigo)
+            print(
+                f"{linhas:>10} {tempo_antigo:>14.3f} {tempo_novo:>16.3f} {tempo_antigo / tempo_novo:>7.1f}x"
+            )
+        else:
+            print(f"{linhas:>10} {'-':>14} {tempo_novo:>16.3f} {'-':>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Benchmark: tempo de abertura da interface gráfica (importações e primeiro desenho da janela).
+
+Cada medição é feita em um processo novo. O detalhamento das importações vem de "python -X importtime"; o tempo até
+o primeiro desenho cria a janela (main.App) e processa os eventos pendentes, o que exige um display (sem display, o
+valor fica nulo). O código de saída é 1 quando o orçamento de importação é estourado ou quando algum módulo pesado é
+importado antes da janela abrir, servindo como verificação de regressões.
+
+Uso:
+    python -m benchmarks.bench_startup --repeticoes 5 --orcamento-ms 400 --saida startup.json
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+# Dependências que a janela não deve importar (carregadas na primeira execução ou pelo aquecimento):
+PROIBIDOS = ("pandas", "numpy", "folium", "httpx", "cepfoliummap.engine")
+
+_PRIMEIRO_DESENHO = """
+import json, sys, time
+inicio = time.perf_counter()
+import main
+importacao = time.perf_counter() - inicio
+try:
+    app = main.App()
+    app.update_idletasks()
+    app.update()
+    desenho = time.perf_counter() - inicio
+    app.destroy()
+except Exception:  # Sem display (tkinter.TclError)
+    desenho = None
+print(json.dumps({
+    "importacao_s": importacao,
+    "primeiro_desenho_s": desenho,
+    "proibidos": [m for m in %r if m in sys.modules],
+}))
+"""
+
+
+def _python(*args):
+    return subprocess.run(
+        [sys.executable, *args], cwd=RAIZ, capture_output=True, text=True, check=True
+    )
+
+
+def importtime(modulo="main"):
+    """
+    Detalhamento das importações de um módulo (python -X importtime).
+
+    Returns:
+        list: Lista de (módulo, próprio em µs, acumulado em µs, nível), na ordem do importtime
+    """
+
+    linhas = []
+    for linha in _python(
+        "-X", "importtime", "-c", f"import {modulo}"
+    ).stderr.splitlines():
+        if not linha.startswith("import time:") or "self [us]" in linha:
+            continue
+        proprio, acumulado, nome = linha.removeprefix("import time:").split("|")
+        nivel = (len(nome) - len(nome.lstrip())) // 2
+        linhas.append((nome.strip(), int(proprio), int(acumulado), nivel))
+    return linhas
+
+
+def primeiro_desenho(proibidos=PROIBIDOS):
+    return json.loads(_python("-c", _PRIMEIRO_DESENHO % (proibidos,)).stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument(
+        "--orcamento-ms",
+        type=float,
+        default=400,
+        help="Tempo máximo (mediana) para importar main.py",
+    )
+    parser.add_argument("--proibidos", nargs="*", default=list(PROIBIDOS))
+    parser.add_argument("--saida", help="Arquivo JSON com os resultados")
+    args = parser.parse_args()
+
+    medicoes = [primeiro_desenho(tuple(args.proibidos)) for _ in range(args.repeticoes)]
+    importacao_ms = statistics.median(m["importacao_s"] for m in medicoes) * 1000
+    desenhos = [m["primeiro_desenho_s"] for m in medicoes if m["primeiro_desenho_s"]]
+    desenho_ms = statistics.median(desenhos) * 1000 if desenhos else None
+    proibidos = sorted({modulo for m in medicoes for modulo in m["proibidos"]})
+
+    detalhes = importtime()
+    # Módulos mais caros (tempo acumulado, incluindo o que cada um importa):
+    mais_caros = sorted(detalhes, key=lambda linha: linha[2], reverse=True)[: args.top]
+
+    print(
+        f"Importação de main.py: {importacao_ms:.0f} ms (orçamento {args.orcamento_ms:.0f} ms)"
+    )
+    print(
+        "Primeiro desenho: "
+        + (f"{desenho_ms:.0f} ms" if desenho_ms is not None else "- (sem display)")
+    )
+    print(f"{'acumulado (ms)':>15} {'próprio (ms)':>13}  módulo")
+    for nome, proprio, acumulado, nivel in mais_caros:
+        print(
+            f"{acumulado / 1000:>15.1f} {proprio / 1000:>13.1f}  {'  ' * nivel}{nome}"
+        )
+
+    erros = []
+    if importacao_ms > args.orcamento_ms:
+        erros.append(f"orçamento de importação estourado: {importacao_ms:.0f} ms")
+    if proibidos:
+        erros.append(f"módulos pesados importados na abertura: {', '.join(proibidos)}")
+    for erro in erros:
+        print(f"ERRO: {erro}", file=sys.stderr)
+
+    if args.saida:
+        Path(args.saida).write_text(
+            json.dumps(
+                {
+                    "benchmark": "startup",
+                    "python": sys.version.split()[0],
+                    "importacao_ms": round(importacao_ms, 1),
+                    "primeiro_desenho_ms": (
+                        round(desenho_ms, 1) if desenho_ms is not None else None
+                    ),
+                    "orcamento_ms": args.orcamento_ms,
+                    "proibidos_importados": proibidos,
+                    "importtime": [
+                        {
+                            "modulo": nome,
+                            "proprio_ms": proprio / 1000,
+                            "acumulado_ms": acumulado / 1000,
+                            "nivel": nivel,
+                        }
+                        for nome, proprio, acumulado, nivel in mais_caros
+                    ],
+                },
+                indent=2,
+                ensure_ascii=False,
+            ),
+            encoding="utf8",
+        )
+
+    return 1 if erros else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,35 @@
+"""
+Medição de memória residente dos benchmarks.
+"""
+
+import resource
+
+
+def zerar_pico():
+    """
+    Zera o pico de memória do processo (apenas Linux, /proc/self/clear_refs); nos demais sistemas não faz nada.
+    """
+
+    try:
+        with open("/proc/self/clear_refs", "w") as file:
+            file.write("5")
+    except OSError:
+        pass
+
+
+def memoria():
+    """
+    Memória residente atual e pico (MB). No Linux o pico pode ser zerado antes da medição (zerar_pico); nos
+    demais sistemas o pico inclui o processo desde o início (ru_maxrss).
+    """
+
+    try:
+        with open("/proc/self/status") as file:
+            status = dict(linha.split(":", 1) for linha in file)
+        return (
+            int(status["VmRSS"].split()[0]) / 1024,
+            int(status["VmHWM"].split()[0]) / 1024,
+        )
+    except OSError:
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        return pico, pico
@@ -0,0 +1,211 @@
+"""
+Servidor HTTP local que imita as respostas da BrasilAPI e do Geocode, usado pelos benchmarks.
+
+O comportamento (latência, erros, limitação e CEPs sem coordenadas) é configurável com StubConfig; CEPs "sem
+coordenadas" e "não encontrados" são sorteados a partir do próprio CEP, então se repetem entre execuções. A latência
+pode ter uma cauda (uma parte das respostas muito mais lenta) e cada API ("brasilapi", "brasilapi_v1" e "geocode")
+pode ter a sua própria configuração, simulando provedores com distribuições de latência diferentes.
+
+Uso:
+    with StubServer(StubConfig(latencia=0.05, throttle=0.01)) as server:
+        server.url  # http://127.0.0.1:<porta>/ (BrasilAPI v2 em api/cep/v2/, v1 em api/cep/v1/, Geocode em /)
+        server.contadores  # {"brasilapi": ..., "brasilapi_v1": ..., "geocode": ..., "429": ..., ...}
+
+    config = StubConfig(latencia=0.05, cauda=0.05, latencia_cauda=5, apis={"brasilapi_v1": StubConfig(latencia=0.1)})
+"""
+
+import json
+import random
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+GEOCODE_THROTTLED = "Throttled! See geocode.xyz/pricing"
+
+
+@dataclass
+class StubConfig:
+    """
+    Comportamento do servidor (proporções entre 0 e 1, tempos em segundos).
+    """
+
+    latencia: float = 0.0
+    latencia_variacao: float = 0.0
+    cauda: float = 0.0  # Respostas com latência adicional de "latencia_cauda"
+    latencia_cauda: float = 0.0
+    erros: float = 0.0  # HTTP 500
+    throttle: float = 0.0  # HTTP 429 (BrasilAPI) ou "Throttled!" (Geocode)
+    retry_after: float = 0.0  # Cabeçalho "Retry-After" dos 429 (0: sem cabeçalho)
+    sem_coordenadas: float = 0.0  # CEPs da BrasilAPI sem coordenadas
+    nao_encontrados: float = 0.0  # HTTP 404 na BrasilAPI
+    geocode_sem_coordenadas: float = 0.0  # CEPs que o Geocode também não encontra
+    apis: dict = field(
+        default_factory=dict
+    )  # Configuração própria de uma API: {"brasilapi_v1": StubConfig(...)}
+
+
+def _sorteio(cep, salt):
+    # Valor determinístico em [0, 1) para cada CEP:
+    return zlib.crc32(f"{salt}:{cep}".encode()) / 2**32
+
+
+def brasilapi_payload(cep, com_coordenadas=True):
+    payload = {
+        "cep": cep,
+        "state": "SP",
+        "city": "São Paulo",
+        "neighborhood": "Centro",
+        "street": "Rua Exemplo",
+        "service": "stub",
+        "location": {
+            "type": "Point",
+            "coordinates": {
+                "longitude": "-46.633308",
+                "latitude": "-23.550520",
+            },
+        },
+    }
+    if not com_coordenadas:
+        payload["location"]["coordinates"] = {}
+    return payload
+
+
+def geocode_payload():
+    return {"latt": "-23.550520", "longt": "-46.633308"}
+
+
+def geocode_not_found_payload():
+    return {"error": {"code": "008", "description": "No result"}}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 para permitir conexões persistentes (keep-alive):
+    protocol_version = "HTTP/1.1"
+
+    def _send_json(self, payload, status=200, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        for nome, valor in (headers or {}).items():
+            self.send_header(nome, valor)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _simular(self, api):
+        """
+        Aplica latência e sorteia uma falha (erro ou limitação); retorna True se a resposta já foi enviada.
+        """
+
+        config = self.server.config.apis.get(api, self.server.config)
+        self.server.contar(api)
+
+        latencia = config.latencia + random.uniform(0, config.latencia_variacao)
+        if config.cauda and random.random() < config.cauda:
+            latencia += config.latencia_cauda
+        if latencia:
+            time.sleep(latencia)
+
+        sorteio = random.random()
+        if sorteio < config.erros:
+            self.server.contar("500")
+            self._send_json({"message": "erro simulado"}, status=500)
+            return True
+        if sorteio < config.erros + config.throttle:
+            self.server.contar("429")
+            if api == "geocode":
+                self._send_json({"latt": GEOCODE_THROTTLED})
+            else:
+                self._send_json(
+                    {"message": "limite simulado"},
+                    status=429,
+                    headers=(
+                        {"Retry-After": f"{config.retry_after:g}"}
+                        if config.retry_after
+                        else {}
+                    ),
+                )
+            return True
+        return False
+
+    def do_GET(self):
+        cep = self.path.rstrip("/").rsplit("/", 1)[-1]
+        api = "brasilapi_v1" if "/v1/" in self.path else "brasilapi"
+        if self._simular(api):
+            return
+
+        # CEPs não encontrados e sem coordenadas são os mesmos nas duas versões:
+        config = self.server.config
+        sorteio = _sorteio(cep, "brasilapi")
+        if sorteio < config.nao_encontrados:
+            self.server.contar("404")
+            self._send_json({"message": "CEP não encontrado"}, status=404)
+            return
+
+        payload = brasilapi_payload(
+            cep, sorteio >= config.nao_encontrados + config.sem_coordenadas
+        )
+        if api == "brasilapi_v1":
+            # A versão 1 não possui coordenadas:
+            del payload["location"]
+        self._send_json(payload)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length).decode("utf-8", errors="replace")
+        if self._simular("geocode"):
+            return
+
+        if _sorteio(body, "geocode") < self.server.config.geocode_sem_coordenadas:
+            self._send_json(geocode_not_found_payload())
+            return
+        self._send_json(geocode_payload())
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config):
+        super().__init__(address, StubHandler)
+        self.config = config
+        self.contadores = Counter()
+        self._lock = threading.Lock()
+
+    def handle_error(self, request, client_address):
+        # Requisições canceladas pelo cliente (ex.: consultas "hedged" já respondidas) fecham a conexão:
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def contar(self, chave):
+        with self._lock:
+            self.contadores[chave] += 1
+
+
+class StubServer:
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        self.httpd = _StubHTTPServer((host, port), config or StubConfig())
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    @property
+    def contadores(self):
+        return dict(self.httpd.contadores)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
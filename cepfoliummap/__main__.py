@@ -0,0 +1,254 @@
+"""
+Execução em lote (sem interface gráfica):
+
+    python -m cepfoliummap planilha1.xls planilha2.xls --saida mapas/
+
+Ou como serviço, processando as planilhas que chegarem a um diretório (ver cepfoliummap.servico):
+
+    python -m cepfoliummap --vigiar entrada/ --saida mapas/
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from pathlib import Path
+
+from cepfoliummap.config import initial_config
+from cepfoliummap.constants import (
+    CACHE_PATH,
+    GEOCODE_REQUESTS_SECOND,
+    HEDGE,
+    HEDGE_PROVEDORES,
+    INDICE_PATH,
+    MAPA_AGRUPAR_LOCAIS,
+    MAPA_MODO,
+    MAPA_PARTICIONAR,
+    MAPA_PARTICOES,
+    MAX_AT_ONCE,
+    PREFIXO_MODO,
+    RELATORIO,
+    REQUESTS_SECOND,
+    SERVICO_FILA,
+    SERVICO_INTERVALO,
+    SERVICO_PARALELISMO,
+)
+from cepfoliummap.engine import CepFoliumMapEngine
+from cepfoliummap.mapa import MODOS
+from cepfoliummap.prefixos import MODOS as MODOS_PREFIXO
+from cepfoliummap.provedores import PROVEDORES
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m cepfoliummap",
+        description="Gera mapas HTML a partir de planilhas de CEPs.",
+    )
+    parser.add_argument("arquivos", nargs="*", help="Planilhas de entrada")
+    parser.add_argument(
+        "--vigiar",
+        metavar="DIRETORIO",
+        help="Processar continuamente as planilhas novas ou alteradas deste diretório",
+    )
+    parser.add_argument(
+        "--paralelismo",
+        type=int,
+        default=SERVICO_PARALELISMO,
+        help=f"Planilhas processadas ao mesmo tempo com --vigiar (padrão: {SERVICO_PARALELISMO})",
+    )
+    parser.add_argument(
+        "--intervalo",
+        type=float,
+        default=SERVICO_INTERVALO,
+        help=f"Segundos entre as verificações do diretório vigiado (padrão: {SERVICO_INTERVALO})",
+    )
+    parser.add_argument(
+        "--fila",
+        default=SERVICO_FILA,
+        help=f"Arquivo da fila persistente do --vigiar (padrão: {SERVICO_FILA})",
+    )
+    parser.add_argument(
+        "-o",
+        "--saida",
+        default="mapas/",
+        help="Diretório onde os mapas serão salvos (padrão: mapas/)",
+    )
+    parser.add_argument(
+        "--json",
+        help="Arquivo JSON no padrão da BrasilAPI a ser importado para o cache",
+    )
+    parser.add_argument(
+        "--sem-api",
+        action="store_true",
+        help="Não consumir as APIs, utilizando apenas o cache local",
+    )
+    parser.add_argument("--api-key", help="API Key do Geocode")
+    parser.add_argument(
+        "--max-at-once",
+        type=int,
+        default=MAX_AT_ONCE,
+        help=f"Requisições simultâneas iniciais; aumentam enquanto a API responde bem (padrão: {MAX_AT_ONCE})",
+    )
+    parser.add_argument(
+        "--max-per-second",
+        type=float,
+        default=REQUESTS_SECOND,
+        help=f"Requisições por segundo iniciais; aumentam enquanto a API responde bem (padrão: {REQUESTS_SECOND})",
+    )
+    parser.add_argument(
+        "--geocode-max-per-second",
+        type=float,
+        default=GEOCODE_REQUESTS_SECOND,
+        help=f"Requisições por segundo ao Geocode (padrão: {GEOCODE_REQUESTS_SECOND})",
+    )
+    parser.add_argument(
+        "--modo-mapa",
+        choices=MODOS,
+        default=MAPA_MODO,
+        help=f"Modo de geração dos marcadores (padrão: {MAPA_MODO})",
+    )
+    parser.add_argument(
+        "--agrupar-locais",
+        action="store_true",
+        default=MAPA_AGRUPAR_LOCAIS,
+        help="Um único marcador por local (linhas com o mesmo grupo e as mesmas coordenadas)",
+    )
+    parser.add_argument(
+        "--particionar",
+        choices=MAPA_PARTICOES,
+        default=MAPA_PARTICIONAR or None,
+        help="Um mapa por grupo ou por UF (em <saida>/<planilha>/, com uma página índice)",
+    )
+    parser.add_argument(
+        "--prefixos",
+        choices=MODOS_PREFIXO,
+        default=PREFIXO_MODO,
+        help=f"Uso do índice offline de prefixos de CEP para coordenadas aproximadas (padrão: {PREFIXO_MODO})",
+    )
+    parser.add_argument(
+        "--sem-relatorio",
+        action="store_true",
+        default=not RELATORIO,
+        help="Não gravar o relatório de desempenho (mapas/<nome>.relatorio.json)",
+    )
+    parser.add_argument(
+        "--sem-hedge",
+        action="store_true",
+        default=not HEDGE,
+        help="Consultar apenas o primeiro provedor, sem requisições de reserva",
+    )
+    parser.add_argument(
+        "--provedores",
+        nargs="+",
+        choices=PROVEDORES,
+        default=list(HEDGE_PROVEDORES),
+        help=f"Cadeia de provedores das consultas (padrão: {' '.join(HEDGE_PROVEDORES)})",
+    )
+    parser.add_argument(
+        "--cache",
+        default=CACHE_PATH,
+        help=f"Arquivo do cache local (padrão: {CACHE_PATH})",
+    )
+    parser.add_argument(
+        "--indice",
+        default=INDICE_PATH,
+        help=f"Índice compacto de CEP -> coordenadas, usado se existir (padrão: {INDICE_PATH})",
+    )
+
+    args = parser.parse_args(argv)
+    if not args.arquivos and not args.vigiar:
+        parser.error("informe as planilhas de entrada ou --vigiar DIRETORIO")
+    return args
+
+
+class ProgressPrinter:
+    """
+    Imprime o progresso no stdout, no máximo uma linha por ponto percentual de cada etapa.
+    """
+
+    def __init__(self):
+        self.ultimos = {}
+
+    def __call__(self, progresso):
+        percentual = (
+            int(progresso.feitos * 100 / progresso.total) if progresso.total else None
+        )
+        chave = (progresso.arquivo, progresso.etapa)
+        if chave in self.ultimos and self.ultimos[chave] == percentual:
+            return
+        self.ultimos[chave] = percentual
+
+        print(f"[{progresso.arquivo}] {progresso.resumo()}", flush=True)
+
+
+async def run(args):
+    saida = Path(args.saida)
+    saida.mkdir(parents=True, exist_ok=True)
+
+    falhas = 0
+    opcoes = dict(
+        consumir_api=not args.sem_api,
+        modo_mapa=args.modo_mapa,
+        modo_prefixos=args.prefixos,
+        relatorio=not args.sem_relatorio,
+        particionar=args.particionar,
+        agrupar_locais=args.agrupar_locais,
+    )
+
+    async with CepFoliumMapEngine(
+        api_key=args.api_key,
+        max_at_once=args.max_at_once,
+        max_per_second=args.max_per_second,
+        geocode_max_per_second=args.geocode_max_per_second,
+        cache_path=args.cache,
+        indice_path=args.indice,
+        on_progress=ProgressPrinter(),
+        hedge=not args.sem_hedge,
+        hedge_provedores=args.provedores,
+    ) as engine:
+        # O JSON é importado para o cache uma única vez, antes de todas as planilhas:
+        if args.json:
+            engine.cache.import_json(args.json)
+
+        for arquivo in args.arquivos:
+            try:
+                await engine.executar(
+                    arquivo,
+                    arquivo_mapa=str(saida / f"{Path(arquivo).stem}.html"),
+                    **opcoes,
+                )
+            except Exception as e:
+                falhas += 1
+                logger.exception(e)
+                logger.error(f"Erro ao processar o arquivo {arquivo}")
+
+        # Serviço: um único motor (cliente HTTP, limitadores e resultados em memória) para todas as planilhas
+        if args.vigiar:
+            from cepfoliummap.servico import servir
+
+            await servir(
+                engine,
+                args.vigiar,
+                saida,
+                fila_path=args.fila,
+                paralelismo=args.paralelismo,
+                intervalo=args.intervalo,
+                **opcoes,
+            )
+
+    return 1 if falhas else 0
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # Configurações iniciais:
+    initial_config()
+
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
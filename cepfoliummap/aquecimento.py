@@ -0,0 +1,49 @@
+import importlib
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Módulos com as dependências pesadas (pandas, numpy, folium, httpx), na ordem em que a execução precisa deles:
+MODULOS = (
+    "cepfoliummap.planilha",
+    "cepfoliummap.engine",
+    "cepfoliummap.client",
+    "cepfoliummap.mapa",
+    "cepfoliummap.merger",
+)
+
+
+def aquecer(modulos=MODULOS):
+    """
+    Função que importa os módulos pesados, para que a primeira execução não espere por eles.
+
+    Um erro de importação é apenas registrado: o mesmo erro voltará a acontecer (e será exibido) na execução.
+    """
+
+    inicio = time.perf_counter()
+    for modulo in modulos:
+        try:
+            importlib.import_module(modulo)
+        except Exception as e:
+            logger.warning(f"Aquecimento: erro ao importar {modulo}: {e}")
+            return
+
+    logger.debug(f"Aquecimento concluído em {time.perf_counter() - inicio:.2f}s")
+
+
+def aquecer_em_segundo_plano(modulos=MODULOS):
+    """
+    Função que executa o aquecimento em uma thread (daemon): uma execução iniciada antes do fim apenas aguarda a
+    importação em andamento (trava de importação do Python).
+
+    Returns:
+        threading.Thread
+    """
+
+    thread = threading.Thread(
+        target=aquecer, args=(modulos,), name="aquecimento", daemon=True
+    )
+    thread.start()
+    return thread
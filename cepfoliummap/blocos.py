@@ -0,0 +1,141 @@
+"""
+Pontos do mapa em blocos (modo "blocos"): os marcadores não ficam no HTML, e sim em arquivos GeoJSON ao lado dele,
+um por tile (grade do OpenStreetMap/Leaflet) de um zoom fixo. O navegador baixa apenas os blocos que cruzam a área
+visível; abaixo desse zoom, o HTML mostra apenas a quantidade de linhas de cada bloco.
+"""
+
+import json
+import logging
+from pathlib import Path
+
+import numpy as np
+
+from cepfoliummap.compressao import comprimir, remover
+
+logger = logging.getLogger(__name__)
+
+# Diretório dos blocos, ao lado do HTML: "mapas/planilha.html" -> "mapas/planilha.blocos/"
+SUFIXO_DIRETORIO = ".blocos"
+
+
+def indices_blocos(latitudes, longitudes, zoom):
+    """
+    Função que calcula, de forma vetorizada, o tile (x, y) de cada ponto no zoom informado, com a mesma projeção
+    (Web Mercator) usada pelo Leaflet em map.project(latlng, zoom) / 256.
+
+    Returns:
+        tuple: (x, y), arrays int64
+    """
+
+    n = 2**zoom
+    latitudes = np.radians(
+        np.clip(np.asarray(latitudes, np.float64), -85.0511, 85.0511)
+    )
+    x = np.floor((np.asarray(longitudes, np.float64) + 180) / 360 * n)
+    y = np.floor((1 - np.arcsinh(np.tan(latitudes)) / np.pi) / 2 * n)
+
+    return (
+        np.clip(x, 0, n - 1).astype(np.int64),
+        np.clip(y, 0, n - 1).astype(np.int64),
+    )
+
+
+def montar_blocos(latitudes, longitudes, grupos, estilos, textos, zoom):
+    """
+    Função que distribui os pontos em blocos GeoJSON (FeatureCollection), um por tile.
+
+    Cada ponto guarda apenas o índice do grupo ("g"), o índice do estilo ("e") e o texto do popup ("t").
+
+    Args:
+        latitudes, longitudes (np.ndarray): Coordenadas (sem NaN)
+        grupos (np.ndarray): Índice do grupo de cada ponto
+        estilos (np.ndarray): Índice do par (icon, color) de cada ponto
+        textos (np.ndarray): Popup (HTML) de cada ponto
+        zoom (int): Zoom dos tiles
+
+    Returns:
+        tuple: (blocos, indice): {"x-y": conteúdo JSON (bytes)} e {"x-y": [linhas, latitude média, longitude média]}
+    """
+
+    x, y = indices_blocos(latitudes, longitudes, zoom)
+    chaves = x * 2**zoom + y
+    ordem = np.argsort(chaves, kind="stable")
+    unicas, inicios = np.unique(chaves[ordem], return_index=True)
+
+    blocos = {}
+    indice = {}
+    for chave, posicoes in zip(unicas.tolist(), np.split(ordem, inicios[1:])):
+        nome = f"{chave // 2**zoom}-{chave % 2**zoom}"
+        lats, lngs = latitudes[posicoes], longitudes[posicoes]
+        blocos[nome] = json.dumps(
+            {
+                "type": "FeatureCollection",
+                "features": [
+                    {
+                        "type": "Feature",
+                        "geometry": {"type": "Point", "coordinates": [lng, lat]},
+                        "properties": {"g": g, "e": e, "t": t},
+                    }
+                    for lat, lng, g, e, t in zip(
+                        lats.tolist(),
+                        lngs.tolist(),
+                        grupos[posicoes].tolist(),
+                        estilos[posicoes].tolist(),
+                        textos[posicoes].tolist(),
+                    )
+                ],
+            },
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode("utf-8")
+        indice[nome] = [
+            len(posicoes),
+            round(float(lats.mean()), 6),
+            round(float(lngs.mean()), 6),
+        ]
+
+    return blocos, indice
+
+
+def salvar_blocos(blocos, diretorio, comprimir_arquivos=False):
+    """
+    Função que grava os blocos em "<diretorio>/<x>-<y>.json", regravando apenas os que mudaram e removendo os que
+    deixaram de existir (ao gerar novamente o mapa de uma planilha com poucas alterações, poucos arquivos mudam).
+
+    Args:
+        blocos (dict): Resultado de montar_blocos
+        diretorio (str): Diretório dos blocos
+        comprimir_arquivos (bool): Gravar também as versões .gz/.br de cada bloco (ver compressao.comprimir)
+
+    Returns:
+        dict: {"blocos": quantidade, "blocos_alterados": regravados, "blocos_bytes": tamanho total}
+    """
+
+    diretorio = Path(diretorio)
+    diretorio.mkdir(parents=True, exist_ok=True)
+
+    alterados = 0
+    for nome, conteudo in blocos.items():
+        filename = diretorio / f"{nome}.json"
+        inalterado = filename.exists() and filename.read_bytes() == conteudo
+        if not inalterado:
+            filename.write_bytes(conteudo)
+            alterados += 1
+        if comprimir_arquivos and not (inalterado and Path(f"{filename}.gz").exists()):
+            comprimir(filename)
+
+    # Blocos de uma versão anterior do mapa:
+    for filename in diretorio.glob("*.json"):
+        if filename.stem not in blocos:
+            remover(filename)
+
+    tamanho = sum(len(conteudo) for conteudo in blocos.values())
+    logger.info(
+        f"Blocos: {len(blocos)} arquivos ({alterados} alterados, {tamanho / 1e6:.1f} MB) em {diretorio}"
+    )
+
+    return {
+        "blocos": len(blocos),
+        "blocos_alterados": alterados,
+        "blocos_bytes": tamanho,
+    }
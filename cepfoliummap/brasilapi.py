@@ -0,0 +1,68 @@
+import logging
+
+from cepfoliummap.constants import BRASILAPI_URL
+from cepfoliummap.ratelimit import request_with_retry
+
+logger = logging.getLogger(__name__)
+
+
+async def buscar_cep(client, limiter, cep, url=BRASILAPI_URL, ao_enviar=None):
+    """
+    Função que efetivamente consome a API do BrasilAPI para obter as coordenadas de um CEP de forma assíncrona.
+
+    CEPs sem coordenadas são retornados assim mesmo; a consulta ao Geocode é feita em uma etapa separada. A versão
+    1 da API (BRASILAPI_V1_URL) não possui coordenadas e seus resultados recebem uma "location" vazia.
+
+    Args:
+        client (httpx.AsyncClient): Cliente HTTP compartilhado pela execução
+        limiter (AdaptiveLimiter): Limitador adaptativo da versão consultada (com o timeout adaptativo)
+        cep (str): CEP a ser consultado
+        url (str): URL base da versão da API (BRASILAPI_URL ou BRASILAPI_V1_URL)
+        ao_enviar (callable): Ver ratelimit.request_with_retry [opcional]
+
+    Returns:
+        dict: Resultado no padrão da BrasilAPI, um dicionário vazio caso o CEP não seja encontrado (HTTP 404) ou None
+            caso a consulta falhe (após as novas tentativas ou com outro status)
+    """
+
+    # BrasilAPI:
+    try:
+        logger.debug("Consultando CEP no BrasilAPI: %s", cep)
+        brasilapi_response = await request_with_retry(
+            limiter,
+            lambda: client.get(f"{url}{cep}", timeout=limiter.timeout()),
+            f"CEP {cep}",
+            ao_enviar,
+        )
+    except Exception as e:
+        logger.exception(e)
+        logger.error("Error ao tentar consumir BrasilAPI para o CEP %s", cep)
+        return None
+
+    if brasilapi_response.status_code == 200:
+        brasilapi_json = brasilapi_response.json()
+        brasilapi_json.setdefault("location", {"type": "Point", "coordinates": {}})
+
+        if "latitude" in brasilapi_json["location"]["coordinates"]:
+            logger.debug(
+                "CEP %s possui coordenadas: %s",
+                cep,
+                brasilapi_json["location"]["coordinates"],
+            )
+        else:
+            logger.debug("CEP %s não possui coordenadas na BrasilAPI", cep)
+
+        return brasilapi_json
+
+    # CEP inexistente:
+    if brasilapi_response.status_code == 404:
+        logger.warning("CEP %s não encontrado na BrasilAPI", cep)
+        return {}
+
+    # Demais status (400, 401, 403, 408...): falha, o CEP é consultado novamente na próxima execução
+    logger.warning(
+        "BrasilAPI respondeu HTTP %s para o CEP %s",
+        brasilapi_response.status_code,
+        cep,
+    )
+    return None
@@ -0,0 +1,469 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+
+from cepfoliummap.cep import normalize_cep
+from cepfoliummap.constants import (
+    CACHE_MEMORIA_MAXIMO,
+    CACHE_PATH,
+    CACHE_TTL_BRASILAPI,
+    CACHE_TTL_GEOCODE,
+    CACHE_TTL_NAO_ENCONTRADOS,
+    CACHE_TTL_SEM_COORDENADAS,
+)
+
+logger = logging.getLogger(__name__)
+
+SOURCE_BRASILAPI = "brasilapi"
+SOURCE_GEOCODE = "geocode"
+SOURCE_NAO_ENCONTRADO = "nao_encontrado"
+
+# Limite seguro de parâmetros por consulta no SQLite:
+_CHUNK_SIZE = 900
+# Resultados gravados por transação na importação de arquivos JSON:
+_IMPORT_BATCH_SIZE = 10_000
+
+
+def iter_json_results(filename, tamanho_bloco=1 << 20):
+    """
+    Função que percorre um arquivo JSON no padrão da BrasilAPI ({cep: resultado}) sem carregá-lo inteiro na memória.
+
+    Args:
+        filename (str): Caminho do arquivo JSON
+        tamanho_bloco (int): Quantidade de caracteres lidos do arquivo por vez
+
+    Yields:
+        tuple: (cep, resultado)
+    """
+
+    decoder = json.JSONDecoder()
+
+    with open(filename, "r", encoding="utf-8") as file:
+        buffer = ""
+        posicao = 0
+        fim = False
+
+        def ler_mais():
+            nonlocal buffer, posicao, fim
+            bloco = file.read(tamanho_bloco)
+            buffer = buffer[posicao:] + bloco
+            posicao = 0
+            fim = not bloco
+
+        def proximo_caractere():
+            # Próximo caractere (ignorando espaços), lendo mais do arquivo se necessário:
+            nonlocal posicao
+            while True:
+                while posicao < len(buffer) and buffer[posicao].isspace():
+                    posicao += 1
+                if posicao < len(buffer):
+                    return buffer[posicao]
+                if fim:
+                    raise ValueError(f"Arquivo JSON incompleto: {filename}")
+                ler_mais()
+
+        def decodificar():
+            # Próximo valor JSON completo (um valor no fim do buffer pode estar incompleto):
+            nonlocal posicao
+            while True:
+                proximo_caractere()
+                try:
+                    valor, final = decoder.raw_decode(buffer, posicao)
+                    if final < len(buffer) or fim:
+                        posicao = final
+                        return valor
+                except json.JSONDecodeError:
+                    if fim:
+                        raise
+                ler_mais()
+
+        if proximo_caractere() != "{":
+            raise ValueError(
+                f"Arquivo JSON não é um objeto {{cep: resultado}}: {filename}"
+            )
+        posicao += 1
+
+        if proximo_caractere() == "}":
+            return
+
+        while True:
+            cep = decodificar()
+            if proximo_caractere() != ":":
+                raise ValueError(f"Arquivo JSON inválido: {filename}")
+            posicao += 1
+
+            yield cep, decodificar()
+
+            separador = proximo_caractere()
+            posicao += 1
+            if separador == "}":
+                return
+            if separador != ",":
+                raise ValueError(f"Arquivo JSON inválido: {filename}")
+
+
+def get_coordinates(payload):
+    """
+    Função que extrai as coordenadas de um resultado no padrão da BrasilAPI.
+
+    Args:
+        payload (dict): Resultado no padrão da BrasilAPI
+
+    Returns:
+        tuple: (latitude, longitude) como float, ou (None, None) caso não existam
+    """
+
+    coordenadas = payload.get("location", {}).get("coordinates", {}) or {}
+
+    try:
+        return float(coordenadas["latitude"]), float(coordenadas["longitude"])
+    except (KeyError, TypeError, ValueError):
+        return None, None
+
+
+def set_coordinates(payload, latitude, longitude, source):
+    """
+    Função que atualiza as coordenadas (e a origem delas) de um resultado no padrão da BrasilAPI.
+    """
+
+    coordenadas = payload.setdefault("location", {}).setdefault("coordinates", {})
+    coordenadas["latitude"] = latitude
+    coordenadas["longitude"] = longitude
+    coordenadas["source"] = source
+
+
+def not_found_payload(cep):
+    """
+    Função que cria o resultado de um CEP confirmado como inexistente (404 da BrasilAPI), guardado no cache com o TTL
+    CACHE_TTL_NAO_ENCONTRADOS para não ser consultado novamente a cada execução.
+    """
+
+    return {"cep": cep, "nao_encontrado": True}
+
+
+def is_not_found(payload):
+    """
+    Função que indica se um resultado é de um CEP confirmado como inexistente (ver not_found_payload).
+    """
+
+    return bool(payload) and payload.get("nao_encontrado") is True
+
+
+def get_source(payload):
+    """
+    Função que identifica a origem das coordenadas de um resultado no padrão da BrasilAPI.
+    """
+
+    if is_not_found(payload):
+        return SOURCE_NAO_ENCONTRADO
+
+    coordenadas = payload.get("location", {}).get("coordinates", {}) or {}
+    return coordenadas.get("source", SOURCE_BRASILAPI)
+
+
+class CepCache:
+    """
+    Cache local e persistente (SQLite) dos resultados da BrasilAPI/Geocode, indexado pelo CEP normalizado.
+
+    Cada registro guarda o JSON da BrasilAPI, as coordenadas (possivelmente obtidas pelo Geocode), a origem e o momento
+    da consulta. Registros com mais idade que o TTL da sua origem são ignorados na leitura e consultados novamente.
+    CEPs inexistentes são guardados com a origem SOURCE_NAO_ENCONTRADO (cache negativo).
+    """
+
+    def __init__(self, filename=CACHE_PATH, ttls=None):
+        self.filename = filename
+        self.ttls = {
+            SOURCE_BRASILAPI: CACHE_TTL_BRASILAPI,
+            SOURCE_GEOCODE: CACHE_TTL_GEOCODE,
+            SOURCE_NAO_ENCONTRADO: CACHE_TTL_NAO_ENCONTRADOS,
+            **(ttls or {}),
+        }
+
+        self.connection = sqlite3.connect(filename)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS ceps (
+                cep TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                latitude REAL,
+                longitude REAL,
+                source TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+            """)
+        self.connection.commit()
+
+        logger.debug(f"Cache de CEPs aberto: {filename}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    # --------------
+    def _ttl(self, source, latitude):
+        if source == SOURCE_NAO_ENCONTRADO:
+            return self.ttls[SOURCE_NAO_ENCONTRADO]
+        if latitude is None:
+            return CACHE_TTL_SEM_COORDENADAS
+        return self.ttls.get(source, CACHE_TTL_BRASILAPI)
+
+    def _is_fresh(self, source, latitude, fetched_at, now):
+        return now - fetched_at <= self._ttl(source, latitude) * 86400
+
+    def get_many(self, ceps):
+        """
+        Função que busca no cache os resultados (ainda válidos) de vários CEPs.
+
+        Args:
+            ceps (iterable): CEPs a serem buscados (em qualquer formato)
+
+        Returns:
+            dict: Dicionário {cep: resultado}, com as chaves no mesmo formato recebido
+        """
+
+        chaves = {}
+        for cep in ceps:
+            normalizado = normalize_cep(cep)
+            if normalizado:
+                chaves.setdefault(normalizado, []).append(cep)
+
+        now = time.time()
+        results = {}
+
+        normalizados = list(chaves.keys())
+        for i in range(0, len(normalizados), _CHUNK_SIZE):
+            chunk = normalizados[i : i + _CHUNK_SIZE]
+            rows = self.connection.execute(
+                f"SELECT cep, payload, latitude, source, fetched_at FROM ceps WHERE cep IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            for cep, payload, latitude, source, fetched_at in rows:
+                if not self._is_fresh(source, latitude, fetched_at, now):
+                    continue
+
+                payload = json.loads(payload)
+                for original in chaves[cep]:
+                    results[original] = payload
+
+        logger.info(f"Cache: {len(results)} de {len(chaves)} CEPs encontrados")
+
+        return results
+
+    def put_many(self, results, fetched_at=None):
+        """
+        Função que grava vários resultados no cache em uma única transação.
+
+        Um registro existente só é substituído por outro igualmente ou mais recente.
+
+        Args:
+            results (dict): Dicionário {cep: resultado no padrão da BrasilAPI}
+            fetched_at (float): Momento da consulta (epoch); padrão é agora
+        """
+
+        if not results:
+            return
+
+        fetched_at = fetched_at or time.time()
+
+        rows = []
+        for cep, payload in results.items():
+            normalizado = normalize_cep(cep)
+            if not normalizado:
+                continue
+
+            lat, lng = get_coordinates(payload)
+            rows.append(
+                (
+                    normalizado,
+                    json.dumps(payload, ensure_ascii=False),
+                    lat,
+                    lng,
+                    get_source(payload),
+                    fetched_at,
+                )
+            )
+
+        with self.connection:
+            self.connection.executemany(
+                """
+                INSERT INTO ceps (cep, payload, latitude, longitude, source, fetched_at) VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(cep) DO UPDATE SET
+                    payload = excluded.payload,
+                    latitude = excluded.latitude,
+                    longitude = excluded.longitude,
+                    source = excluded.source,
+                    fetched_at = excluded.fetched_at
+                WHERE excluded.fetched_at >= ceps.fetched_at
+                """,
+                rows,
+            )
+
+        logger.debug(f"Cache: {len(rows)} CEPs gravados")
+
+    def coordinates(self):
+        """
+        Função que retorna todos os CEPs do cache que possuem coordenadas (independente do TTL).
+
+        Returns:
+            tuple: Listas (ceps, latitudes, longitudes)
+        """
+
+        rows = self.connection.execute(
+            "SELECT cep, latitude, longitude FROM ceps"
+            " WHERE latitude IS NOT NULL AND longitude IS NOT NULL"
+        ).fetchall()
+
+        if not rows:
+            return [], [], []
+        return tuple(map(list, zip(*rows)))
+
+    # --------------
+    def import_json(self, filename):
+        """
+        Função que importa para o cache um arquivo JSON no padrão da BrasilAPI ({cep: resultado}).
+
+        Registros já existentes no cache e mais recentes que o arquivo não são sobrescritos. O arquivo é lido aos
+        poucos e gravado em lotes, sem carregá-lo inteiro na memória.
+
+        Args:
+            filename (str): Caminho do arquivo JSON
+
+        Returns:
+            int: Quantidade de CEPs importados
+        """
+
+        # A data de modificação do arquivo é utilizada como data da consulta:
+        fetched_at = os.path.getmtime(filename)
+
+        total = 0
+        lote = {}
+        for cep, result in iter_json_results(filename):
+            lote[cep] = result
+            if len(lote) >= _IMPORT_BATCH_SIZE:
+                self.put_many(lote, fetched_at=fetched_at)
+                total += len(lote)
+                lote = {}
+        self.put_many(lote, fetched_at=fetched_at)
+        total += len(lote)
+
+        logger.info(f"Cache: {total} CEPs importados de {filename}")
+
+        return total
+
+    def export_json(self, filename):
+        """
+        Função que exporta todo o cache para um arquivo JSON no padrão da BrasilAPI ({cep: resultado}).
+
+        Args:
+            filename (str): Caminho do arquivo JSON
+
+        Returns:
+            int: Quantidade de CEPs exportados
+        """
+
+        total = 0
+
+        with open(filename, "w", encoding="utf8") as file:
+            file.write("{")
+            for cep, payload in self.connection.execute(
+                "SELECT cep, payload FROM ceps ORDER BY cep"
+            ):
+                if total:
+                    file.write(", ")
+                file.write(f"{json.dumps(cep)}: {payload}")
+                total += 1
+            file.write("}")
+
+        logger.info(f"Cache: {total} CEPs exportados para {filename}")
+
+        return total
+
+
+class MemoryCache:
+    """
+    Resultados recentes e consultas em andamento, mantidos em memória e compartilhados por todas as execuções de um
+    mesmo motor (ex.: as planilhas processadas ao mesmo tempo pelo serviço que vigia um diretório).
+
+    Uma execução que precisa de um CEP já consultado por outra recebe o resultado daqui, sem esperar que ele chegue ao
+    cache local (gravado ao final de cada consulta); se a outra execução ainda está consultando o CEP, aguarda a mesma
+    requisição em vez de fazer uma nova. Apenas os "maximo" resultados usados mais recentemente são mantidos.
+    """
+
+    def __init__(self, maximo=CACHE_MEMORIA_MAXIMO):
+        self.maximo = maximo
+        self.resultados = OrderedDict()
+        self.em_andamento = {}
+
+    def __len__(self):
+        return len(self.resultados)
+
+    def get_many(self, ceps):
+        """
+        Função que busca em memória os resultados de vários CEPs.
+
+        Returns:
+            dict: Dicionário {cep: resultado}
+        """
+
+        results = {}
+        for cep in ceps:
+            result = self.get(cep)
+            if result is not None:
+                results[cep] = result
+
+        return results
+
+    def get(self, cep):
+        result = self.resultados.get(cep)
+        if result is not None:
+            self.resultados.move_to_end(cep)
+        return result
+
+    def put(self, cep, result):
+        if self.maximo <= 0:
+            return
+
+        self.resultados[cep] = result
+        self.resultados.move_to_end(cep)
+        while len(self.resultados) > self.maximo:
+            self.resultados.popitem(last=False)
+
+    async def compartilhar(self, chave, consulta):
+        """
+        Função que executa uma consulta ou, se outra execução já está fazendo a mesma consulta, aguarda o resultado dela.
+
+        Args:
+            chave (tuple): Identificação da consulta, ex.: ("brasilapi", cep)
+            consulta (callable): Função sem argumentos que retorna a corrotina da consulta
+
+        Returns:
+            tuple: (resultado, compartilhado), com "compartilhado" verdadeiro se o resultado veio de outra execução;
+                se a consulta da outra execução falhar ou for cancelada, o resultado é None (falha)
+        """
+
+        futuro = self.em_andamento.get(chave)
+        if futuro is not None:
+            return await asyncio.shield(futuro), True
+
+        futuro = asyncio.get_running_loop().create_future()
+        self.em_andamento[chave] = futuro
+        try:
+            result = await consulta()
+        except BaseException:
+            futuro.set_result(None)
+            raise
+        finally:
+            del self.em_andamento[chave]
+
+        futuro.set_result(result)
+        return result, False
@@ -0,0 +1,251 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# Sufixo de CEPs lidos como número (float) pelo pandas, ex.: "1310100.0":
+_SUFIXO_FLOAT = r"^([0-9]+)\.0+$"
+# Separadores aceitos em um CEP (pontos, traços e espaços); qualquer outro caractere (ex.: letras) o invalida:
+_SEPARADORES = r"[.\-\s]"
+# De 1 a 8 dígitos (apenas ASCII, ex.: "１３１０１００" não é um CEP):
+_DIGITOS = r"[0-9]{1,8}"
+# Peso de cada um dos 8 dígitos do CEP:
+_PESOS = 10 ** np.arange(7, -1, -1)
+
+# Faixas de CEP (5 primeiros dígitos) de cada UF, segundo os Correios: (início da faixa, UF)
+_FAIXAS_UF = (
+    (1000, "SP"),
+    (20000, "RJ"),
+    (29000, "ES"),
+    (30000, "MG"),
+    (40000, "BA"),
+    (49000, "SE"),
+    (50000, "PE"),
+    (57000, "AL"),
+    (58000, "PB"),
+    (59000, "RN"),
+    (60000, "CE"),
+    (64000, "PI"),
+    (65000, "MA"),
+    (66000, "PA"),
+    (68900, "AP"),
+    (69000, "AM"),
+    (69300, "RR"),
+    (69400, "AM"),
+    (69900, "AC"),
+    (70000, "DF"),
+    (72800, "GO"),
+    (73000, "DF"),
+    (73700, "GO"),
+    (76800, "RO"),
+    (77000, "TO"),
+    (78000, "MT"),
+    (78900, None),
+    (79000, "MS"),
+    (80000, "PR"),
+    (88000, "SC"),
+    (90000, "RS"),
+)
+_FAIXAS_INICIO = np.array([inicio for inicio, _ in _FAIXAS_UF])
+_FAIXAS_SIGLA = np.array([uf for _, uf in _FAIXAS_UF], dtype=object)
+# Menor CEP existente (início da faixa de SP):
+_MENOR_CEP = _FAIXAS_UF[0][0] * 1000
+
+# Motivos de rejeição de um CEP (validate_ceps):
+MOTIVO_VAZIO = "vazio"
+MOTIVO_FORMATO = (
+    "formato"  # Não tem de 1 a 8 dígitos (ou tem letras e outros caracteres)
+)
+MOTIVO_REPETIDO = "digitos_repetidos"  # Ex.: 00000000, 99999999
+MOTIVO_FAIXA = "fora_das_faixas"  # Anterior a 01000-000
+
+
+def normalize_cep(cep):
+    """
+    Função que normaliza um CEP (8 dígitos, sem pontos, traços ou espaços), recuperando zeros à esquerda perdidos.
+    CEPs com letras ou outros caracteres (ex.: "3013001O") são inválidos, e não têm esses caracteres removidos.
+
+    Args:
+        cep (str|int|float): CEP a ser normalizado
+
+    Returns:
+        str: CEP normalizado, ou None caso não seja um CEP válido
+    """
+
+    if cep is None or pd.isna(cep):
+        return None
+
+    digitos = re.sub(_SEPARADORES, "", re.sub(_SUFIXO_FLOAT, r"\1", str(cep).strip()))
+    if not re.fullmatch(_DIGITOS, digitos):
+        return None
+
+    return digitos.zfill(8)
+
+
+def ceps_to_int(ceps):
+    """
+    Função que converte uma coluna inteira de CEPs (mesmas regras de normalize_cep) em inteiros; inválidos viram -1.
+
+    Args:
+        ceps (pd.Series|iterable): CEPs (texto, com ou sem pontos/traços, ou números)
+
+    Returns:
+        np.ndarray: Array int64
+    """
+
+    ceps = pd.Series(ceps)
+
+    # Colunas categóricas: cada CEP distinto é convertido uma única vez
+    if isinstance(ceps.dtype, pd.CategoricalDtype):
+        numeros = ceps_to_int(ceps.cat.categories)
+        codigos = ceps.cat.codes.to_numpy()
+        return np.where(codigos >= 0, numeros[codigos], -1)
+
+    # Colunas numéricas (ex.: lidas de uma planilha sem dtype) não passam por texto:
+    if pd.api.types.is_numeric_dtype(ceps) and not pd.api.types.is_bool_dtype(ceps):
+        valores = ceps.to_numpy(dtype=np.float64, na_value=np.nan)
+        validos = np.isfinite(valores) & (valores >= 0) & (valores < 10**8)
+        validos &= (
+            np.floor(valores, where=validos, out=np.zeros_like(valores)) == valores
+        )
+        return np.where(validos, valores, -1).astype(np.int64)
+
+    ceps = ceps.astype("string").fillna("")
+
+    # Caminho rápido: CEPs só com dígitos (1 a 8, ex.: sem os zeros à esquerda) são convertidos a partir dos bytes:
+    try:
+        matriz = ceps.to_numpy(dtype="S9").view(np.uint8).reshape(-1, 9)
+    except UnicodeEncodeError:
+        matriz = np.zeros((len(ceps), 9), dtype=np.uint8)
+
+    tamanhos = (matriz != 0).sum(axis=1)
+    preenchidos = np.arange(8) < tamanhos[:, None]
+    digitos = np.where(preenchidos, matriz[:, :8].astype(np.int64) - ord("0"), 0)
+    normalizados = (
+        ((digitos >= 0) & (digitos <= 9)).all(axis=1)
+        & (tamanhos >= 1)
+        & (matriz[:, 8] == 0)
+    )
+    numeros = np.where(
+        normalizados, digitos @ _PESOS // 10 ** (8 - np.minimum(tamanhos, 8)), -1
+    )
+
+    # Os demais passam pela remoção do sufixo ".0" e dos separadores; o que sobrar além de dígitos os invalida:
+    if not normalizados.all():
+        outros = (
+            ceps[~normalizados]
+            .str.strip()
+            .str.replace(_SUFIXO_FLOAT, r"\1", regex=True)
+            .str.replace(_SEPARADORES, "", regex=True)
+        )
+        outros = outros.where(outros.str.fullmatch(_DIGITOS).fillna(False))
+        numeros[~normalizados] = (
+            pd.to_numeric(outros, errors="coerce").fillna(-1).to_numpy(dtype=np.int64)
+        )
+
+    return numeros
+
+
+def normalize_ceps(ceps, numeros=None):
+    """
+    Função que normaliza uma coluna inteira de CEPs de uma só vez (mesmas regras de normalize_cep).
+
+    Args:
+        ceps (pd.Series|iterable): CEPs a serem normalizados
+        numeros (np.ndarray): Resultado de ceps_to_int(ceps), quando já calculado [opcional]
+
+    Returns:
+        pd.Series: CEPs normalizados (dtype "string"), com <NA> nos inválidos
+    """
+
+    ceps = pd.Series(ceps)
+    if numeros is None:
+        numeros = ceps_to_int(ceps)
+
+    # Inteiro -> 8 dígitos (com zeros à esquerda), montados diretamente como bytes:
+    digitos = (np.maximum(numeros, 0)[:, None] // _PESOS % 10 + ord("0")).astype(
+        np.uint8
+    )
+    textos = pd.Series(
+        digitos.view("S8").ravel().astype(str), index=ceps.index, dtype="string"
+    )
+
+    return textos.where(numeros >= 0)
+
+
+def ceps_categoricos(numeros, index=None):
+    """
+    Função que monta uma coluna categórica de CEPs normalizados (8 dígitos) a partir do resultado de ceps_to_int.
+
+    Cada CEP distinto é formatado (e guardado) uma única vez; cada linha guarda apenas o código do seu CEP.
+
+    Args:
+        numeros (np.ndarray): CEPs como inteiros (ceps_to_int); negativos viram <NA>
+        index (pd.Index): Índice da coluna [opcional]
+
+    Returns:
+        pd.Series: CEPs normalizados (dtype "category", com as categorias em ordem crescente)
+    """
+
+    distintos, codigos = np.unique(np.asarray(numeros), return_inverse=True)
+    invalidos = int((distintos < 0).sum())
+    categorias = normalize_ceps(distintos[invalidos:]).to_numpy(dtype=object)
+
+    return pd.Series(
+        pd.Categorical.from_codes(codigos.ravel() - invalidos, categories=categorias),
+        index=index,
+    )
+
+
+def validate_ceps(ceps, numeros=None):
+    """
+    Função que identifica, sem consultar nenhuma API, os CEPs que não podem existir: vazios, fora do formato (1 a 8
+    dígitos, sem letras), com todos os dígitos iguais (ex.: 00000000) ou anteriores à primeira faixa dos Correios (01000-000).
+
+    Args:
+        ceps (pd.Series|iterable): CEPs (em qualquer formato)
+        numeros (np.ndarray): Resultado de ceps_to_int(ceps), quando já calculado [opcional]
+
+    Returns:
+        np.ndarray: Array (object) com o motivo da rejeição de cada CEP, ou None nos válidos
+    """
+
+    ceps = pd.Series(ceps)
+    if numeros is None:
+        numeros = ceps_to_int(ceps)
+
+    # Vazios (apenas entre os que não são números válidos):
+    vazios = np.zeros(len(numeros), dtype=bool)
+    if (numeros < 0).any():
+        textos = ceps[numeros < 0].astype("string").str.strip()
+        vazios[numeros < 0] = textos.fillna("").eq("").to_numpy(dtype=bool)
+
+    return np.select(
+        [
+            vazios,
+            numeros < 0,
+            numeros % 11_111_111 == 0,
+            numeros < _MENOR_CEP,
+        ],
+        [MOTIVO_VAZIO, MOTIVO_FORMATO, MOTIVO_REPETIDO, MOTIVO_FAIXA],
+        default=None,
+    ).astype(object)
+
+
+def ufs_from_ceps(ceps):
+    """
+    Função que identifica a UF de uma coluna inteira de CEPs pela faixa de CEP de cada estado.
+
+    Args:
+        ceps (pd.Series|iterable): CEPs (em qualquer formato)
+
+    Returns:
+        np.ndarray: Array (object) com a sigla da UF, ou None para CEPs inválidos ou fora das faixas
+    """
+
+    prefixos = ceps_to_int(ceps) // 1000
+    posicoes = np.searchsorted(_FAIXAS_INICIO, prefixos, side="right") - 1
+
+    ufs = _FAIXAS_SIGLA[np.maximum(posicoes, 0)]
+    ufs[posicoes < 0] = None
+    return ufs
@@ -0,0 +1,45 @@
+import logging
+
+from httpx import AsyncClient, Limits, Timeout
+
+from cepfoliummap.constants import (
+    HTTP2,
+    POOL_KEEPALIVE_EXPIRY,
+    POOL_MAX_CONNECTIONS,
+    POOL_MAX_KEEPALIVE,
+    REQUEST_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def create_client(**kwargs):
+    """
+    Função que cria o cliente HTTP compartilhado por todas as consultas (BrasilAPI e Geocode) de uma execução.
+
+    O cliente mantém um pool de conexões persistentes (keep-alive) e negocia HTTP/2 quando o servidor suporta,
+    evitando um novo handshake TCP+TLS a cada CEP consultado.
+
+    Args:
+        **kwargs: Parâmetros extras repassados ao httpx.AsyncClient
+
+    Returns:
+        httpx.AsyncClient: Cliente que deve ser fechado pelo chamador (de preferência com "async with")
+    """
+
+    limits = Limits(
+        max_connections=POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=POOL_MAX_KEEPALIVE,
+        keepalive_expiry=POOL_KEEPALIVE_EXPIRY,
+    )
+
+    logger.debug(
+        f"Criando cliente HTTP (http2={HTTP2}, max_connections={POOL_MAX_CONNECTIONS}, max_keepalive={POOL_MAX_KEEPALIVE})"
+    )
+
+    return AsyncClient(
+        http2=HTTP2,
+        limits=limits,
+        timeout=Timeout(REQUEST_TIMEOUT),
+        **kwargs,
+    )
@@ -0,0 +1,58 @@
+import gzip
+import logging
+from functools import cache
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Extensões das versões pré-comprimidas (servidas diretamente por nginx "gzip_static"/"brotli_static", Caddy etc.):
+EXTENSOES = (".gz", ".br")
+
+
+def comprimir(filename):
+    """
+    Função que grava, ao lado de um arquivo, as versões pré-comprimidas para servidores estáticos: "<arquivo>.gz" e,
+    com o pacote brotli instalado (grupo opcional "brotli": poetry install --with brotli), "<arquivo>.br".
+
+    As versões são determinísticas (sem data no cabeçalho gzip): o mesmo conteúdo gera sempre os mesmos bytes.
+
+    Args:
+        filename (str): Caminho do arquivo
+
+    Returns:
+        int: Tamanho (em bytes) da menor versão comprimida
+    """
+
+    dados = Path(filename).read_bytes()
+    tamanhos = [_gravar(f"{filename}.gz", gzip.compress(dados, 9, mtime=0))]
+
+    try:
+        import brotli
+    except ImportError:
+        _avisar_sem_brotli()
+    else:
+        tamanhos.append(_gravar(f"{filename}.br", brotli.compress(dados, quality=11)))
+
+    return min(tamanhos)
+
+
+def remover(filename):
+    """
+    Função que remove um arquivo e as suas versões pré-comprimidas.
+    """
+
+    for caminho in (filename, *(f"{filename}{extensao}" for extensao in EXTENSOES)):
+        Path(caminho).unlink(missing_ok=True)
+
+
+@cache
+def _avisar_sem_brotli():
+    # Um único aviso por processo (e não um por arquivo):
+    logger.warning(
+        "Pacote brotli não instalado: apenas as versões .gz são geradas (poetry install --with brotli)"
+    )
+
+
+def _gravar(filename, dados):
+    Path(filename).write_bytes(dados)
+    return len(dados)
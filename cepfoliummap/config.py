@@ -1,15 +1,107 @@
+import atexit
+import copy
 import logging
+import queue
+import threading
+import time
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 
 from decouple import config
 from rich.logging import RichHandler
 
+from cepfoliummap.constants import (
+    LOGGING_AVISOS_JANELA,
+    LOGGING_AVISOS_REPETIDOS,
+    LOGGING_HTTPX_TERMINAL,
+)
+
 logger = logging.getLogger(__name__)
 
+FORMATO_LOG = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Thread que formata e grava as mensagens enfileiradas (config_logging):
+_listener = None
+
+
+class RepeatedWarningFilter(logging.Filter):
+    """
+    Limita os avisos repetidos (ex.: um por CEP ou por linha): cada mensagem (o texto antes da formatação, por isso
+    os avisos do caminho de cada CEP usam logger.warning("... %s", cep) em vez de f-strings) é registrada no máximo
+    "maximo" vezes a cada "janela" segundos. Os avisos descartados são contados no primeiro aviso da janela seguinte.
+    """
+
+    def __init__(self, maximo=LOGGING_AVISOS_REPETIDOS, janela=LOGGING_AVISOS_JANELA):
+        super().__init__()
+        self.maximo = maximo
+        self.janela = janela
+        # (logger, mensagem): [início da janela, registrados, descartados]
+        self.janelas = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno != logging.WARNING or self.maximo <= 0:
+            return True
+
+        chave = (record.name, str(record.msg))
+        agora = time.monotonic()
+        with self.lock:
+            janela = self.janelas.get(chave)
+            if janela is None or agora - janela[0] >= self.janela:
+                descartados = janela[2] if janela else 0
+                janela = self.janelas[chave] = [agora, 0, 0]
+                if len(self.janelas) > 1000:
+                    self._limpar(agora)
+            else:
+                descartados = 0
+
+            if janela[1] >= self.maximo:
+                janela[2] += 1
+                return False
+            janela[1] += 1
+            ultimo = janela[1] == self.maximo
+
+        # As mensagens anotadas são formatadas aqui; as demais, ao entrar na fila (_QueueHandler.prepare)
+        if descartados or ultimo:
+            mensagem = record.getMessage()
+            if descartados:
+                mensagem += f" (mais {descartados} avisos semelhantes descartados)"
+            if ultimo:
+                mensagem += (
+                    f" (avisos semelhantes descartados pelos próximos {self.janela:g}s)"
+                )
+            record.msg, record.args = mensagem, None
+
+        return True
+
+    def _limpar(self, agora):
+        for chave, janela in list(self.janelas.items()):
+            if agora - janela[0] >= self.janela and not janela[2]:
+                del self.janelas[chave]
+
+
+class _QueueHandler(QueueHandler):
+    # Como no QueueHandler padrão, a mensagem é montada (msg % args) antes de ir para a fila, na thread de quem a
+    # registrou: argumentos mutáveis (ex.: dicionários de resultados, DataFrames) não podem mudar ou ser lidos por
+    # outra thread antes da formatação. O traceback (exc_info) segue intacto para o RichHandler (rich_tracebacks),
+    # e o restante da formatação (data, nível, traceback no arquivo) fica com os handlers, na thread do QueueListener:
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        return record
+
+
+def _sem_requisicoes(record):
+    # Uma linha por requisição (httpx, nível INFO) apenas no arquivo de log:
+    return not (record.name.startswith("httpx") and record.levelno < logging.WARNING)
+
 
 def config_logging():
-    # Handlers:
+    global _listener
+
+    # Handlers (executados na thread do QueueListener):
     file_handler = logging.FileHandler(
         encoding="utf-8",
         filename=f"logs/{datetime.now():%Y-%m-%d-%H-%M-%S}.log",
@@ -18,16 +110,29 @@ def config_logging():
     stream_handler = RichHandler(
         rich_tracebacks=True,
     )
+    for handler in (file_handler, stream_handler):
+        handler.setFormatter(logging.Formatter(FORMATO_LOG))
+    if not LOGGING_HTTPX_TERMINAL:
+        stream_handler.addFilter(_sem_requisicoes)
+
+    # Quem registra uma mensagem (ex.: o event loop das consultas) apenas a coloca na fila; a formatação, o terminal
+    # (Rich) e o arquivo ficam a cargo de uma thread própria, encerrada (após gravar o restante da fila) na saída:
+    stop_logging()
+    fila = queue.SimpleQueue()
+    _listener = QueueListener(
+        fila, file_handler, stream_handler, respect_handler_level=True
+    )
+    _listener.start()
+    atexit.register(stop_logging)
+
+    queue_handler = _QueueHandler(fila)
+    queue_handler.addFilter(RepeatedWarningFilter())
 
     # Logging:
     logging.basicConfig(
         level=config("LOGGING_LEVEL", logging.INFO),
-        encoding="utf-8",
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=[
-            file_handler,
-            stream_handler,
-        ],
+        handlers=[queue_handler],
+        force=True,
     )
 
     # Outros loggers:
@@ -38,6 +143,18 @@ def config_logging():
     logger.debug("Logging configurado")
 
 
+def stop_logging():
+    """
+    Função que grava as mensagens ainda na fila e encerra a thread do log (chamada automaticamente na saída).
+    """
+
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
 def create_directories():
     logger.debug("Criando diretórios")
 
@@ -49,5 +166,6 @@ def create_directories():
 
 
 def initial_config():
-    config_logging()
+    # Os diretórios precisam existir antes do arquivo de log ser criado:
     create_directories()
+    config_logging()
@@ -2,6 +2,130 @@ from decouple import config
 
 COORDENADAS_BRASIL = (-15.77972, -47.92972)
 BRASILAPI_URL = config("BRASILAPI_URL", "https://brasilapi.com.br/api/cep/v2/")
+BRASILAPI_V1_URL = config("BRASILAPI_V1_URL", "https://brasilapi.com.br/api/cep/v1/")
 GEOCODE_URL = config("GEOCODE_URL", "https://geocode.xyz/")
 MAX_AT_ONCE = config("MAX_AT_ONCE", 10, cast=int)
 REQUESTS_SECOND = config("REQUESTS_SECOND", 1, cast=int)
+
+# Pool de conexões HTTP:
+POOL_MAX_CONNECTIONS = config("POOL_MAX_CONNECTIONS", MAX_AT_ONCE * 2, cast=int)
+POOL_MAX_KEEPALIVE = config("POOL_MAX_KEEPALIVE", MAX_AT_ONCE, cast=int)
+POOL_KEEPALIVE_EXPIRY = config("POOL_KEEPALIVE_EXPIRY", 30.0, cast=float)
+HTTP2 = config("HTTP2", True, cast=bool)
+REQUEST_TIMEOUT = config("REQUEST_TIMEOUT", 60.0, cast=float)
+
+# Timeout adaptativo (por API): TIMEOUT_MULTIPLICADOR vezes o percentil TIMEOUT_PERCENTIL das últimas
+# LATENCIA_JANELA latências, entre TIMEOUT_MINIMO e REQUEST_TIMEOUT (usado até LATENCIA_MIN_AMOSTRAS amostras):
+TIMEOUT_PERCENTIL = config("TIMEOUT_PERCENTIL", 99, cast=float)
+TIMEOUT_MULTIPLICADOR = config("TIMEOUT_MULTIPLICADOR", 3.0, cast=float)
+TIMEOUT_MINIMO = config("TIMEOUT_MINIMO", 2.0, cast=float)
+LATENCIA_JANELA = config("LATENCIA_JANELA", 500, cast=int)
+LATENCIA_MIN_AMOSTRAS = config("LATENCIA_MIN_AMOSTRAS", 20, cast=int)
+
+# Consultas "hedged": sem resposta do provedor até o percentil HEDGE_PERCENTIL de suas latências (ou
+# HEDGE_ATRASO_INICIAL segundos, enquanto há poucas amostras), uma nova requisição é feita ao próximo provedor de
+# HEDGE_PROVEDORES ("brasilapi", "brasilapi_v1" ou "geocode"; repetir um nome repete a requisição no mesmo provedor).
+# As versões da BrasilAPI dividem os limites MAX_AT_ONCE e REQUESTS_SECOND: reservas não aumentam a taxa total.
+HEDGE = config("HEDGE", True, cast=bool)
+HEDGE_PROVEDORES = config(
+    "HEDGE_PROVEDORES",
+    "brasilapi,brasilapi_v1",
+    cast=lambda v: tuple(nome.strip() for nome in v.split(",") if nome.strip()),
+)
+HEDGE_PERCENTIL = config("HEDGE_PERCENTIL", 90, cast=float)
+HEDGE_ATRASO_INICIAL = config("HEDGE_ATRASO_INICIAL", 2.0, cast=float)
+
+# Cache local de CEPs (TTLs em dias):
+CACHE_PATH = config("CACHE_PATH", "consultas/cache.sqlite3")
+CACHE_TTL_BRASILAPI = config("CACHE_TTL_BRASILAPI", 180, cast=float)
+CACHE_TTL_GEOCODE = config("CACHE_TTL_GEOCODE", 90, cast=float)
+CACHE_TTL_SEM_COORDENADAS = config("CACHE_TTL_SEM_COORDENADAS", 7, cast=float)
+CACHE_TTL_NAO_ENCONTRADOS = config("CACHE_TTL_NAO_ENCONTRADOS", 30, cast=float)
+# Resultados recentes mantidos em memória e compartilhados pelas execuções do mesmo processo (quantidade de CEPs):
+CACHE_MEMORIA_MAXIMO = config("CACHE_MEMORIA_MAXIMO", 50_000, cast=int)
+
+# Índice compacto de CEP -> coordenadas (usado quando o arquivo existe):
+INDICE_PATH = config("INDICE_PATH", "consultas/indice.cepidx")
+
+# Consolidação de resultados: diferença (em graus) a partir da qual coordenadas do mesmo CEP são um conflito
+MERGE_TOLERANCIA = config("MERGE_TOLERANCIA", 0.001, cast=float)
+MERGE_SAIDA = config("MERGE_SAIDA", "consultas/consolidado.json")
+
+# Leitura de planilhas CSV (linhas por bloco):
+CSV_CHUNKSIZE = config("CSV_CHUNKSIZE", 100_000, cast=int)
+
+# Mapa ("auto", "marcadores", "rapido", "densidade" ou "blocos"):
+MAPA_MODOS = ("auto", "marcadores", "rapido", "densidade", "blocos")
+MAPA_MODO = config("MAPA_MODO", "auto")
+MAPA_MODO_RAPIDO_MINIMO = config("MAPA_MODO_RAPIDO_MINIMO", 1000, cast=int)
+MAPA_MODO_DENSIDADE_MINIMO = config("MAPA_MODO_DENSIDADE_MINIMO", 1_000_000, cast=int)
+# Modo "blocos": zoom dos tiles em que os pontos são divididos (arquivos ao lado do HTML); a partir dele, o navegador
+# carrega os marcadores da área visível
+MAPA_BLOCOS_ZOOM = config("MAPA_BLOCOS_ZOOM", 9, cast=int)
+# Gravar também as versões pré-comprimidas (.gz e, com o pacote brotli, .br) do HTML e dos blocos:
+MAPA_COMPRIMIR = config("MAPA_COMPRIMIR", False, cast=bool)
+
+# Opcional: linhas com o mesmo grupo e as mesmas coordenadas viram um único marcador, com a lista dos textos (até
+# MAPA_AGRUPAR_TEXTOS por marcador) e o ícone/cor mais frequente:
+MAPA_AGRUPAR_LOCAIS = config("MAPA_AGRUPAR_LOCAIS", False, cast=bool)
+MAPA_AGRUPAR_TEXTOS = config("MAPA_AGRUPAR_TEXTOS", 10, cast=int)
+
+# Popups: a coluna "texto" é HTML (ex.: links, <br>) em todos os modos; com MAPA_ESCAPAR_TEXTO, é mostrada como texto
+MAPA_ESCAPAR_TEXTO = config("MAPA_ESCAPAR_TEXTO", False, cast=bool)
+
+# Modo "densidade": contagem por célula ("quadrado" ou "hexagono"); tamanho em graus ou, se zero, a partir do zoom
+DENSIDADE_FORMAS = ("quadrado", "hexagono")
+DENSIDADE_FORMA = config("DENSIDADE_FORMA", "hexagono")
+DENSIDADE_CELULA = config("DENSIDADE_CELULA", 0.0, cast=float)
+DENSIDADE_ZOOM = config("DENSIDADE_ZOOM", 8, cast=int)
+DENSIDADE_POR_GRUPO = config("DENSIDADE_POR_GRUPO", True, cast=bool)
+
+# Mapa dividido em um arquivo HTML por "grupo" ou "uf" ("" para um único arquivo), renderizados em paralelo
+# (PARTICOES_PROCESSOS = 0 usa todos os processadores):
+MAPA_PARTICOES = ("grupo", "uf")
+MAPA_PARTICIONAR = config("MAPA_PARTICIONAR", "")
+PARTICOES_PROCESSOS = config("PARTICOES_PROCESSOS", 0, cast=int)
+
+# Limitação adaptativa (MAX_AT_ONCE/REQUESTS_SECOND são os valores iniciais) e novas tentativas:
+ADAPTIVE_MAX_AT_ONCE = config("ADAPTIVE_MAX_AT_ONCE", 50, cast=int)
+ADAPTIVE_MAX_PER_SECOND = config("ADAPTIVE_MAX_PER_SECOND", 20, cast=float)
+GEOCODE_REQUESTS_SECOND = config("GEOCODE_REQUESTS_SECOND", 1, cast=float)
+RETRY_MAX_TENTATIVAS = config("RETRY_MAX_TENTATIVAS", 5, cast=int)
+RETRY_BACKOFF_BASE = config("RETRY_BACKOFF_BASE", 1.0, cast=float)
+RETRY_BACKOFF_MAX = config("RETRY_BACKOFF_MAX", 60.0, cast=float)
+GEOCODE_FILA_MAXIMA = config("GEOCODE_FILA_MAXIMA", 1000, cast=int)
+
+# Opcional: índice offline de prefixos de CEP ("desligado", "fallback" ou "antes" das APIs); no mapa, os marcadores
+# aproximados não se distinguem dos exatos:
+PREFIXO_MODOS = ("desligado", "fallback", "antes")
+PREFIXO_MODO = config("PREFIXO_MODO", "desligado")
+PREFIXO_NIVEIS = config(
+    "PREFIXO_NIVEIS", "5,4,3", cast=lambda v: tuple(int(n) for n in v.split(","))
+)
+PREFIXO_MIN_PONTOS = config("PREFIXO_MIN_PONTOS", 1, cast=int)
+
+# Diário (JSON Lines) das consultas, para retomar execuções interrompidas:
+JOURNAL = config("JOURNAL", True, cast=bool)
+JOURNAL_DIR = config("JOURNAL_DIR", "consultas")
+JOURNAL_FSYNC_SEGUNDOS = config("JOURNAL_FSYNC_SEGUNDOS", 5.0, cast=float)
+
+# Log: avisos com a mesma mensagem (ex.: um por CEP) registrados por janela de LOGGING_AVISOS_JANELA segundos; os
+# demais são descartados e contados no próximo aviso registrado (0 = sem limite)
+LOGGING_AVISOS_REPETIDOS = config("LOGGING_AVISOS_REPETIDOS", 10, cast=int)
+LOGGING_AVISOS_JANELA = config("LOGGING_AVISOS_JANELA", 60.0, cast=float)
+# Exibir no terminal (Rich, ~1 ms por linha) uma linha por requisição do httpx; o arquivo de log sempre as recebe
+LOGGING_HTTPX_TERMINAL = config("LOGGING_HTTPX_TERMINAL", False, cast=bool)
+
+# Relatório de desempenho de cada execução (gravado ao lado do mapa):
+RELATORIO = config("RELATORIO", True, cast=bool)
+
+# Serviço que vigia um diretório de entrada: fila persistente de planilhas, planilhas processadas ao mesmo tempo,
+# intervalo (em segundos) entre as verificações do diretório e tentativas por planilha (erros ou interrupções) antes
+# de ela ser marcada como "falhou"
+SERVICO_FILA = config("SERVICO_FILA", "consultas/fila.sqlite3")
+SERVICO_PARALELISMO = config("SERVICO_PARALELISMO", 2, cast=int)
+SERVICO_INTERVALO = config("SERVICO_INTERVALO", 5.0, cast=float)
+SERVICO_TENTATIVAS = config("SERVICO_TENTATIVAS", 3, cast=int)
+
+# Interface gráfica: importar as dependências pesadas (pandas, folium, httpx) em segundo plano após a janela abrir
+AQUECIMENTO = config("AQUECIMENTO", True, cast=bool)
@@ -0,0 +1,105 @@
+import logging
+import math
+
+import numpy as np
+
+from cepfoliummap.constants import (
+    DENSIDADE_CELULA,
+    DENSIDADE_FORMA,
+    DENSIDADE_FORMAS,
+    DENSIDADE_ZOOM,
+)
+
+logger = logging.getLogger(__name__)
+
+FORMA_QUADRADO, FORMA_HEXAGONO = DENSIDADE_FORMAS
+
+_RAIZ3 = math.sqrt(3)
+# Vértices de um hexágono "pontudo" (de raio 1), a partir do topo, no sentido horário:
+_ANGULOS = np.radians(90 - 60 * np.arange(6))
+_HEXAGONO = np.stack([np.cos(_ANGULOS), np.sin(_ANGULOS)], axis=1)
+
+
+def tamanho_celula(celula=DENSIDADE_CELULA, zoom=DENSIDADE_ZOOM):
+    """
+    Função que retorna o tamanho da célula (em graus): o configurado ou, se zero, o equivalente a ~32 pixels no zoom
+    informado (um tile de 256 pixels cobre 360 / 2^zoom graus de longitude).
+    """
+
+    return celula if celula > 0 else 45 / 2**zoom
+
+
+def agregar(latitudes, longitudes, tamanho, forma=DENSIDADE_FORMA, chaves=None):
+    """
+    Função que conta os pontos por célula de uma grade quadrada ou hexagonal, de forma vetorizada.
+
+    Args:
+        latitudes (np.ndarray): Latitudes (float, sem NaN)
+        longitudes (np.ndarray): Longitudes (float, sem NaN)
+        tamanho (float): Lado do quadrado ou raio do hexágono (em graus)
+        forma (str): "quadrado" ou "hexagono"
+        chaves (np.ndarray): Código inteiro (ex.: grupo) de cada ponto, contado separadamente [opcional]
+
+    Returns:
+        tuple: (chaves, latitudes, longitudes, contagens) de cada célula ocupada, com latitude/longitude do centro
+    """
+
+    if forma not in DENSIDADE_FORMAS:
+        raise ValueError(f"Forma de célula inválida: {forma}")
+
+    x = np.asarray(longitudes, dtype=np.float64) / tamanho
+    y = np.asarray(latitudes, dtype=np.float64) / tamanho
+
+    if forma == FORMA_QUADRADO:
+        colunas, linhas = np.floor(x), np.floor(y)
+    else:
+        # Coordenadas axiais (q, r) de hexágonos "pontudos", com arredondamento em coordenadas cúbicas:
+        q = _RAIZ3 / 3 * x - y / 3
+        r = 2 / 3 * y
+        s = -q - r
+        qa, ra, sa = np.round(q), np.round(r), np.round(s)
+        dq, dr, ds = np.abs(qa - q), np.abs(ra - r), np.abs(sa - s)
+        ajustar_q = (dq > dr) & (dq > ds)
+        ajustar_r = ~ajustar_q & (dr > ds)
+        qa = np.where(ajustar_q, -ra - sa, qa)
+        ra = np.where(ajustar_r, -qa - sa, ra)
+        colunas, linhas = qa, ra
+
+    chaves = (
+        np.zeros(len(x), dtype=np.int64)
+        if chaves is None
+        else np.asarray(chaves, dtype=np.int64)
+    )
+    celulas, contagens = np.unique(
+        np.stack([chaves, colunas.astype(np.int64), linhas.astype(np.int64)], axis=1),
+        axis=0,
+        return_counts=True,
+    )
+    chaves, colunas, linhas = celulas.T
+
+    if forma == FORMA_QUADRADO:
+        centros_x, centros_y = colunas + 0.5, linhas + 0.5
+    else:
+        centros_x, centros_y = _RAIZ3 * (colunas + linhas / 2), 1.5 * linhas
+
+    return chaves, centros_y * tamanho, centros_x * tamanho, contagens
+
+
+def poligonos(latitudes, longitudes, tamanho, forma=DENSIDADE_FORMA):
+    """
+    Função que retorna os vértices (anel fechado, [longitude, latitude] como no GeoJSON, com 4 casas decimais, ~10 m)
+    de cada célula.
+
+    Returns:
+        np.ndarray: Array (células, vértices + 1, 2)
+    """
+
+    if forma == FORMA_QUADRADO:
+        meio = tamanho / 2
+        deslocamentos = np.array([[-1, -1], [1, -1], [1, 1], [-1, 1]]) * meio
+    else:
+        deslocamentos = _HEXAGONO * tamanho
+
+    centros = np.stack([longitudes, latitudes], axis=1)[:, None, :]
+    vertices = np.round(centros + deslocamentos[None, :, :], 4)
+    return np.concatenate([vertices, vertices[:, :1]], axis=1)
@@ -0,0 +1,798 @@
+import asyncio
+import importlib
+import json
+import logging
+import math
+import os
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from cepfoliummap.cache import (
+    SOURCE_GEOCODE,
+    CepCache,
+    MemoryCache,
+    get_coordinates,
+    is_not_found,
+    not_found_payload,
+    set_coordinates,
+)
+from cepfoliummap.constants import (
+    ADAPTIVE_MAX_AT_ONCE,
+    ADAPTIVE_MAX_PER_SECOND,
+    CACHE_PATH,
+    GEOCODE_FILA_MAXIMA,
+    GEOCODE_REQUESTS_SECOND,
+    HEDGE,
+    HEDGE_PROVEDORES,
+    INDICE_PATH,
+    JOURNAL,
+    MAPA_AGRUPAR_LOCAIS,
+    MAPA_MODO,
+    MAPA_PARTICIONAR,
+    MAPA_PARTICOES,
+    MAX_AT_ONCE,
+    PREFIXO_MODO,
+    RELATORIO,
+    REQUESTS_SECOND,
+)
+from cepfoliummap.geocode import get_coordinates_from_cep
+from cepfoliummap.indice import CoordinateIndex
+from cepfoliummap.journal import (
+    ETAPA_BRASILAPI,
+    ETAPA_GEOCODE,
+    Journal,
+    journal_path,
+)
+from cepfoliummap.particoes import PARTICIONAR_UF, atribuir_ufs, salvar_particoes
+from cepfoliummap.planilha import get_dataframe, rejects_path, salvar_rejeitados
+from cepfoliummap.prefixos import (
+    MODO_ANTES,
+    MODO_DESLIGADO,
+    MODOS as MODOS_PREFIXO,
+    PRECISAO_EXATA,
+    PrefixIndex,
+    aplicar_indice_prefixos,
+)
+from cepfoliummap.provedores import (
+    PROVEDOR_BRASILAPI,
+    PROVEDOR_BRASILAPI_V1,
+    PROVEDOR_GEOCODE,
+    PROVEDORES,
+    consultar_com_hedge,
+    criar_provedores,
+)
+from cepfoliummap.ratelimit import AdaptiveLimiter
+from cepfoliummap.relatorio import RunReport, report_path
+
+logger = logging.getLogger(__name__)
+
+
+def _criar_cliente():
+    from cepfoliummap.client import create_client
+
+    return create_client()
+
+
+def populate_dataframe_coordinates(dataframe, api_results, indice=None):
+    """
+    Função que preenche as colunas "latitude" e "longitude" do DataFrame a partir dos resultados da BrasilAPI.
+
+    Linhas que já possuem as duas coordenadas não são alteradas; as demais recebem as coordenadas do seu CEP (ou NaN).
+    O DataFrame é atualizado no próprio lugar (sem cópia), com as coordenadas em float32.
+
+    Args:
+        dataframe (pd.DataFrame): DataFrame com as colunas "cep", "latitude" e "longitude"
+        api_results (dict): Dicionário {cep: resultado no padrão da BrasilAPI}
+        indice (CoordinateIndex): Índice de coordenadas consultado para os CEPs sem resultado [opcional]
+
+    Returns:
+        pd.DataFrame: O próprio DataFrame, atualizado
+    """
+
+    latitudes = pd.to_numeric(dataframe["latitude"], errors="coerce").to_numpy(
+        dtype=np.float32, copy=True
+    )
+    longitudes = pd.to_numeric(dataframe["longitude"], errors="coerce").to_numpy(
+        dtype=np.float32, copy=True
+    )
+
+    # Não vamos atualizar as linhas que já possuem coordenadas:
+    sem_coordenadas = np.isnan(latitudes) | np.isnan(longitudes)
+
+    if sem_coordenadas.any():
+        # Tabela cep -> (latitude, longitude), montada uma única vez por CEP único:
+        ceps, tabela = [], []
+        for cep, result in api_results.items():
+            coordinates = result.get("location", {}).get("coordinates", {}) or {}
+            ceps.append(cep)
+            tabela.append(
+                (
+                    coordinates.get("latitude", np.nan),
+                    coordinates.get("longitude", np.nan),
+                )
+            )
+        coordenadas = (
+            pd.DataFrame(tabela, index=ceps, columns=["latitude", "longitude"])
+            .apply(pd.to_numeric, errors="coerce")
+            .astype(np.float32)
+        )
+
+        # Junção (por CEP) apenas das linhas sem coordenadas; CEPs categóricos são buscados uma vez por categoria:
+        coluna = dataframe["cep"]
+        if isinstance(coluna.dtype, pd.CategoricalDtype):
+            por_categoria = coordenadas.reindex(coluna.cat.categories).to_numpy()
+            codigos = coluna.cat.codes.to_numpy()[sem_coordenadas]
+            encontradas = np.where(
+                (codigos >= 0)[:, None], por_categoria[codigos], np.nan
+            )
+        else:
+            encontradas = coordenadas.reindex(coluna[sem_coordenadas]).to_numpy()
+        latitudes[sem_coordenadas] = encontradas[:, 0]
+        longitudes[sem_coordenadas] = encontradas[:, 1]
+
+        # CEPs que continuam sem coordenadas: busca vetorizada no índice
+        if indice is not None and len(indice):
+            linhas = np.flatnonzero(np.isnan(latitudes) | np.isnan(longitudes))
+            lats, lngs = indice.lookup(dataframe["cep"].take(linhas))
+            encontrados = ~np.isnan(lats)
+            latitudes[linhas[encontrados]] = lats[encontrados]
+            longitudes[linhas[encontrados]] = lngs[encontrados]
+
+    dataframe["latitude"] = latitudes
+    dataframe["longitude"] = longitudes
+
+    return dataframe
+
+
+def export_results(result, nome=None):
+    # TODO: Com a unificação dos Frames esse arquivo não deveria mais ser salvo em "brasilapi"
+    # Apenas os resultados da execução atual (o histórico completo fica no cache local); o nome da planilha evita que
+    # execuções simultâneas gravem o mesmo arquivo:
+    if not result:
+        return
+
+    with open(
+        file=f"consultas/{datetime.now():%Y-%m-%d-%H-%M-%S}{f'-{nome}' if nome else ''}.json",
+        mode="w",
+        encoding="utf8",
+    ) as file:
+        json.dump(result, file, ensure_ascii=False)
+
+
+@dataclass
+class Progresso:
+    """
+    Estado de uma etapa da execução, enviado ao callback "on_progress" do CepFoliumMapEngine.
+    """
+
+    arquivo: str
+    etapa: str
+    feitos: int = 0
+    total: int = 0
+    cache_hits: int = 0
+    fila: int = 0
+    inicio: float = field(default_factory=time.monotonic)
+
+    @property
+    def por_segundo(self):
+        """
+        CEPs processados por segundo desde o início da etapa.
+        """
+
+        duracao = time.monotonic() - self.inicio
+        return self.feitos / duracao if duracao > 0 else 0.0
+
+    @property
+    def eta(self):
+        """
+        Estimativa (em segundos) para o fim da etapa, ou None caso ainda não seja possível estimar.
+        """
+
+        por_segundo = self.por_segundo
+        if not por_segundo:
+            return None
+        return (self.total - self.feitos) / por_segundo
+
+    def resumo(self):
+        """
+        Texto curto com o estado da etapa, ex.: "consulta: 120/5000 (2%) | 3.2 CEPs/s | ETA 0:25:10 | cache: 300".
+        """
+
+        texto = self.etapa
+        if self.total:
+            texto += (
+                f": {self.feitos}/{self.total} ({self.feitos * 100 // self.total}%)"
+            )
+            texto += f" | {self.por_segundo:.1f} CEPs/s"
+            if self.eta is not None:
+                texto += f" | ETA {timedelta(seconds=round(self.eta))}"
+        if self.fila:
+            texto += f" | fila: {self.fila}"
+        if self.cache_hits:
+            texto += f" | cache: {self.cache_hits}"
+        return texto
+
+
+class CepFoliumMapEngine:
+    """
+    Motor (sem interface gráfica) que transforma planilhas de CEPs em mapas HTML.
+
+    O cliente HTTP e o cache local são abertos uma única vez e compartilhados por todas as execuções, permitindo
+    processar vários arquivos no mesmo processo:
+
+        async with CepFoliumMapEngine() as engine:
+            for arquivo in arquivos:
+                await engine.executar(arquivo)
+    """
+
+    def __init__(
+        self,
+        api_key=None,
+        max_at_once=MAX_AT_ONCE,
+        max_per_second=REQUESTS_SECOND,
+        geocode_max_per_second=GEOCODE_REQUESTS_SECOND,
+        cache_path=CACHE_PATH,
+        indice_path=INDICE_PATH,
+        on_progress=None,
+        hedge=HEDGE,
+        hedge_provedores=HEDGE_PROVEDORES,
+    ):
+        desconhecidos = set(hedge_provedores) - set(PROVEDORES)
+        if desconhecidos or not hedge_provedores:
+            raise ValueError(
+                f"Provedores inválidos: {', '.join(sorted(desconhecidos)) or '(nenhum)'}"
+            )
+
+        self.api_key = api_key
+        self.cache_path = cache_path
+        self.indice_path = indice_path
+        self.on_progress = on_progress
+
+        # Limitadores adaptativos por API (compartilhados por todas as execuções), com o timeout adaptativo de cada uma.
+        # As versões da BrasilAPI dividem a concorrência e a taxa (requisições de reserva entram no mesmo limite):
+        brasilapi = AdaptiveLimiter(
+            "BrasilAPI",
+            max_at_once=max_at_once,
+            max_per_second=max_per_second,
+            max_at_once_limit=ADAPTIVE_MAX_AT_ONCE,
+            max_per_second_limit=ADAPTIVE_MAX_PER_SECOND,
+        )
+        self.limiters = {
+            PROVEDOR_BRASILAPI: brasilapi,
+            PROVEDOR_BRASILAPI_V1: AdaptiveLimiter(
+                "BrasilAPI v1",
+                max_at_once=max_at_once,
+                max_per_second=max_per_second,
+                max_at_once_limit=ADAPTIVE_MAX_AT_ONCE,
+                max_per_second_limit=ADAPTIVE_MAX_PER_SECOND,
+                orcamento=brasilapi,
+            ),
+            PROVEDOR_GEOCODE: AdaptiveLimiter(
+                "Geocode",
+                max_at_once=max_at_once,
+                max_per_second=geocode_max_per_second,
+            ),
+        }
+
+        # Etapa 1 da consulta: o primeiro provedor da cadeia e, com "hedge", os de reserva
+        self.hedge_provedores = (
+            tuple(hedge_provedores) if hedge else tuple(hedge_provedores[:1])
+        )
+
+        self.client = None
+        self._cliente_lock = asyncio.Lock()
+        self.cache = None
+        self.indice = None
+        # Resultados recentes e consultas em andamento, compartilhados pelas execuções simultâneas deste motor:
+        self.memoria = MemoryCache()
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def open(self):
+        self.cache = CepCache(self.cache_path)
+        if self.indice_path and os.path.exists(self.indice_path):
+            self.indice = CoordinateIndex(self.indice_path)
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+        self.cache.close()
+        if self.indice:
+            self.indice.close()
+
+    async def abrir_cliente(self):
+        """
+        Função que retorna o cliente HTTP do motor, criado apenas na primeira consulta (execuções só com o cache não
+        importam o httpx). A importação e a criação (contexto TLS) rodam em uma thread.
+
+        Returns:
+            httpx.AsyncClient
+        """
+
+        async with self._cliente_lock:
+            if self.client is None:
+                self.client = await asyncio.to_thread(_criar_cliente)
+        return self.client
+
+    def _notify(self, progresso):
+        if self.on_progress:
+            self.on_progress(progresso)
+
+    # --------------
+    async def executar(
+        self,
+        arquivo_excel,
+        arquivo_json=None,
+        consumir_api=True,
+        arquivo_mapa=None,
+        modo_mapa=MAPA_MODO,
+        modo_prefixos=PREFIXO_MODO,
+        relatorio=RELATORIO,
+        particionar=MAPA_PARTICIONAR,
+        agrupar_locais=MAPA_AGRUPAR_LOCAIS,
+    ):
+        """
+        Função que executa todo o processo para uma planilha: leitura, consulta dos CEPs, geração e salvamento do mapa.
+
+        Com "relatorio", um relatório de desempenho (etapas, acertos de cache, latências por API) é gravado ao lado do
+        mapa ("mapas/<nome>.relatorio.json") e resumido no log; desligado, as requisições não são instrumentadas.
+
+        Args:
+            arquivo_excel (str): Caminho do arquivo Excel
+            arquivo_json (str): Arquivo JSON no padrão da BrasilAPI a ser importado para o cache [opcional]
+            consumir_api (bool): Se falso, apenas o cache local é utilizado
+            arquivo_mapa (str): Caminho do arquivo HTML; padrão é "mapas/<data-hora>.html"
+            modo_mapa (str): Modo de geração dos marcadores (ver mapa.gerar_mapa)
+            modo_prefixos (str): Uso do índice offline de prefixos para os CEPs sem coordenadas: "desligado",
+                "fallback" (após as APIs) ou "antes" (CEPs com prefixo conhecido não são consultados nas APIs)
+            relatorio (bool): Gravar o relatório de desempenho da execução
+            particionar (str): "grupo" ou "uf" para um mapa por parte (em "mapas/<nome>/", com uma página índice)
+            agrupar_locais (bool): Um único marcador por local (ver mapa.agrupar_locais)
+
+        Returns:
+            str: Caminho do mapa gerado
+        """
+
+        if modo_prefixos not in MODOS_PREFIXO:
+            raise ValueError(f"Modo do índice de prefixos inválido: {modo_prefixos}")
+        if particionar and particionar not in MAPA_PARTICOES:
+            raise ValueError(f"Partição do mapa inválida: {particionar}")
+
+        report = RunReport(arquivo_excel)
+        if relatorio:
+            report.observar(self.limiters)
+
+        try:
+            filename = await self._executar(
+                report,
+                arquivo_excel,
+                arquivo_json,
+                consumir_api,
+                arquivo_mapa,
+                modo_mapa,
+                modo_prefixos,
+                particionar,
+                agrupar_locais,
+            )
+        finally:
+            report.encerrar()
+
+        if relatorio:
+            report.salvar(report_path(filename))
+            logger.info(f"Desempenho: {report.resumo()}")
+
+        return filename
+
+    async def _executar(
+        self,
+        report,
+        arquivo_excel,
+        arquivo_json,
+        consumir_api,
+        arquivo_mapa,
+        modo_mapa,
+        modo_prefixos,
+        particionar,
+        agrupar_locais,
+    ):
+        contadores = report.contadores
+
+        # Gerando dataframe a partir de um arquivo Excel:
+        self._notify(Progresso(arquivo_excel, "leitura"))
+        rejeitados = []
+        with report.etapa("leitura"):
+            dataframe = await asyncio.to_thread(
+                get_dataframe, arquivo_excel, rejeitados
+            )
+        contadores["ceps_rejeitados"] = sum(len(r) for r in rejeitados)
+
+        # Importando arquivo JSON (opcional) para o cache local:
+        if arquivo_json:
+            with report.etapa("importacao"):
+                contadores["json_importados"] = self.cache.import_json(arquivo_json)
+
+        with report.etapa("cache"):
+            # CEPs com coordenadas no índice (busca vetorizada) não precisam do cache nem das APIs:
+            unique_ceps = np.asarray(dataframe["cep"].dropna().unique(), dtype=object)
+            contadores["linhas"] = len(dataframe)
+            contadores["ceps_unicos"] = len(unique_ceps)
+
+            ceps_no_indice = []
+            if self.indice is not None:
+                latitudes, _ = self.indice.lookup(unique_ceps)
+                ceps_no_indice = unique_ceps[~np.isnan(latitudes)]
+                unique_ceps = unique_ceps[np.isnan(latitudes)]
+
+            # CEPs já consultados (talvez com coordenadas ou confirmados como inexistentes), em memória (execuções
+            # recentes deste motor) ou no cache local:
+            api_results = self.memoria.get_many(unique_ceps)
+            contadores["memoria_hits"] = len(api_results)
+            api_results.update(
+                self.cache.get_many(
+                    [cep for cep in unique_ceps if cep not in api_results]
+                )
+            )
+
+            ceps_com_coordenadas = {
+                cep
+                for cep, result in api_results.items()
+                if get_coordinates(result) != (None, None)
+            }
+            ceps_nao_encontrados = {
+                cep for cep, result in api_results.items() if is_not_found(result)
+            }
+            contadores["indice_hits"] = len(ceps_no_indice)
+            contadores["cache_hits"] = len(ceps_com_coordenadas)
+            contadores["cache_nao_encontrados"] = len(ceps_nao_encontrados)
+            contadores["cache_sem_coordenadas"] = (
+                len(api_results) - len(ceps_com_coordenadas) - len(ceps_nao_encontrados)
+            )
+
+        prefixos = None
+        if consumir_api:
+            # Consultando apenas os CEPs que não possuem coordenadas no índice nem no cache (nem são inexistentes);
+            # apenas os CEPs únicos, sem copiar as linhas da planilha:
+            consultar_df = pd.DataFrame(
+                {
+                    "cep": unique_ceps[
+                        ~pd.Series(unique_ceps).isin(
+                            ceps_com_coordenadas | ceps_nao_encontrados
+                        )
+                    ]
+                }
+            )
+
+            # Caminho rápido: CEPs com prefixo conhecido recebem o centróide, sem consultar as APIs:
+            if modo_prefixos == MODO_ANTES:
+                with report.etapa("prefixos"):
+                    prefixos = PrefixIndex.from_cache(self.cache)
+                    _, _, precisoes = prefixos.lookup(consultar_df["cep"])
+                    contadores["prefixo_sem_consulta"] = int(
+                        consultar_df.loc[precisoes > 0, "cep"].nunique()
+                    )
+                    consultar_df = consultar_df[precisoes == 0]
+
+            progresso = Progresso(
+                arquivo_excel,
+                "consulta",
+                cache_hits=len(ceps_com_coordenadas) + len(ceps_no_indice),
+            )
+            with report.etapa("consulta"):
+                new_results = await self.consultar_ceps(
+                    consultar_df,
+                    progresso,
+                    journal=journal_path(arquivo_excel) if JOURNAL else None,
+                    contadores=contadores,
+                )
+
+            # Junção dos resultados:
+            api_results.update(new_results)
+            ceps_nao_encontrados |= {
+                cep for cep, result in new_results.items() if is_not_found(result)
+            }
+
+        # Inserindo/populando colunas de latitude e longitude no dataframe:
+        with report.etapa("coordenadas"):
+            df_coordenadas = await asyncio.to_thread(
+                populate_dataframe_coordinates, dataframe, api_results, self.indice
+            )
+
+        # Coordenadas aproximadas (centróide do prefixo) para os CEPs que continuam sem localização
+        # (exceto os confirmados como inexistentes). O índice é montado uma única vez por execução: no modo "antes", é
+        # o mesmo usado para evitar as consultas.
+        if modo_prefixos != MODO_DESLIGADO:
+            with report.etapa("prefixos"):
+                if prefixos is None:
+                    prefixos = PrefixIndex.from_cache(self.cache)
+                df_coordenadas = aplicar_indice_prefixos(
+                    df_coordenadas, prefixos, ceps_nao_encontrados
+                )
+                contadores["aproximados"] = int(
+                    df_coordenadas["precisao"].between(1, PRECISAO_EXATA - 1).sum()
+                )
+
+        # Efetivamente gerando o mapa
+        self._notify(Progresso(arquivo_excel, "mapa"))
+        if particionar:
+            # Um mapa por parte, em um diretório estável (partes que não mudaram não são renderizadas novamente):
+            if particionar == PARTICIONAR_UF:
+                df_coordenadas["uf"] = atribuir_ufs(df_coordenadas, api_results).astype(
+                    "category"
+                )
+            diretorio = (
+                Path(arquivo_mapa).with_suffix("")
+                if arquivo_mapa
+                else Path("mapas") / Path(arquivo_excel).stem
+            )
+            with report.etapa("mapa"):
+                filename = await asyncio.to_thread(
+                    salvar_particoes,
+                    df_coordenadas,
+                    diretorio,
+                    particionar,
+                    modo_mapa,
+                    contadores=contadores,
+                    agrupar=agrupar_locais,
+                )
+        else:
+            with report.etapa("mapa"):
+                # O folium só é importado quando um mapa é gerado (nas partições, pelos processos de cada parte), em
+                # uma thread como as demais etapas síncronas:
+                modulo_mapa = await asyncio.to_thread(
+                    importlib.import_module, "cepfoliummap.mapa"
+                )
+                mapa = await asyncio.to_thread(
+                    modulo_mapa.gerar_mapa,
+                    df_coordenadas,
+                    modo_mapa,
+                    contadores,
+                    agrupar_locais,
+                )
+
+            # Salvando mapa
+            with report.etapa("salvar"):
+                filename = await asyncio.to_thread(
+                    modulo_mapa.salvar_mapa, mapa, arquivo_mapa, contadores=contadores
+                )
+
+        # CEPs rejeitados na leitura, ao lado do mapa:
+        if rejeitados:
+            salvar_rejeitados(rejeitados, rejects_path(filename))
+
+        logger.info(f"Mapa gerado com sucesso: {arquivo_excel} -> {filename}")
+        self._notify(Progresso(arquivo_excel, "concluido"))
+
+        return filename
+
+    async def consultar_ceps(
+        self, dataframe, progresso=None, journal=None, contadores=None
+    ):
+        """
+        Função que consome a API do BrasilAPI para obter as coordenadas dos CEPs, com várias requisições assíncronas.
+
+        A consulta é feita em duas etapas independentes: a BrasilAPI (etapa 1) coloca os CEPs sem coordenadas em uma
+        fila limitada, consumida pelo Geocode (etapa 2) com seus próprios limites, sem ocupar as vagas da BrasilAPI.
+
+        Com um diário, cada resultado é gravado assim que chega; se o diário já existir (execução interrompida), os
+        CEPs registrados nele não são consultados novamente. Ao final, o diário é consolidado no arquivo JSON de
+        resultados e removido. Os resultados também são gravados no cache local, inclusive quando a consulta é
+        cancelada.
+
+        Args:
+            dataframe (pd.DataFrame): DataFrame com todas as colunas necessárias
+            progresso (Progresso): Acompanhamento do progresso [opcional]
+            journal (str): Caminho do diário (JSON Lines) da consulta [opcional]
+            contadores (dict): Dicionário onde são registrados os contadores da consulta (relatório) [opcional]
+
+        Returns:
+            json: Dicionário com os resultados da API
+        """
+
+        # Agrupando CEPs iguais:
+        unique_ceps = list(dataframe["cep"].drop_duplicates().dropna())
+
+        journal = Journal(journal) if journal else None
+        registrados = journal.load() if journal else {}
+
+        results = {}
+        retomar_geocode = []
+        for cep, (etapa, result) in registrados.items():
+            if result:
+                results[cep] = result
+                if (
+                    etapa == ETAPA_BRASILAPI
+                    and not is_not_found(result)
+                    and get_coordinates(result) == (None, None)
+                ):
+                    retomar_geocode.append(result)
+
+        progresso = progresso or Progresso(None, "consulta")
+        progresso.total = len(unique_ceps)
+        progresso.feitos = sum(1 for cep in unique_ceps if cep in registrados)
+        self._notify(progresso)
+
+        pendentes = (cep for cep in unique_ceps if cep not in registrados)
+
+        # Etapa 2 (Geocode): CEPs que a BrasilAPI retornou sem coordenadas
+        fila_geocode = asyncio.Queue(maxsize=GEOCODE_FILA_MAXIMA)
+        progresso_geocode = Progresso(
+            progresso.arquivo, "geocode", total=len(retomar_geocode)
+        )
+        nao_encontrados = 0
+        falhas = 0
+        compartilhados = 0
+        geocode_encontrados = 0
+
+        # Provedores criados a cada consulta (a chave do Geocode pode mudar entre execuções):
+        client = await self.abrir_cliente()
+        provedores = criar_provedores(self.limiters, self.api_key)
+        cadeia = [provedores[nome] for nome in self.hedge_provedores]
+        contadores_hedge = Counter()
+
+        def registrar(cep, etapa, result):
+            if journal:
+                journal.append(cep, etapa, result)
+
+        async def brasilapi_worker():
+            nonlocal nao_encontrados, falhas, compartilhados
+
+            # Cada worker consome o próximo CEP pendente; a concorrência e a taxa efetivas ficam a cargo dos limitadores.
+            # Um CEP que outra execução deste motor já está consultando não gera uma nova requisição:
+            for cep in pendentes:
+                # Já concluído por outra execução depois que esta consultou a memória:
+                if (result := self.memoria.get(cep)) is not None:
+                    compartilhado = True
+                    if is_not_found(result):
+                        result = {}
+                else:
+                    result, compartilhado = await self.memoria.compartilhar(
+                        (ETAPA_BRASILAPI, cep),
+                        partial(
+                            consultar_com_hedge,
+                            client,
+                            cadeia,
+                            cep,
+                            contadores_hedge,
+                        ),
+                    )
+                compartilhados += compartilhado
+                if result is None:
+                    # Falha (rede/servidor): nada é registrado, o CEP é consultado novamente na próxima execução
+                    falhas += 1
+                elif not result:
+                    # CEP inexistente (404): registrado no diário e no cache (TTL CACHE_TTL_NAO_ENCONTRADOS)
+                    nao_encontrados += 1
+                    results[cep] = not_found_payload(cep)
+                    registrar(cep, ETAPA_BRASILAPI, results[cep])
+                    self.memoria.put(cep, results[cep])
+                else:
+                    results[result["cep"]] = result
+                    registrar(cep, ETAPA_BRASILAPI, result)
+                    self.memoria.put(cep, result)
+
+                    if get_coordinates(result) == (None, None):
+                        progresso_geocode.total += 1
+                        await fila_geocode.put(result)
+
+                progresso.feitos += 1
+                progresso.fila = fila_geocode.qsize()
+                self._notify(progresso)
+
+        async def geocode_worker():
+            nonlocal geocode_encontrados
+
+            while (result := await fila_geocode.get()) is not None:
+                # O resultado pode ser compartilhado com outra execução, que já o completou ou o está completando:
+                lat, lng = get_coordinates(result)
+                if lat is None:
+                    coordenadas, _ = await self.memoria.compartilhar(
+                        (ETAPA_GEOCODE, result["cep"]),
+                        partial(
+                            get_coordinates_from_cep,
+                            client,
+                            self.limiters[PROVEDOR_GEOCODE],
+                            result["cep"],
+                            self.api_key,
+                        ),
+                    )
+                    lat, lng = coordenadas or (None, None)
+
+                # Atualizando JSON:
+                if lat and lng:
+                    logger.debug(
+                        "Atualizando coordenadas do CEP %s: (%s, %s)",
+                        result["cep"],
+                        lat,
+                        lng,
+                    )
+                    set_coordinates(result, lat, lng, SOURCE_GEOCODE)
+                    geocode_encontrados += 1
+                registrar(result["cep"], ETAPA_GEOCODE, result)
+
+                progresso_geocode.feitos += 1
+                progresso_geocode.fila = fila_geocode.qsize()
+                self._notify(progresso_geocode)
+
+        try:
+            # Consumindo APIs (cliente HTTP compartilhado), cada etapa com seus próprios limites:
+            async with asyncio.TaskGroup() as tg:
+                geocode_workers = [
+                    tg.create_task(geocode_worker())
+                    for _ in range(
+                        math.ceil(self.limiters[PROVEDOR_GEOCODE].max_at_once_limit)
+                    )
+                ]
+
+                # CEPs do diário que ainda aguardavam o Geocode:
+                async def retomar():
+                    for result in retomar_geocode:
+                        await fila_geocode.put(result)
+
+                brasilapi_workers = math.ceil(cadeia[0].limiter.max_at_once_limit)
+                await asyncio.gather(
+                    tg.create_task(retomar()),
+                    *(
+                        tg.create_task(brasilapi_worker())
+                        for _ in range(
+                            min(brasilapi_workers, progresso.total - progresso.feitos)
+                        )
+                    ),
+                )
+
+                # Sinalizando o fim da fila para a etapa 2:
+                for _ in geocode_workers:
+                    await fila_geocode.put(None)
+        finally:
+            # Salvando resultados (mesmo que parciais) no cache:
+            self.cache.put_many(results)
+
+            if contadores is not None:
+                contadores.update(
+                    consultados=progresso.feitos,
+                    retomados_do_diario=len(registrados),
+                    nao_encontrados=nao_encontrados,
+                    falhas=falhas,
+                    compartilhados=compartilhados,
+                    geocode_consultados=progresso_geocode.feitos,
+                    geocode_encontrados=geocode_encontrados,
+                    hedges=contadores_hedge["hedges"],
+                    hedges_vencedores=contadores_hedge["hedges_vencedores"],
+                )
+
+            if progresso.feitos < progresso.total:
+                logger.warning(
+                    f"Consulta interrompida: {progresso.feitos} de {progresso.total} CEPs consultados"
+                )
+            elif progresso_geocode.feitos < progresso_geocode.total:
+                logger.warning(
+                    f"Consulta ao Geocode interrompida: {progresso_geocode.feitos} de {progresso_geocode.total} CEPs consultados"
+                )
+            elif journal:
+                # Consulta completa: o diário é consolidado no arquivo JSON de resultados
+                results = journal.compact()
+                journal = None
+
+            if journal:
+                journal.close()
+                logger.warning(
+                    f"Diário mantido em {journal.filename}; a próxima execução da mesma planilha continua de onde parou"
+                )
+            else:
+                export_results(
+                    results, Path(progresso.arquivo).stem if progresso.arquivo else None
+                )
+
+        # Retornando resultado:
+        return results
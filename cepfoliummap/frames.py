@@ -1,34 +1,34 @@
-import asyncio
-import json
 import logging
+import os
+import queue
 import tkinter as tk
-from datetime import datetime
-from functools import partial
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import replace
 from tkinter import filedialog, messagebox
 
-import folium
-import numpy as np
-import pandas as pd
 import ttkbootstrap as ttk
-from aiometer import run_all
-from folium import Icon, Marker
-from folium.plugins import MarkerCluster
-from httpx import AsyncClient
 from ttkbootstrap.tooltip import ToolTip
 
 from cepfoliummap.constants import (
-    BRASILAPI_URL,
-    COORDENADAS_BRASIL,
-    MAX_AT_ONCE,
-    REQUESTS_SECOND,
+    MAPA_MODO,
+    MAPA_MODOS,
+    MAPA_PARTICIONAR,
+    MAPA_PARTICOES,
+    MERGE_SAIDA,
+    PREFIXO_MODO,
+    PREFIXO_MODOS,
 )
-from cepfoliummap.geocode import get_coordinates_from_cep
+from cepfoliummap.worker import AsyncWorker
+
+SEM_PARTICAO = "nenhuma"
+
+# O engine e o merger (pandas, folium, httpx) são importados apenas na primeira execução (ou pelo aquecimento),
+# para que a janela abra sem esperar por eles.
 
 logger = logging.getLogger(__name__)
 
 
 class CepFoliumMapFrame(tk.Frame):
-    # TODO: Criar módulo próprio para as funções de CepFoliumMap e deixar somente a interface gráfica aqui
     def __init__(self, master, **kwargs):
         super().__init__(master, **kwargs)
         self.master = master
@@ -61,7 +61,7 @@ class CepFoliumMapFrame(tk.Frame):
 
         ToolTip(
             lf_brasilapi,
-            text="Arquivo JSON, no padrão da BrasilAPI, que contém os resultados anteriores, diminuindo a quantidade de consultas necessárias",
+            text="Arquivo JSON, no padrão da BrasilAPI, que contém os resultados anteriores. Ele é importado para o cache local, que é consultado automaticamente em toda execução",
         )
 
         self.arquivo_json = tk.StringVar()
@@ -114,21 +114,96 @@ class CepFoliumMapFrame(tk.Frame):
             lf_settings,
             text="Consumir API",
             variable=self.consumir_api,
-        ).pack(pady=5, padx=5)
+        ).pack(side="left", pady=5, padx=5)
 
-        # Botão de execução:
-        # TODO: Thread para não travar a interface
-        ttk.Button(
-            self,
+        self.modo_mapa = tk.StringVar(value=MAPA_MODO)
+        ttk.Combobox(
+            lf_settings,
+            textvariable=self.modo_mapa,
+            values=MAPA_MODOS,
+            state="readonly",
+            width=12,
+        ).pack(side="right", pady=5, padx=5)
+        ttk.Label(lf_settings, text="Modo do mapa:").pack(side="right", pady=5)
+
+        self.particionar = tk.StringVar(value=MAPA_PARTICIONAR or SEM_PARTICAO)
+        cb_particionar = ttk.Combobox(
+            lf_settings,
+            textvariable=self.particionar,
+            values=(SEM_PARTICAO, *MAPA_PARTICOES),
+            state="readonly",
+            width=8,
+        )
+        cb_particionar.pack(side="right", pady=5, padx=5)
+        ttk.Label(lf_settings, text="Dividir por:").pack(side="right", pady=5)
+        ToolTip(
+            cb_particionar,
+            text="Um mapa por grupo ou por UF (mapas/<planilha>/), com uma página índice; "
+            "partes que não mudaram não são geradas novamente",
+        )
+
+        self.modo_prefixos = tk.StringVar(value=PREFIXO_MODO)
+        cb_prefixos = ttk.Combobox(
+            lf_settings,
+            textvariable=self.modo_prefixos,
+            values=PREFIXO_MODOS,
+            state="readonly",
+            width=10,
+        )
+        cb_prefixos.pack(side="right", pady=5, padx=5)
+        ttk.Label(lf_settings, text="Prefixos:").pack(side="right", pady=5)
+        ToolTip(
+            cb_prefixos,
+            text="Coordenadas aproximadas (centróide do prefixo do CEP) para CEPs sem localização: "
+            "'fallback' após as APIs, 'antes' sem consultar as APIs (no mapa, não se distinguem das exatas)",
+        )
+
+        # Progresso:
+        lf_progresso = ttk.Labelframe(self, text="Progresso")
+        lf_progresso.pack(pady=5, padx=5, fill="x", expand=False)
+
+        self.progressbar = ttk.Progressbar(lf_progresso, mode="determinate")
+        self.progressbar.pack(pady=5, padx=5, fill="x")
+
+        self.progresso_var = tk.StringVar(value="Aguardando execução")
+        ttk.Label(lf_progresso, textvariable=self.progresso_var).pack(pady=5, padx=5)
+
+        # Botões de execução (o processamento roda em um event loop em segundo plano):
+        lf_botoes = ttk.Frame(self)
+        lf_botoes.pack(pady=5, padx=5)
+
+        self.btn_executar = ttk.Button(
+            lf_botoes,
             text="Executar",
-            command=lambda: asyncio.run(self.executar()),
-        ).pack(pady=5, padx=5)
+            command=self.executar,
+        )
+        self.btn_executar.pack(side="left", pady=5, padx=5)
+
+        self.btn_cancelar = ttk.Button(
+            lf_botoes,
+            text="Cancelar",
+            command=self.cancelar,
+            state="disabled",
+        )
+        self.btn_cancelar.pack(side="left", pady=5, padx=5)
+
+        self.worker = AsyncWorker()
+        self.engine = None
+        self.future = None
+        self.eventos = queue.Queue()
+        self.progressos = {}
 
     # --------------
     def buscar_xls(self):
         arquivo_excel = filedialog.askopenfilename(
-            title="Arquivo Excel",
-            filetypes=[(".xls", "*.xls")],
+            title="Planilha",
+            filetypes=[
+                ("Planilhas", "*.xls *.xlsx *.csv *.parquet"),
+                (".xls", "*.xls"),
+                (".xlsx", "*.xlsx"),
+                (".csv", "*.csv"),
+                (".parquet", "*.parquet"),
+            ],
         )
         if arquivo_excel:
             self.arquivo_excel.set(arquivo_excel)
@@ -154,7 +229,7 @@ class CepFoliumMapFrame(tk.Frame):
             self.spinbox.configure(state="disabled")
 
     # --------------
-    async def executar(self):
+    def executar(self):
         # TODO: Renomear a função para algo mais descritivo
 
         # TODO: Refatorar as validações para uma função própria
@@ -171,278 +246,285 @@ class CepFoliumMapFrame(tk.Frame):
             logger.info("Nenhuma API Key foi informada")
             return
 
-        # Verificando se o usuário deseja consumir a API:
-        if not self.consumir_api.get() and self.arquivo_json.get() == "":
-            messagebox.showerror("Erro", "Nenhum arquivo JSON foi selecionado")
-            logger.info("Nenhum arquivo JSON foi selecionado")
-            return
-
-        # Gerando dataframe a partir de um arquivo Excel:
-        dataframe = self.get_dataframe(arquivo_excel)
-        consultar_df = dataframe.copy()
-
-        # Lendo arquivo JSON:
-        arquivo_json = self.arquivo_json.get()
-
-        if self.consumir_api.get():
-            if arquivo_json:
-                with open(arquivo_json, "r", encoding="utf-8") as f:
-                    # CEPs já consultados (talvez com coordenadas):
-                    api_results = json.load(f)
-
-                    # Encontrando CEPs consultados que não possuem coordenadas:
-                    ceps_json = set(api_results.keys())
-                    ceps_sem_coordenadas = set(
-                        {
-                            k: v
-                            for k, v in api_results.items()
-                            if not v.get("location", {}).get("coordinates")
-                        }.keys()
-                    )
+        # Descartando eventos atrasados de uma execução anterior:
+        while not self.eventos.empty():
+            self.eventos.get_nowait()
+        self.progressos = {}
+
+        # Executando em segundo plano (o processamento em si fica no CepFoliumMapEngine):
+        self.future = self.worker.submit(
+            self._executar(
+                arquivo_excel,
+                arquivo_json=self.arquivo_json.get(),
+                consumir_api=bool(self.consumir_api.get()),
+                api_key=self.api_key.get(),
+                geocode_max_per_second=self.max_request.get(),
+                modo_mapa=self.modo_mapa.get(),
+                modo_prefixos=self.modo_prefixos.get(),
+                particionar=(
+                    None
+                    if self.particionar.get() == SEM_PARTICAO
+                    else self.particionar.get()
+                ),
+            )
+        )
+        self.future.add_done_callback(lambda future: self.eventos.put(("fim", future)))
+
+        self.btn_executar.configure(state="disabled")
+        self.btn_cancelar.configure(state="normal")
+        self.progresso_var.set("Iniciando...")
+        self.after(100, self.atualizar_progresso)
+
+    def cancelar(self):
+        if self.future and not self.future.done():
+            logger.info("Cancelando execução")
+            self.progresso_var.set("Cancelando...")
+            self.future.cancel()
+
+    async def _executar(
+        self,
+        arquivo_excel,
+        arquivo_json,
+        consumir_api,
+        api_key,
+        geocode_max_per_second,
+        modo_mapa,
+        modo_prefixos,
+        particionar,
+    ):
+        # Executado na thread do worker; o engine (cliente HTTP e cache) é mantido entre execuções:
+        if self.engine is None:
+            from cepfoliummap.engine import CepFoliumMapEngine
+
+            self.engine = CepFoliumMapEngine(
+                on_progress=lambda progresso: self.eventos.put(
+                    ("progresso", replace(progresso))
+                )
+            )
+            await self.engine.open()
 
-                    # Atualizando dataframe:
-                    mask = consultar_df["cep"].apply(
-                        lambda x: not (x in ceps_json and x not in ceps_sem_coordenadas)
-                    )
-                    consultar_df = consultar_df[mask]
+        self.engine.api_key = api_key
+        self.engine.limiters["geocode"].set_limits(
+            max_per_second=geocode_max_per_second
+        )
 
-            # Consultando CEPs (apenas os que não possuem coordenadas):
-            new_results = await self.consultar_ceps(consultar_df)
+        return await self.engine.executar(
+            arquivo_excel,
+            arquivo_json=arquivo_json,
+            consumir_api=consumir_api,
+            modo_mapa=modo_mapa,
+            modo_prefixos=modo_prefixos,
+            particionar=particionar,
+        )
 
-            # Junção dos resultados:
-            if arquivo_json:
-                api_results.update(new_results)
+    def atualizar_progresso(self):
+        # Consumindo os eventos enviados pela thread do worker (executado na thread do Tk):
+        try:
+            while True:
+                evento, valor = self.eventos.get_nowait()
+
+                if evento == "progresso":
+                    # Uma linha por etapa (ex.: BrasilAPI e Geocode em paralelo):
+                    self.progressos[valor.etapa] = valor
+                    self.progresso_var.set(
+                        "\n".join(p.resumo() for p in self.progressos.values())
+                    )
+                    if valor.etapa != "geocode":
+                        self.progressbar.configure(
+                            maximum=max(valor.total, 1), value=valor.feitos
+                        )
+                elif evento == "fim":
+                    self.finalizar(valor)
+                    return
+        except queue.Empty:
+            pass
 
-            # Salvando resultados em um arquivo JSON:
-            self.export_results(api_results)
-        else:
-            with open(arquivo_json, "r", encoding="utf-8") as f:
-                api_results = json.load(f)
+        self.after(100, self.atualizar_progresso)
 
-        # Inserindo/populando colunas de latitude e longitude no dataframe:
-        df_coordenadas = self.populate_dataframe_coordinates(dataframe, api_results)
+    def finalizar(self, future):
+        self.btn_executar.configure(state="normal")
+        self.btn_cancelar.configure(state="disabled")
 
-        # Efetivamente gerando o mapa
-        mapa = self.gerar_mapa(df_coordenadas)
+        # Feedback para o usuário:
+        if future.cancelled():
+            self.progresso_var.set(
+                "Execução cancelada | CEPs já consultados foram salvos no cache"
+            )
+            messagebox.showinfo(
+                "Cancelado", "Execução cancelada. Os CEPs já consultados foram salvos."
+            )
+            return
 
-        # Salvando mapa
-        self.salvar_mapa(mapa)
+        erro = future.exception()
+        if erro:
+            logger.error("Erro ao gerar o mapa", exc_info=erro)
+            self.progresso_var.set("Erro ao gerar o mapa")
+            messagebox.showerror("Erro", f"Erro ao gerar o mapa: {erro}")
+            return
 
-        # Feedback para o usuário:
-        logger.info("Mapa gerado com sucesso")
+        self.progresso_var.set(f"Mapa gerado com sucesso: {future.result()}")
         messagebox.showinfo("Sucesso", "Mapa gerado com sucesso")
 
-    # --------------
-    def get_dataframe(self, filename):
-        """
-        Função que lê um arquivo Excel e retorna um DataFrame com as colunas "cep", "grupo", "latitude", "longitude", "icon", "color" e "texto".
-
-        Args:
-            arquivo(str): Caminho do arquivo Excel
-
-        Returns:
-            pd.DataFrame
-        """
-        # Lendo planilha (xls que contenha uma coluna "cep"):
-        planilha_df = pd.read_excel(filename)
-
-        # Verificando se as colunas necessárias existem:
-        if "grupo" not in planilha_df.columns:
-            planilha_df["grupo"] = "-"
-        if "latitude" not in planilha_df.columns:
-            planilha_df["latitude"] = None
-        if "longitude" not in planilha_df.columns:
-            planilha_df["longitude"] = None
-        if "icon" not in planilha_df.columns:
-            planilha_df["icon"] = None
-        if "color" not in planilha_df.columns:
-            planilha_df["color"] = None
-        if "texto" not in planilha_df.columns:
-            planilha_df["texto"] = None
-
-        dataframe = planilha_df[
-            ["cep", "grupo", "latitude", "longitude", "icon", "color", "texto"]
-        ]
-
-        # Removendo linhas que não possuem CEP:
-        dataframe = dataframe.dropna(subset=["cep"])
-
-        # Removendo pontos e traços do CEP:
-        dataframe["cep"] = dataframe["cep"].apply(
-            lambda x: str(x).replace(".", "").replace("-", "")
-        )
+    def destroy(self):
+        # Encerrando a execução em andamento (o Future só termina depois de os CEPs já consultados serem gravados no
+        # cache e no diário) e liberando o cliente HTTP e o cache:
+        self.cancelar()
+        if self.future is not None:
+            wait([self.future], timeout=30)
+        if self.engine is not None:
+            try:
+                self.worker.submit(self.engine.close()).result(timeout=5)
+            except Exception as e:
+                logger.exception(e)
+        self.worker.stop()
 
-        return dataframe
+        super().destroy()
 
-    async def consultar_ceps(self, dataframe):
-        """
-        Função que consome a API do BrasilAPI para obter as coordenadas dos CEPs, com várias requisições assíncronas.
 
-        Args:
-            dataframe (pd.DataFrame): DataFrame com todas as colunas necessárias
+class DataMergerFrame(tk.Frame):
+    def __init__(self, master, **kwargs):
+        super().__init__(master, **kwargs)
+        self.master = master
 
-        Returns:
-            json: Dicionário com os resultados da API
-        """
+        # Arquivos JSON:
+        lf_arquivos = ttk.Labelframe(self, text="Arquivos JSON (padrão da BrasilAPI)")
+        lf_arquivos.pack(pady=5, padx=5, fill="both", expand=True)
 
-        # Agrupando CEPs iguais:
-        unique_ceps = list(dataframe["cep"].drop_duplicates().dropna())
+        lf_arquivos.columnconfigure(0, weight=1)
 
-        # Consumindo APIs
-        tasks = run_all(
-            [partial(self.buscar_cep, cep) for cep in unique_ceps],
-            max_at_once=MAX_AT_ONCE,
-            max_per_second=REQUESTS_SECOND,
+        self.listbox = tk.Listbox(lf_arquivos, height=6)
+        self.listbox.grid(row=0, column=0, rowspan=2, sticky="nsew", padx=5, pady=5)
+        ttk.Button(lf_arquivos, text="Adicionar", command=self.buscar_jsons).grid(
+            row=0, column=1, sticky="ew", padx=5, pady=5
+        )
+        ttk.Button(lf_arquivos, text="Limpar", command=self.limpar).grid(
+            row=1, column=1, sticky="new", padx=5, pady=5
         )
-        results = await tasks
 
-        # Formatando resultados:
-        results = {r["cep"]: r for r in results if r}
+        # Arquivo consolidado:
+        lf_saida = ttk.Labelframe(self, text="Arquivo consolidado")
+        lf_saida.pack(pady=5, padx=5, fill="x", expand=False)
 
-        # Retornando resultado:
-        return results
+        lf_saida.columnconfigure(0, weight=1)
 
-    async def buscar_cep(self, cep):
-        """
-        Função que efetivamente consome a API do BrasilAPI para obter as coordenadas de um CEP de forma assíncrona.
-        """
+        self.arquivo_saida = tk.StringVar(value=MERGE_SAIDA)
+        ttk.Entry(lf_saida, textvariable=self.arquivo_saida).grid(
+            row=0, column=0, sticky="ew", padx=5, pady=5
+        )
+        ttk.Button(lf_saida, text="Buscar", command=self.buscar_saida).grid(
+            row=0, column=1, padx=5, pady=5
+        )
 
-        # BrasilAPI:
-        try:
-            async with AsyncClient(base_url=BRASILAPI_URL, timeout=60) as client:
-                logger.debug(f"Consultando CEP no BrasilAPI: {cep}")
-                brasilapi_response = await client.get(str(cep))
-        except Exception as e:
-            logger.exception(e)
-            logger.error(f"Error ao tentar consumir BrasilAPI para o CEP {cep}")
-            return {}
-
-        # GeoCode (se necessário):
-        if brasilapi_response.status_code == 200:
-            brasilapi_json = brasilapi_response.json()
-
-            if "latitude" in brasilapi_json["location"]["coordinates"]:
-                logging.debug(
-                    f"CEP {cep} possui coordenadas: {brasilapi_json['location']['coordinates']}"
-                )
-                return brasilapi_json
+        self.remover = tk.IntVar(value=0)
+        cb_remover = ttk.Checkbutton(
+            lf_saida,
+            text="Remover os arquivos consolidados",
+            variable=self.remover,
+        )
+        cb_remover.grid(row=1, column=0, sticky="w", padx=5, pady=5)
+        ToolTip(
+            cb_remover,
+            text="Após consolidar, remove os arquivos de entrada lidos sem erro (nunca o arquivo consolidado)",
+        )
 
-            # TODO: Refatorar para uma função própria:
-            logger.debug(f"CEP {cep} não possui coordenadas | Consultando GeoCode")
-            lat, lng = await get_coordinates_from_cep(cep, self.api_key.get())
+        # Resultado:
+        self.resultado_var = tk.StringVar(value="Aguardando execução")
+        ttk.Label(self, textvariable=self.resultado_var, wraplength=550).pack(
+            pady=5, padx=5
+        )
 
-            # Atualizando JSON:
-            if lat and lng:
-                logger.debug(f"Atualizando coordenadas do CEP {cep}: ({lat}, {lng})")
-                brasilapi_json["location"]["coordinates"]["latitude"] = lat
-                brasilapi_json["location"]["coordinates"]["longitude"] = lng
+        # Botão de execução:
+        self.btn_executar = ttk.Button(
+            self,
+            text="Consolidar",
+            command=self.executar,
+        )
+        self.btn_executar.pack(pady=5, padx=5)
 
-            # Retornando resultado:
-            return brasilapi_json
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.future = None
 
-        # Resultado padrão:
-        logger.warning(f"CEP {cep} não encontrado na BrasilAPI")
-        return {}
+    # --------------
+    def buscar_jsons(self):
+        arquivos = filedialog.askopenfilenames(
+            title="Arquivos JSON",
+            filetypes=[(".json", "*.json")],
+        )
+        for arquivo in arquivos:
+            if arquivo not in self.listbox.get(0, "end"):
+                self.listbox.insert("end", arquivo)
 
-    def populate_dataframe_coordinates(self, dataframe, api_results):
-        df_coordenadas = dataframe.copy()
+    def limpar(self):
+        self.listbox.delete(0, "end")
 
-        for index, row in df_coordenadas.iterrows():
-            if pd.notna(row["latitude"]) and pd.notna(row["longitude"]):
-                # Não vamos atualizar as linhas que já possuem coordenadas
-                continue
+    def buscar_saida(self):
+        arquivo = filedialog.asksaveasfilename(
+            title="Arquivo consolidado",
+            defaultextension=".json",
+            filetypes=[(".json", "*.json")],
+        )
+        if arquivo:
+            self.arquivo_saida.set(arquivo)
 
-            try:
-                cep = row["cep"]
-                coordenadas = (
-                    api_results.get(cep, {}).get("location", {}).get("coordinates", {})
-                )
+    # --------------
+    def executar(self):
+        arquivos = list(self.listbox.get(0, "end"))
+        if not arquivos:
+            messagebox.showerror("Erro", "Nenhum arquivo JSON foi selecionado")
+            return
 
-                df_coordenadas.at[index, "latitude"] = coordenadas.get(
-                    "latitude", np.nan
-                )
-                df_coordenadas.at[index, "longitude"] = coordenadas.get(
-                    "longitude", np.nan
-                )
-            except (ValueError, IndexError) as e:
-                logger.warning(f"Coordenadas não encontradas para o CEP {cep}", e)
-            except Exception as e:
-                logger.exception(e)
-                logger.error(f"Erro ao tentar atualizar coordenadas do CEP {cep}")
-
-        return df_coordenadas
-
-    def export_results(self, result):
-        # TODO: Com a unificação dos Frames esse arquivo não deveria mais ser salvo em "brasilapi"
-        with open(
-            file=f"consultas/{datetime.now():%Y-%m-%d-%H-%M-%S}.json",
-            mode="w",
-            encoding="utf8",
-        ) as file:
-            json.dump(result, file, ensure_ascii=False)
-
-    def gerar_mapa(self, dataframe):
-        mapa = folium.Map(
-            location=COORDENADAS_BRASIL,
-            zoom_start=4,
-            tiles=None,
+        saida = self.arquivo_saida.get()
+        if not saida:
+            messagebox.showerror("Erro", "Nenhum arquivo consolidado foi informado")
+            return
+
+        # Executando em segundo plano (arquivos grandes podem levar alguns minutos):
+        self.future = self.executor.submit(
+            self._executar, arquivos, saida, bool(self.remover.get())
         )
 
-        # Tipos de Mapa:
-        folium.TileLayer(
-            "cartodbpositron", attr="CartoDB Positron", name="Preto e Branco"
-        ).add_to(mapa)
-        folium.TileLayer(
-            "OpenStreetMap", attr="Open Street Map", name="Satélite"
-        ).add_to(mapa)
-
-        # Marcadores:
-        cnt_not_marked = 0
-
-        for grupo, group_data in dataframe.groupby("grupo"):
-            mark_cluster = MarkerCluster(name=grupo).add_to(mapa)
-            for _, row in group_data.iterrows():
-                try:
-                    cep = row["cep"]
-                    lat = row["latitude"]
-                    lng = row["longitude"]
-
-                    texto = str(row["texto"]) if pd.notna(row["texto"]) else cep
-                    icon = str(row["icon"]) if pd.notna(row["icon"]) else "circle-info"
-                    color = str(row["color"]) if pd.notna(row["color"]) else "blue"
-
-                    if pd.notna(lat) and pd.notna(lng):
-                        Marker(
-                            location=(lat, lng),
-                            popup=texto,
-                            # tooltip  = texto,
-                            icon=Icon(
-                                prefix="fa",
-                                icon=icon,
-                                color=color,
-                            ),
-                        ).add_to(mark_cluster)
-                    else:
-                        cnt_not_marked += 1
-                        logger.warning(
-                            f"CEP {cep} não possui localização: ({lat}, {lng})"
-                        )
-                except Exception as e:
-                    logger.exception(e)
-                    logger.error(f"Erro ao tentar adicionar marcador ao mapa: {cep}")
+        self.btn_executar.configure(state="disabled")
+        self.resultado_var.set("Consolidando...")
+        self.after(100, self.verificar)
 
-        # Quantidade de CEPs que não foram adicionados ao mapa:
-        logger.info(
-            f"Um total de {cnt_not_marked} marcadores não foram adicionados ao mapa"
-        )
+    @staticmethod
+    def _executar(arquivos, saida, remover):
+        from cepfoliummap.merger import merge_results, remove_merged
+
+        report = merge_results(arquivos, saida)
+        if remover:
+            remove_merged(report, arquivos)
+        return report
 
-        # Controlador:
-        folium.LayerControl(collapsed=False).add_to(mapa)
+    def verificar(self):
+        if not self.future.done():
+            self.after(100, self.verificar)
+            return
+
+        self.btn_executar.configure(state="normal")
 
-        return mapa
+        erro = self.future.exception()
+        if erro:
+            logger.error("Erro ao consolidar os arquivos", exc_info=erro)
+            self.resultado_var.set("Erro ao consolidar os arquivos")
+            messagebox.showerror("Erro", f"Erro ao consolidar os arquivos: {erro}")
+            return
+
+        report = self.future.result()
+        self.resultado_var.set(report.resumo())
+        if report.erros:
+            messagebox.showwarning(
+                "Atenção",
+                "Alguns arquivos não puderam ser lidos:\n" + "\n".join(report.erros),
+            )
+        else:
+            messagebox.showinfo("Sucesso", "Arquivos consolidados com sucesso")
 
-    def salvar_mapa(self, mapa):
-        # TODO: Permitir que o usuário escolha o local de salvamento
+        # Arquivos removidos após a consolidação saem da lista:
+        for indice in reversed(range(self.listbox.size())):
+            if not os.path.exists(self.listbox.get(indice)):
+                self.listbox.delete(indice)
 
-        filename = f"mapas/{datetime.now():%Y-%m-%d-%H-%M-%S}.html"
-        mapa.save(filename)
+    def destroy(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        super().destroy()
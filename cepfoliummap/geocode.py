@@ -1,11 +1,13 @@
 import logging
 
-from httpx import AsyncClient
-
+from cepfoliummap.cep import normalize_cep
 from cepfoliummap.constants import GEOCODE_URL
+from cepfoliummap.ratelimit import ThrottledError, request_with_retry
 
 logger = logging.getLogger(__name__)
 
+GEOCODE_THROTTLED = "Throttled! See geocode.xyz/pricing"
+
 
 def format_cep(cep):
     """
@@ -15,50 +17,77 @@ def format_cep(cep):
         cep (str): CEP a ser formatado
 
     Returns:
-        str: CEP formatado
+        str: CEP formatado (ex.: "01.310-100"), ou None caso não seja um CEP válido
     """
 
-    cep_formatado = str(cep)
-    cep_formatado = cep_formatado.replace(".", "").replace("-", "")
-    cep_formatado = cep_formatado.zfill(8)
+    cep_formatado = normalize_cep(cep)
+    if not cep_formatado:
+        return None
+
     cep_formatado = f"{cep_formatado[0:2]}.{cep_formatado[2:5]}-{cep_formatado[5:8]}"
-    logger.debug(f"CEP formatado: {cep_formatado}")
+    logger.debug("CEP formatado: %s", cep_formatado)
 
     return cep_formatado
 
 
-async def consume_geocode_api(cep_formatado, api_key=None):
+def is_throttled(response):
+    """
+    Função que verifica se o Geocode sinalizou excesso de consultas no corpo da resposta ("Throttled!").
+    """
+
     try:
-        logger.debug(f"Consumindo Geocode | CEP: {cep_formatado}")
-
-        async with AsyncClient(base_url=GEOCODE_URL, timeout=60) as client:
-            response = await client.post(
-                url="",
-                data={
-                    "locate": cep_formatado,
-                    "auth": api_key,  # TODO: Apenas se diferente de None
-                    "geoit": "JSON",
-                    "region": "BR",
-                },
-            )
+        return response.json().get("latt") == GEOCODE_THROTTLED
+    except Exception:
+        return False
+
+
+async def consume_geocode_api(
+    client, limiter, cep_formatado, api_key=None, ao_enviar=None
+):
+    async def send():
+        response = await client.post(
+            url=GEOCODE_URL,
+            timeout=limiter.timeout(),
+            data={
+                "locate": cep_formatado,
+                "auth": api_key,  # TODO: Apenas se diferente de None
+                "geoit": "JSON",
+                "region": "BR",
+            },
+        )
+
+        # O Geocode também sinaliza a limitação com status 200:
+        if is_throttled(response):
+            raise ThrottledError("Throttled!")
 
         return response
+
+    try:
+        logger.debug("Consumindo Geocode | CEP: %s", cep_formatado)
+        return await request_with_retry(
+            limiter, send, f"CEP {cep_formatado}", ao_enviar
+        )
+    except ThrottledError as e:
+        logger.warning(
+            "Geocode limitado após várias tentativas | CEP: %s", cep_formatado
+        )
+        return
     except TimeoutError as e:
-        logger.warning(f"TimeoutError | CEP: {cep_formatado}")
+        logger.warning("TimeoutError | CEP: %s", cep_formatado)
         return
     except Exception as e:
         logger.exception(e)
-        logger.error(f"Erro ao consultar CEP: {cep_formatado}")
+        logger.error("Erro ao consultar CEP: %s", cep_formatado)
         return
 
 
 def extract_coordinates_from_json(response_json):
     # Possíveis erros:
     if "error" in response_json:
-        logger.warning(f"Geodecode retornou um erro: {response_json}")
+        logger.warning("Geodecode retornou um erro: %s", response_json)
         return None, None
-    if response_json["latt"] == "Throttled! See geocode.xyz/pricing":
-        logger.warning(f"Excedido consultas")
+    if response_json["latt"] == GEOCODE_THROTTLED:
+        logger.warning("Excedido consultas")
         return None, None
 
     # Lendo JSON:
@@ -69,16 +98,21 @@ def extract_coordinates_from_json(response_json):
     return lat, long
 
 
-async def get_coordinates_from_cep(cep, api_key=None):
+async def get_coordinates_from_cep(client, limiter, cep, api_key=None):
     # Variáveis:
     lat = None
     lng = None
 
     # Sanitizando e formatando CEP:
     cep_formatado = format_cep(cep)
+    if not cep_formatado:
+        logger.warning("CEP inválido: %s", cep)
+        return lat, lng
 
     # Efetivamente consumindo a API:
-    geodecode_response = await consume_geocode_api(cep_formatado, api_key)
+    geodecode_response = await consume_geocode_api(
+        client, limiter, cep_formatado, api_key
+    )
 
     if not geodecode_response:
         return lat, lng
@@ -88,7 +122,7 @@ async def get_coordinates_from_cep(cep, api_key=None):
         geodecode_json = geodecode_response.json()
     except Exception as e:
         logger.exception(e)
-        logger.error(f"Erro ao tentar ler JSON do GeoCode: {cep}")
+        logger.error("Erro ao tentar ler JSON do GeoCode: %s", cep)
         return lat, lng
 
     # Extraindo coordenadas:
@@ -96,7 +130,7 @@ async def get_coordinates_from_cep(cep, api_key=None):
         lat, lng = extract_coordinates_from_json(geodecode_json)
     except Exception as e:
         logger.exception(e)
-        logger.error(f"Erro ao tentar extrair coordenadas do GeoCode: {cep}")
+        logger.error("Erro ao tentar extrair coordenadas do GeoCode: %s", cep)
         return lat, lng
 
     # Retornando resultado:
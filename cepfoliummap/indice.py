@@ -0,0 +1,242 @@
+"""
+Índice compacto (em disco) de CEP -> coordenadas, aberto com numpy.memmap.
+
+Formato do arquivo (little-endian):
+
+    cabeçalho   8 bytes   b"CEPIDX01"
+                8 bytes   quantidade de CEPs (uint64)
+    ceps        n * 4     CEPs ordenados (uint32)
+    latitudes   n * 4     float32
+    longitudes  n * 4     float32
+
+Conversão a partir de um arquivo JSON no padrão da BrasilAPI ou do cache local:
+
+    python -m cepfoliummap.indice consultas/resultados.json --saida consultas/indice.cepidx
+    python -m cepfoliummap.indice --cache consultas/cache.sqlite3
+"""
+
+import argparse
+import logging
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+
+import numpy as np
+
+from cepfoliummap.cache import CepCache, get_coordinates, iter_json_results
+from cepfoliummap.cep import ceps_to_int, normalize_cep
+from cepfoliummap.config import initial_config
+from cepfoliummap.constants import INDICE_PATH
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"CEPIDX01"
+_CABECALHO = struct.Struct("<8sQ")
+
+
+class CoordinateIndex:
+    """
+    Índice CEP -> (latitude, longitude) mapeado em memória: abrir o arquivo não lê os dados, e cada consulta lê
+    apenas as páginas tocadas pela busca binária (np.searchsorted), independente do tamanho do histórico. Uso:
+
+        with CoordinateIndex("consultas/indice.cepidx") as indice:
+            latitudes, longitudes = indice.lookup(dataframe["cep"])
+    """
+
+    def __init__(self, filename=INDICE_PATH):
+        self.filename = filename
+
+        with open(filename, "rb") as file:
+            magic, total = _CABECALHO.unpack(file.read(_CABECALHO.size))
+        if magic != _MAGIC:
+            raise ValueError(f"Arquivo não é um índice de CEPs: {filename}")
+
+        self.total = total
+        if total:
+            self.ceps, self.latitudes, self.longitudes = (
+                np.memmap(
+                    filename,
+                    dtype=dtype,
+                    mode="r",
+                    offset=_CABECALHO.size + i * 4 * total,
+                    shape=(total,),
+                )
+                for i, dtype in enumerate(("<u4", "<f4", "<f4"))
+            )
+        else:
+            self.ceps = np.empty(0, dtype="<u4")
+            self.latitudes = self.longitudes = np.empty(0, dtype="<f4")
+
+        logger.info(f"Índice {filename}: {total} CEPs")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.total
+
+    def close(self):
+        # Os mapeamentos são liberados quando não houver mais referências aos arrays:
+        self.ceps = np.empty(0, dtype="<u4")
+        self.latitudes = self.longitudes = np.empty(0, dtype="<f4")
+        self.total = 0
+
+    def lookup(self, ceps):
+        """
+        Função que busca as coordenadas de vários CEPs de uma só vez.
+
+        Args:
+            ceps (pd.Series|iterable): CEPs a serem buscados (em qualquer formato)
+
+        Returns:
+            tuple: (latitudes, longitudes) como arrays float64, com NaN nos CEPs que não estão no índice
+        """
+
+        numeros = ceps_to_int(ceps)
+
+        latitudes = np.full(len(numeros), np.nan)
+        longitudes = np.full(len(numeros), np.nan)
+        if not self.total:
+            return latitudes, longitudes
+
+        # Mesmo dtype do arquivo, para que a busca não converta (copie) o array mapeado:
+        buscados = np.where(numeros >= 0, numeros, 0).astype("<u4")
+        posicoes = np.searchsorted(self.ceps, buscados)
+        posicoes[posicoes == self.total] = 0
+        encontrados = (numeros >= 0) & (self.ceps[posicoes] == buscados)
+        posicoes = posicoes[encontrados]
+
+        # Coordenadas arredondadas para 6 casas (a precisão do float32 fica abaixo de 1 metro):
+        latitudes[encontrados] = np.round(
+            self.latitudes[posicoes].astype(np.float64), 6
+        )
+        longitudes[encontrados] = np.round(
+            self.longitudes[posicoes].astype(np.float64), 6
+        )
+
+        return latitudes, longitudes
+
+
+def write_index(filename, ceps, latitudes, longitudes):
+    """
+    Função que grava um índice a partir de colunas de CEPs e coordenadas (o último registro de um CEP prevalece).
+
+    O arquivo é gravado em um temporário e renomeado ao final, então um índice aberto nunca fica pela metade.
+
+    Args:
+        filename (str): Caminho do índice
+        ceps (iterable): CEPs (em qualquer formato); inválidos e sem coordenadas são ignorados
+        latitudes (iterable): Latitudes
+        longitudes (iterable): Longitudes
+
+    Returns:
+        int: Quantidade de CEPs gravados
+    """
+
+    numeros = ceps_to_int(ceps)
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+
+    validos = (numeros >= 0) & np.isfinite(latitudes) & np.isfinite(longitudes)
+    numeros, latitudes, longitudes = (
+        numeros[validos],
+        latitudes[validos],
+        longitudes[validos],
+    )
+
+    # Ordenando por CEP e mantendo o último registro de cada um:
+    ordem = np.argsort(numeros, kind="stable")
+    numeros = numeros[ordem]
+    ultimos = np.append(numeros[1:] != numeros[:-1], True)[: len(numeros)]
+    ordem = ordem[ultimos]
+
+    Path(filename).parent.mkdir(parents=True, exist_ok=True)
+    temporario = f"{filename}.tmp"
+    with open(temporario, "wb") as file:
+        file.write(_CABECALHO.pack(_MAGIC, len(ordem)))
+        file.write(numeros[ultimos].astype("<u4").tobytes())
+        file.write(latitudes[ordem].astype("<f4").tobytes())
+        file.write(longitudes[ordem].astype("<f4").tobytes())
+    os.replace(temporario, filename)
+
+    logger.info(f"Índice {filename}: {len(ordem)} CEPs gravados")
+
+    return len(ordem)
+
+
+def index_from_json(json_filename, filename=INDICE_PATH):
+    """
+    Função que converte um arquivo JSON no padrão da BrasilAPI ({cep: resultado}) em um índice, lendo-o aos poucos.
+
+    Returns:
+        int: Quantidade de CEPs gravados
+    """
+
+    ceps, latitudes, longitudes = array("q"), array("d"), array("d")
+    for cep, result in iter_json_results(json_filename):
+        cep = normalize_cep(cep)
+        lat, lng = get_coordinates(result)
+        if cep is None or lat is None or lng is None:
+            continue
+        ceps.append(int(cep))
+        latitudes.append(lat)
+        longitudes.append(lng)
+
+    return write_index(
+        filename,
+        np.frombuffer(ceps, dtype=np.int64),
+        np.frombuffer(latitudes),
+        np.frombuffer(longitudes),
+    )
+
+
+def index_from_cache(cache, filename=INDICE_PATH):
+    """
+    Função que grava um índice com todos os CEPs com coordenadas do cache local.
+
+    Returns:
+        int: Quantidade de CEPs gravados
+    """
+
+    return write_index(filename, *cache.coordinates())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m cepfoliummap.indice",
+        description="Gera o índice compacto de CEP -> coordenadas.",
+    )
+    parser.add_argument("json", nargs="?", help="Arquivo JSON no padrão da BrasilAPI")
+    parser.add_argument(
+        "--cache", help="Gerar a partir do cache local (ex.: consultas/cache.sqlite3)"
+    )
+    parser.add_argument(
+        "--saida",
+        default=INDICE_PATH,
+        help=f"Arquivo do índice (padrão: {INDICE_PATH})",
+    )
+    args = parser.parse_args(argv)
+
+    if bool(args.json) == bool(args.cache):
+        parser.error("informe um arquivo JSON ou --cache")
+
+    # Configurações iniciais:
+    initial_config()
+
+    if args.cache:
+        with CepCache(args.cache) as cache:
+            total = index_from_cache(cache, args.saida)
+    else:
+        total = index_from_json(args.json, args.saida)
+
+    print(f"{total} CEPs gravados em {args.saida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
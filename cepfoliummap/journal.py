@@ -0,0 +1,143 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+from cepfoliummap.constants import JOURNAL_DIR, JOURNAL_FSYNC_SEGUNDOS
+
+logger = logging.getLogger(__name__)
+
+ETAPA_BRASILAPI = "brasilapi"
+ETAPA_GEOCODE = "geocode"
+
+
+def journal_path(arquivo, diretorio=JOURNAL_DIR):
+    """
+    Função que retorna o caminho do diário de uma planilha: sempre o mesmo para o mesmo arquivo, permitindo que uma
+    execução interrompida seja retomada.
+
+    Args:
+        arquivo (str): Caminho da planilha
+        diretorio (str): Diretório dos diários
+
+    Returns:
+        str: Caminho do diário, ex.: "consultas/planilha-1a2b3c4d.jsonl"
+    """
+
+    caminho = Path(arquivo).resolve()
+    chave = hashlib.sha1(str(caminho).encode("utf-8")).hexdigest()[:8]
+    return str(Path(diretorio) / f"{caminho.stem}-{chave}.jsonl")
+
+
+def _termina_com_quebra(filename):
+    with open(filename, "rb") as file:
+        file.seek(-1, os.SEEK_END)
+        return file.read(1) == b"\n"
+
+
+class Journal:
+    """
+    Diário (JSON Lines, somente acréscimo) dos resultados de uma consulta, gravado à medida que chegam.
+
+    Cada linha é {"cep": ..., "etapa": "brasilapi"|"geocode", "result": {...}}; o último registro de um CEP prevalece.
+    Cada linha é entregue ao sistema operacional imediatamente (um travamento do processo não perde resultados) e o
+    arquivo é sincronizado com o disco (fsync) no máximo a cada JOURNAL_FSYNC_SEGUNDOS. Uso:
+
+        with Journal(journal_path(arquivo)) as journal:
+            anteriores = journal.load()
+            journal.append(cep, ETAPA_BRASILAPI, result)
+    """
+
+    def __init__(self, filename, fsync_segundos=JOURNAL_FSYNC_SEGUNDOS):
+        self.filename = filename
+        self.fsync_segundos = fsync_segundos
+
+        self._file = None
+        self._ultimo_fsync = time.monotonic()
+        self._pendentes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def load(self):
+        """
+        Função que lê o diário existente (de uma execução interrompida), se houver.
+
+        Uma última linha incompleta (gravação interrompida) é ignorada.
+
+        Returns:
+            dict: Dicionário {cep: (etapa, resultado)}
+        """
+
+        registros = {}
+        if not os.path.exists(self.filename):
+            return registros
+
+        with open(self.filename, "r", encoding="utf8") as file:
+            for numero, linha in enumerate(file, start=1):
+                try:
+                    registro = json.loads(linha)
+                    registros[registro["cep"]] = (registro["etapa"], registro["result"])
+                except (ValueError, KeyError):
+                    logger.warning(
+                        f"Diário {self.filename}: linha {numero} inválida ignorada"
+                    )
+
+        logger.info(f"Diário {self.filename}: {len(registros)} CEPs já consultados")
+
+        return registros
+
+    def append(self, cep, etapa, result):
+        if self._file is None:
+            Path(self.filename).parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.filename, "a", encoding="utf8")
+
+            # Uma linha incompleta (execução interrompida no meio da gravação) não deve "engolir" o próximo registro:
+            if self._file.tell() and not _termina_com_quebra(self.filename):
+                self._file.write("\n")
+
+        self._file.write(
+            json.dumps(
+                {"cep": cep, "etapa": etapa, "result": result}, ensure_ascii=False
+            )
+            + "\n"
+        )
+        self._file.flush()
+        self._pendentes += 1
+
+        if time.monotonic() - self._ultimo_fsync >= self.fsync_segundos:
+            self.sync()
+
+    def sync(self):
+        if self._file is not None and self._pendentes:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._pendentes = 0
+        self._ultimo_fsync = time.monotonic()
+
+    def close(self):
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def compact(self):
+        """
+        Função que consolida o diário (último registro de cada CEP) e o remove.
+
+        Returns:
+            dict: Dicionário {cep: resultado}, apenas com os CEPs encontrados
+        """
+
+        self.close()
+        results = {cep: result for cep, (_, result) in self.load().items() if result}
+
+        if os.path.exists(self.filename):
+            os.remove(self.filename)
+
+        return results
@@ -0,0 +1,711 @@
+import html
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import quote
+
+import folium
+import numpy as np
+import pandas as pd
+from branca.colormap import StepColormap, linear
+from branca.element import MacroElement, Template
+from folium import GeoJson, GeoJsonTooltip, Icon, Marker
+from folium.plugins import FastMarkerCluster, MarkerCluster
+
+from cepfoliummap.blocos import SUFIXO_DIRETORIO, montar_blocos, salvar_blocos
+from cepfoliummap.compressao import comprimir
+from cepfoliummap.constants import (
+    COORDENADAS_BRASIL,
+    DENSIDADE_FORMA,
+    DENSIDADE_POR_GRUPO,
+    MAPA_AGRUPAR_LOCAIS,
+    MAPA_AGRUPAR_TEXTOS,
+    MAPA_BLOCOS_ZOOM,
+    MAPA_COMPRIMIR,
+    MAPA_ESCAPAR_TEXTO,
+    MAPA_MODO,
+    MAPA_MODO_DENSIDADE_MINIMO,
+    MAPA_MODO_RAPIDO_MINIMO,
+    MAPA_MODOS,
+)
+from cepfoliummap.densidade import agregar, poligonos, tamanho_celula
+
+logger = logging.getLogger(__name__)
+
+MODOS = MAPA_MODOS
+MODO_AUTO, MODO_MARCADORES, MODO_RAPIDO, MODO_DENSIDADE, MODO_BLOCOS = MODOS
+
+ICON_PADRAO = "circle-info"
+COLOR_PADRAO = "blue"
+
+# Callback (JavaScript) do FastMarkerCluster: cada linha é [lat, lng, índice do estilo, texto]
+_FAST_MARKER_CALLBACK = """(function () {
+    var estilos = %s;
+    return function (row) {
+        var estilo = estilos[row[2]];
+        var marker = L.marker(new L.LatLng(row[0], row[1]), {
+            icon: L.AwesomeMarkers.icon({
+                prefix: "fa",
+                icon: estilo[0],
+                markerColor: estilo[1],
+                iconColor: "white",
+                extraClasses: "fa-rotate-0"
+            })
+        });
+        marker.bindPopup(row[3], {maxWidth: "100%%"});
+        return marker;
+    };
+})()"""
+
+# Carregamento dos blocos (modo "blocos") pela área visível, com um círculo por bloco abaixo do zoom dos blocos:
+_BLOCOS_TEMPLATE = """
+{% macro script(this, kwargs) %}
+(function () {
+    var mapa = {{ this._parent.get_name() }};
+    var camadas = [{% for camada in this.camadas %}{{ camada.get_name() }}{% if not loop.last %}, {% endif %}{% endfor %}];
+    var estilos = {{ this.estilos|tojson }};
+    var indice = {{ this.indice|tojson }};
+    var zoom = {{ this.zoom }};
+    var url = {{ this.url|tojson }};
+    var carregados = {};
+    var aviso = null;
+
+    var visao = L.layerGroup();
+    var renderer = L.canvas();
+    var maximo = 1;
+    Object.keys(indice).forEach(function (chave) {
+        maximo = Math.max(maximo, indice[chave][0]);
+    });
+    Object.keys(indice).forEach(function (chave) {
+        var bloco = indice[chave];
+        L.circleMarker([bloco[1], bloco[2]], {
+            renderer: renderer,
+            radius: 4 + 16 * Math.sqrt(bloco[0] / maximo),
+            weight: 1,
+            fillOpacity: 0.5
+        }).bindTooltip(bloco[0] + " linhas").addTo(visao);
+    });
+
+    function marcador(ponto) {
+        var estilo = estilos[ponto.properties.e];
+        var coordenadas = ponto.geometry.coordinates;
+        return L.marker([coordenadas[1], coordenadas[0]], {
+            icon: L.AwesomeMarkers.icon({
+                prefix: "fa",
+                icon: estilo[0],
+                markerColor: estilo[1],
+                iconColor: "white",
+                extraClasses: "fa-rotate-0"
+            })
+        }).bindPopup(ponto.properties.t, {maxWidth: "100%"});
+    }
+
+    function avisar() {
+        if (aviso) {
+            return;
+        }
+        aviso = L.control({position: "bottomleft"});
+        aviso.onAdd = function () {
+            var div = L.DomUtil.create("div", "leaflet-bar");
+            div.style.background = "white";
+            div.style.padding = "4px 8px";
+            div.innerHTML = "Não foi possível carregar os pontos: abra o mapa por um servidor HTTP " +
+                "(ex.: python -m http.server).";
+            return div;
+        };
+        aviso.addTo(mapa);
+    }
+
+    function carregar(chave) {
+        carregados[chave] = true;
+        fetch(url + chave + ".json")
+            .then(function (resposta) {
+                if (!resposta.ok) {
+                    throw new Error("HTTP " + resposta.status);
+                }
+                return resposta.json();
+            })
+            .then(function (bloco) {
+                var novos = camadas.map(function () { return []; });
+                bloco.features.forEach(function (ponto) {
+                    novos[ponto.properties.g].push(marcador(ponto));
+                });
+                novos.forEach(function (marcadores, grupo) {
+                    if (marcadores.length) {
+                        camadas[grupo].addLayers(marcadores);
+                    }
+                });
+            })
+            .catch(function (erro) {
+                delete carregados[chave];
+                console.error("Bloco " + chave + ": " + erro);
+                avisar();
+            });
+    }
+
+    function atualizar() {
+        if (mapa.getZoom() < zoom) {
+            mapa.addLayer(visao);
+            return;
+        }
+        mapa.removeLayer(visao);
+
+        var limites = mapa.getBounds();
+        var inicio = mapa.project(limites.getNorthWest(), zoom).divideBy(256).floor();
+        var fim = mapa.project(limites.getSouthEast(), zoom).divideBy(256).floor();
+        for (var x = inicio.x; x <= fim.x; x++) {
+            for (var y = inicio.y; y <= fim.y; y++) {
+                var chave = x + "-" + y;
+                if (chave in indice && !carregados[chave]) {
+                    carregar(chave);
+                }
+            }
+        }
+    }
+
+    mapa.on("moveend", atualizar);
+    atualizar();
+})();
+{% endmacro %}
+"""
+
+
+class CarregadorBlocos(MacroElement):
+    """
+    Elemento do mapa (modo "blocos") que guarda os blocos de pontos até o mapa ser salvo (salvar_mapa grava os
+    blocos ao lado do HTML e preenche "url") e, no navegador, carrega os blocos da área visível nas camadas de cada
+    grupo.
+    """
+
+    _template = Template(_BLOCOS_TEMPLATE)
+
+    def __init__(self, camadas, estilos, indice, blocos, zoom):
+        super().__init__()
+        self._name = "CarregadorBlocos"
+        self.camadas = camadas
+        self.estilos = estilos
+        self.indice = indice
+        self.blocos = blocos
+        self.zoom = zoom
+        self.url = ""
+
+
+def _coordenadas(dataframe):
+    # Latitudes e longitudes em float64 com 6 casas: colunas float32 (planilha.get_dataframe) não levam o ruído da
+    # conversão (ex.: -23.550519943237305) ao HTML
+    return tuple(
+        pd.to_numeric(dataframe[coluna], errors="coerce").astype(np.float64).round(6)
+        for coluna in ("latitude", "longitude")
+    )
+
+
+def _com_padrao(serie, padrao):
+    # Valores como objetos, com "padrao" nos ausentes (colunas categóricas não aceitam fillna fora das categorias)
+    return serie.astype(object).where(serie.notna(), padrao)
+
+
+def gerar_mapa(dataframe, modo=MAPA_MODO, contadores=None, agrupar=MAPA_AGRUPAR_LOCAIS):
+    """
+    Função que gera um mapa (folium) com um marcador por linha do DataFrame, agrupados por "grupo".
+
+    Args:
+        dataframe (pd.DataFrame): DataFrame com as colunas "cep", "grupo", "latitude", "longitude", "icon", "color" e "texto"
+        modo (str): "marcadores" (um objeto Marker por linha), "rapido" (um único array por grupo, renderizado no
+            navegador), "densidade" (contagem por célula de uma grade), "blocos" (pontos em arquivos ao lado do HTML,
+            carregados pela área visível; ver adicionar_blocos) ou "auto" (rápido a partir de
+            MAPA_MODO_RAPIDO_MINIMO linhas e densidade a partir de MAPA_MODO_DENSIDADE_MINIMO linhas)
+        contadores (dict): Dicionário onde são registrados o modo usado e os marcadores não adicionados [opcional]
+        agrupar (bool): Um único marcador por local (grupo, latitude, longitude), ver agrupar_locais; no modo
+            "auto", a escolha entre "marcadores" e "rapido" considera a quantidade de marcadores após o agrupamento
+
+    Returns:
+        folium.Map
+    """
+
+    if modo not in MODOS:
+        raise ValueError(f"Modo de mapa inválido: {modo}")
+    if (
+        modo == MODO_AUTO
+        and MAPA_MODO_DENSIDADE_MINIMO
+        and len(dataframe) >= MAPA_MODO_DENSIDADE_MINIMO
+    ):
+        modo = MODO_DENSIDADE
+
+    linhas = len(dataframe)
+    if agrupar and modo != MODO_DENSIDADE:
+        dataframe = agrupar_locais(dataframe)
+
+    if modo == MODO_AUTO:
+        if len(dataframe) >= MAPA_MODO_RAPIDO_MINIMO:
+            modo = MODO_RAPIDO
+        else:
+            modo = MODO_MARCADORES
+
+    mapa = folium.Map(
+        location=COORDENADAS_BRASIL,
+        zoom_start=4,
+        tiles=None,
+    )
+
+    # Tipos de Mapa:
+    folium.TileLayer(
+        "cartodbpositron", attr="CartoDB Positron", name="Preto e Branco"
+    ).add_to(mapa)
+    folium.TileLayer("OpenStreetMap", attr="Open Street Map", name="Satélite").add_to(
+        mapa
+    )
+
+    # Marcadores:
+    if modo == MODO_DENSIDADE:
+        cnt_not_marked = adicionar_densidade(mapa, dataframe)
+    elif modo == MODO_RAPIDO:
+        cnt_not_marked = adicionar_marcadores_rapidos(mapa, dataframe)
+    elif modo == MODO_BLOCOS:
+        cnt_not_marked = adicionar_blocos(mapa, dataframe)
+    else:
+        cnt_not_marked = adicionar_marcadores(mapa, dataframe)
+
+    # Quantidade de CEPs que não foram adicionados ao mapa:
+    logger.info(
+        f"Um total de {cnt_not_marked} marcadores não foram adicionados ao mapa"
+    )
+    if contadores is not None:
+        contadores["modo_mapa"] = modo
+        contadores["nao_marcados"] = cnt_not_marked
+        if modo != MODO_DENSIDADE:
+            contadores["marcadores"] = len(dataframe) - cnt_not_marked
+            contadores["linhas_agrupadas"] = linhas - len(dataframe)
+
+    # Controlador:
+    folium.LayerControl(collapsed=False).add_to(mapa)
+
+    return mapa
+
+
+def agrupar_locais(dataframe, max_textos=MAPA_AGRUPAR_TEXTOS):
+    """
+    Função que reduz as linhas com o mesmo grupo e as mesmas coordenadas (ex.: vários clientes no mesmo prédio) a
+    uma única linha por local. Linhas sem coordenadas são mantidas como estão.
+
+    Cada local recebe o par (icon, color) mais frequente entre suas linhas e, na coluna "popup", um HTML com a
+    quantidade de linhas e os textos das primeiras "max_textos" linhas; locais com uma única linha ficam com
+    "popup" vazio (o texto original é usado).
+
+    Args:
+        dataframe (pd.DataFrame): DataFrame com as colunas "cep", "grupo", "latitude", "longitude", "icon", "color" e "texto"
+        max_textos (int): Quantidade máxima de textos listados no popup de cada local
+
+    Returns:
+        pd.DataFrame: DataFrame com uma linha por local, acrescido das colunas "quantidade" e "popup"
+    """
+
+    latitudes, longitudes = _coordenadas(dataframe)
+    localizados = (latitudes.notna() & longitudes.notna()).to_numpy()
+
+    pontos = pd.DataFrame(
+        {
+            "cep": dataframe["cep"].to_numpy(),
+            "grupo": dataframe["grupo"].to_numpy(),
+            "latitude": latitudes.to_numpy(),
+            "longitude": longitudes.to_numpy(),
+            "icon": _com_padrao(dataframe["icon"], ICON_PADRAO).astype(str).to_numpy(),
+            "color": _com_padrao(dataframe["color"], COLOR_PADRAO)
+            .astype(str)
+            .to_numpy(),
+            "texto": dataframe["texto"].to_numpy(),
+        }
+    )
+    sem_localizacao = pontos[~localizados].assign(quantidade=1, popup=None)
+    pontos = pontos[localizados]
+
+    # Locais numerados na ordem em que aparecem (a primeira linha de cada local fornece "cep" e "texto"):
+    grupos = pontos.groupby(
+        ["grupo", "latitude", "longitude"], sort=False, dropna=False
+    )
+    local = grupos.ngroup().to_numpy()
+    ordem = grupos.cumcount().to_numpy()
+    quantidade = np.bincount(local)
+    primeiras = pontos[ordem == 0]
+
+    # Par (icon, color) mais frequente de cada local (empate: o que aparece primeiro):
+    estilos = (
+        pontos.assign(local=local)
+        .groupby(["local", "icon", "color"], sort=False)
+        .size()
+        .reset_index(name="n")
+        .sort_values("n", ascending=False, kind="stable")
+        .drop_duplicates("local")
+        .set_index("local")
+        .sort_index()
+    )
+
+    # Popups apenas dos locais com mais de uma linha, com os textos ordenados por local:
+    listados = (quantidade[local] > 1) & (ordem < max_textos)
+    locais_listados = local[listados]
+    posicoes = np.argsort(locais_listados, kind="stable")
+    locais_listados = locais_listados[posicoes]
+    textos = _textos(pontos[listados]).to_numpy()[posicoes].tolist()
+    limites = np.flatnonzero(np.diff(locais_listados)) + 1
+
+    popups = np.full(len(quantidade), None, dtype=object)
+    for inicio, fim in zip([0, *limites.tolist()], [*limites.tolist(), len(textos)]):
+        if inicio == fim:
+            continue
+        n = int(quantidade[locais_listados[inicio]])
+        popups[locais_listados[inicio]] = (
+            f"<b>{n} linhas</b><br>"
+            + "<br>".join(textos[inicio:fim])
+            + (f"<br><i>... e mais {n - max_textos}</i>" if n > max_textos else "")
+        )
+
+    locais = pd.DataFrame(
+        {
+            "cep": primeiras["cep"].to_numpy(),
+            "grupo": primeiras["grupo"].to_numpy(),
+            "latitude": primeiras["latitude"].to_numpy(),
+            "longitude": primeiras["longitude"].to_numpy(),
+            "icon": estilos["icon"].to_numpy(),
+            "color": estilos["color"].to_numpy(),
+            "texto": primeiras["texto"].to_numpy(),
+            "quantidade": quantidade,
+            "popup": popups,
+        }
+    )
+
+    logger.info(
+        f"Agrupamento por local: {len(pontos)} linhas localizadas em {len(locais)} marcadores"
+    )
+
+    return pd.concat([locais, sem_localizacao], ignore_index=True)
+
+
+def adicionar_marcadores(mapa, dataframe):
+    """
+    Função que adiciona um objeto Marker (folium) por linha, em um MarkerCluster por grupo.
+
+    Returns:
+        int: Quantidade de linhas que não foram adicionadas ao mapa (sem coordenadas)
+    """
+
+    sem_localizacao = []
+
+    for grupo, group_data in dataframe.groupby("grupo", observed=True):
+        mark_cluster = MarkerCluster(name=grupo).add_to(mapa)
+        for (_, row), texto in zip(group_data.iterrows(), _popups(group_data)):
+            try:
+                cep = row["cep"]
+                lat = row["latitude"]
+                lng = row["longitude"]
+
+                icon = str(row["icon"]) if pd.notna(row["icon"]) else ICON_PADRAO
+                color = str(row["color"]) if pd.notna(row["color"]) else COLOR_PADRAO
+
+                if pd.notna(lat) and pd.notna(lng):
+                    Marker(
+                        location=(round(float(lat), 6), round(float(lng), 6)),
+                        popup=texto,
+                        # tooltip  = texto,
+                        icon=Icon(
+                            prefix="fa",
+                            icon=icon,
+                            color=color,
+                        ),
+                    ).add_to(mark_cluster)
+                else:
+                    sem_localizacao.append(cep)
+            except Exception as e:
+                logger.exception(e)
+                logger.error(f"Erro ao tentar adicionar marcador ao mapa: {cep}")
+
+    _avisar_sem_localizacao(sem_localizacao)
+    return len(sem_localizacao)
+
+
+def _textos(dataframe):
+    # Texto de cada linha (ou o CEP, na falta dele), interpretado como HTML (ex.: links, <br>) em todos os modos; com
+    # MAPA_ESCAPAR_TEXTO, o conteúdo das células é mostrado como texto, também em todos os modos
+    textos = _com_padrao(dataframe["texto"], dataframe["cep"].astype(object))
+    textos = textos.astype(str)
+    return textos.map(html.escape) if MAPA_ESCAPAR_TEXTO else textos
+
+
+def _popups(dataframe):
+    # Popup (HTML) de cada linha: o texto ou, nos locais agrupados (agrupar_locais), o popup já montado
+    popups = _textos(dataframe)
+    if "popup" in dataframe:
+        agrupados = dataframe["popup"].notna()
+        popups[agrupados] = dataframe["popup"][agrupados]
+    return popups
+
+
+def _avisar_sem_localizacao(ceps, exemplos=20):
+    # Um único aviso por mapa (e não um por linha), com os primeiros CEPs:
+    if len(ceps):
+        logger.warning(
+            "%d CEPs sem localização: %s%s",
+            len(ceps),
+            ", ".join(map(str, ceps[:exemplos])),
+            " ..." if len(ceps) > exemplos else "",
+        )
+
+
+def adicionar_marcadores_rapidos(mapa, dataframe):
+    """
+    Função que adiciona os marcadores de cada grupo como um único array compacto (FastMarkerCluster).
+
+    Os marcadores são criados no navegador por um callback que respeita "icon", "color" e "texto" de cada linha;
+    os pares (icon, color) são enviados uma única vez por grupo e cada linha guarda apenas o índice do seu estilo.
+
+    Returns:
+        int: Quantidade de linhas que não foram adicionadas ao mapa (sem coordenadas)
+    """
+
+    pontos, cnt_not_marked = _pontos(dataframe)
+
+    for grupo, group_data in pontos.groupby("grupo", observed=True):
+        # Estilos únicos do grupo (icon, color) e o índice de cada linha:
+        codigos, estilos = pd.MultiIndex.from_frame(
+            group_data[["icon", "color"]]
+        ).factorize()
+
+        data = list(
+            zip(
+                group_data["latitude"].tolist(),
+                group_data["longitude"].tolist(),
+                codigos.tolist(),
+                group_data["texto"].tolist(),
+            )
+        )
+
+        FastMarkerCluster(
+            data,
+            callback=_FAST_MARKER_CALLBACK % json.dumps(list(estilos)),
+            name=grupo,
+            chunkedLoading=True,
+        ).add_to(mapa)
+
+    return cnt_not_marked
+
+
+def _pontos(dataframe):
+    # Linhas com coordenadas, com ícone/cor padrão e o popup (HTML) de cada uma, e a quantidade de linhas sem
+    # coordenadas:
+    latitudes, longitudes = _coordenadas(dataframe)
+    localizados = latitudes.notna() & longitudes.notna()
+
+    cnt_not_marked = int((~localizados).sum())
+    _avisar_sem_localizacao(dataframe.loc[~localizados, "cep"].to_numpy())
+
+    pontos = pd.DataFrame(
+        {
+            "grupo": dataframe["grupo"],
+            "latitude": latitudes,
+            "longitude": longitudes,
+            "icon": _com_padrao(dataframe["icon"], ICON_PADRAO),
+            "color": _com_padrao(dataframe["color"], COLOR_PADRAO),
+            "texto": _popups(dataframe),
+        }
+    )[localizados]
+    pontos["icon"] = pontos["icon"].astype(str)
+    pontos["color"] = pontos["color"].astype(str)
+
+    return pontos, cnt_not_marked
+
+
+def adicionar_blocos(mapa, dataframe, zoom=MAPA_BLOCOS_ZOOM):
+    """
+    Função que adiciona os marcadores sem colocá-los no HTML: os pontos são divididos em blocos GeoJSON, um por tile
+    do zoom "zoom" (ver blocos.montar_blocos), gravados por salvar_mapa ao lado do HTML. O HTML guarda apenas um
+    índice dos blocos (quantidade de linhas e centro de cada um) e, no navegador, carrega os blocos que cruzam a área
+    visível a partir desse zoom; abaixo dele, mostra um círculo por bloco.
+
+    Os blocos são baixados com fetch(), então o mapa precisa ser aberto por um servidor HTTP (não como arquivo local).
+
+    Returns:
+        int: Quantidade de linhas que não foram adicionadas ao mapa (sem coordenadas)
+    """
+
+    pontos, cnt_not_marked = _pontos(dataframe)
+
+    codigos_grupos, grupos = pd.factorize(
+        pontos["grupo"].to_numpy(), use_na_sentinel=False
+    )
+    codigos_estilos, estilos = pd.MultiIndex.from_frame(
+        pontos[["icon", "color"]]
+    ).factorize()
+
+    blocos, indice = montar_blocos(
+        pontos["latitude"].to_numpy(),
+        pontos["longitude"].to_numpy(),
+        codigos_grupos,
+        codigos_estilos,
+        pontos["texto"].to_numpy(dtype=object),
+        zoom,
+    )
+
+    # Uma camada (vazia no HTML) por grupo, preenchida no navegador:
+    camadas = [
+        MarkerCluster(
+            name="-" if pd.isna(grupo) else str(grupo), chunkedLoading=True
+        ).add_to(mapa)
+        for grupo in grupos
+    ]
+    CarregadorBlocos(
+        camadas, [list(estilo) for estilo in estilos], indice, blocos, zoom
+    ).add_to(mapa)
+
+    logger.info(f"Blocos: {len(pontos)} linhas em {len(blocos)} blocos (zoom {zoom})")
+
+    return cnt_not_marked
+
+
+def adicionar_densidade(
+    mapa,
+    dataframe,
+    tamanho=None,
+    forma=DENSIDADE_FORMA,
+    por_grupo=DENSIDADE_POR_GRUPO,
+):
+    """
+    Função que adiciona, no lugar dos marcadores, uma camada com a quantidade de linhas por célula de uma grade
+    (quadrada ou hexagonal), com uma cor por faixa de contagem e a legenda correspondente.
+
+    O tamanho do HTML e o tempo de geração dependem da quantidade de células ocupadas, não da quantidade de linhas.
+
+    Args:
+        tamanho (float): Tamanho da célula em graus; padrão é densidade.tamanho_celula()
+        forma (str): "quadrado" ou "hexagono"
+        por_grupo (bool): Uma camada por grupo (com contagens separadas) ou uma única camada
+
+    Returns:
+        int: Quantidade de linhas que não foram adicionadas ao mapa (sem coordenadas)
+    """
+
+    tamanho = tamanho or tamanho_celula()
+
+    latitudes = pd.to_numeric(dataframe["latitude"], errors="coerce")
+    longitudes = pd.to_numeric(dataframe["longitude"], errors="coerce")
+    localizados = (latitudes.notna() & longitudes.notna()).to_numpy()
+
+    cnt_not_marked = int((~localizados).sum())
+    if not localizados.any():
+        return cnt_not_marked
+
+    if por_grupo:
+        codigos, grupos = pd.factorize(
+            dataframe["grupo"][localizados], use_na_sentinel=False
+        )
+        grupos = ["-" if pd.isna(grupo) else str(grupo) for grupo in grupos]
+    else:
+        codigos, grupos = None, ["Densidade"]
+
+    chaves, lats, lngs, contagens = agregar(
+        latitudes.to_numpy()[localizados],
+        longitudes.to_numpy()[localizados],
+        tamanho,
+        forma,
+        codigos,
+    )
+    vertices = poligonos(lats, lngs, tamanho, forma)
+
+    # Faixas de contagem em escala logarítmica (poucas células concentram muitas linhas):
+    limites = np.unique(np.geomspace(1, contagens.max() + 1, 8).astype(int))
+    if len(limites) < 2:
+        limites = np.array([1, 2])
+    classes = np.searchsorted(limites, contagens, side="right") - 1
+    cores = [
+        "#{:02x}{:02x}{:02x}".format(*(round(canal * 255) for canal in cor[:3]))
+        for cor in linear.YlOrRd_09.scale(0, 1).to_step(len(limites) - 1).colors
+    ]
+    estilos = [
+        {"fillColor": cor, "color": cor, "weight": 0.5, "fillOpacity": 0.6}
+        for cor in cores
+    ]
+
+    for chave, grupo in enumerate(grupos):
+        selecionadas = np.flatnonzero(chaves == chave)
+        if not len(selecionadas):
+            continue
+
+        GeoJson(
+            {
+                "type": "FeatureCollection",
+                "features": [
+                    {
+                        "type": "Feature",
+                        "id": int(i),
+                        "properties": {
+                            "linhas": int(contagens[i]),
+                            "classe": int(classes[i]),
+                        },
+                        "geometry": {
+                            "type": "Polygon",
+                            "coordinates": [vertices[i].tolist()],
+                        },
+                    }
+                    for i in selecionadas
+                ],
+            },
+            name=grupo,
+            style_function=lambda feature: estilos[feature["properties"]["classe"]],
+            tooltip=GeoJsonTooltip(fields=["linhas"], aliases=["Linhas:"]),
+        ).add_to(mapa)
+
+    StepColormap(
+        cores,
+        index=limites.tolist(),
+        vmin=int(limites[0]),
+        vmax=int(limites[-1]),
+        caption="Linhas por célula",
+    ).add_to(mapa)
+
+    logger.info(
+        f"Densidade: {int(localizados.sum())} linhas em {len(contagens)} células ({forma}, {tamanho:.4f} graus)"
+    )
+
+    return cnt_not_marked
+
+
+def salvar_mapa(
+    mapa, filename=None, comprimir_arquivos=MAPA_COMPRIMIR, contadores=None
+):
+    """
+    Função que salva o mapa em um arquivo HTML (no modo "blocos", também os blocos de pontos, em
+    "<nome>.blocos/" ao lado do HTML).
+
+    Args:
+        mapa (folium.Map): Mapa a ser salvo
+        filename (str): Caminho do arquivo HTML; padrão é "mapas/<data-hora>.html"
+        comprimir_arquivos (bool): Gravar também as versões .gz/.br do HTML e dos blocos (ver compressao.comprimir)
+        contadores (dict): Dicionário onde são registrados os tamanhos do HTML e dos blocos [opcional]
+
+    Returns:
+        str: Caminho do arquivo salvo
+    """
+
+    if not filename:
+        filename = f"mapas/{datetime.now():%Y-%m-%d-%H-%M-%S}.html"
+
+    tamanhos = {}
+    for elemento in mapa._children.values():
+        if isinstance(elemento, CarregadorBlocos):
+            diretorio = Path(filename).with_name(
+                f"{Path(filename).stem}{SUFIXO_DIRETORIO}"
+            )
+            elemento.url = f"{quote(diretorio.name)}/"
+            tamanhos.update(
+                salvar_blocos(elemento.blocos, diretorio, comprimir_arquivos)
+            )
+
+    mapa.save(filename)
+    tamanhos["html_bytes"] = os.path.getsize(filename)
+    if comprimir_arquivos:
+        tamanhos["html_comprimido_bytes"] = comprimir(filename)
+    logger.info(f"Mapa salvo em {filename} ({tamanhos['html_bytes'] / 1e6:.1f} MB)")
+
+    if contadores is not None:
+        contadores.update(tamanhos)
+
+    return filename
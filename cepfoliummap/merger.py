@@ -0,0 +1,250 @@
+"""
+Consolidação dos arquivos de resultados (consultas/*.json) em um único arquivo:
+
+    python -m cepfoliummap.merger consultas/*.json --saida consultas/consolidado.json --remover
+"""
+
+import argparse
+import csv
+import glob
+import json
+import logging
+import os
+import sys
+from dataclasses import dataclass, field
+
+from cepfoliummap.cache import get_coordinates, iter_json_results
+from cepfoliummap.cep import normalize_cep
+from cepfoliummap.config import initial_config
+from cepfoliummap.constants import MERGE_SAIDA, MERGE_TOLERANCIA
+
+logger = logging.getLogger(__name__)
+
+SAIDA_PADRAO = MERGE_SAIDA
+
+
+@dataclass
+class MergeReport:
+    """
+    Resumo de uma consolidação.
+    """
+
+    saida: str
+    arquivos: int = 0
+    erros: list = field(default_factory=list)
+    registros: int = 0
+    ignorados: int = 0
+    ceps: int = 0
+    com_coordenadas: int = 0
+    substituidos: int = 0
+    # (cep, arquivo, latitude, longitude, arquivo, latitude, longitude):
+    conflitos: list = field(default_factory=list)
+
+    def resumo(self):
+        return (
+            f"{self.arquivos} arquivos, {self.registros} registros -> {self.ceps} CEPs "
+            f"({self.com_coordenadas} com coordenadas) em {self.saida} | "
+            f"{self.substituidos} substituídos, {len(self.conflitos)} conflitos, "
+            f"{self.ignorados} CEPs inválidos, {len(self.erros)} arquivos com erro"
+        )
+
+
+def merge_results(arquivos, saida=SAIDA_PADRAO, tolerancia=MERGE_TOLERANCIA):
+    """
+    Função que consolida vários arquivos JSON no padrão da BrasilAPI ({cep: resultado}) em um único arquivo.
+
+    Os arquivos são lidos aos poucos (um registro por vez) e apenas o melhor registro de cada CEP é mantido:
+    com coordenadas vence sem coordenadas e, depois, o mais recente (data de modificação do arquivo; em caso de
+    empate, o arquivo informado por último) vence o mais antigo. A memória usada depende da quantidade de CEPs
+    únicos, não do tamanho dos arquivos.
+
+    Um conflito é registrado quando dois registros do mesmo CEP têm coordenadas que diferem mais que "tolerancia"
+    (em graus).
+
+    Args:
+        arquivos (list): Arquivos JSON a serem consolidados
+        saida (str): Arquivo JSON consolidado
+        tolerancia (float): Diferença máxima (em graus) entre coordenadas do mesmo CEP
+
+    Returns:
+        MergeReport
+    """
+
+    report = MergeReport(saida)
+
+    # cep -> (chave de prioridade, latitude, longitude, índice do arquivo, resultado serializado)
+    melhores = {}
+
+    for ordem, arquivo in enumerate(arquivos):
+        try:
+            modificado = os.path.getmtime(arquivo)
+            for cep, result in iter_json_results(arquivo):
+                report.registros += 1
+
+                normalizado = normalize_cep(cep)
+                if not normalizado:
+                    report.ignorados += 1
+                    continue
+
+                lat, lng = get_coordinates(result)
+                prioridade = (lat is not None and lng is not None, modificado, ordem)
+
+                atual = melhores.get(normalizado)
+                if atual is not None:
+                    _, lat_atual, lng_atual, ordem_atual, _ = atual
+                    if (
+                        prioridade[0]
+                        and lat_atual is not None
+                        and (
+                            abs(lat - lat_atual) > tolerancia
+                            or abs(lng - lng_atual) > tolerancia
+                        )
+                    ):
+                        report.conflitos.append(
+                            (
+                                normalizado,
+                                arquivos[ordem_atual],
+                                lat_atual,
+                                lng_atual,
+                                arquivo,
+                                lat,
+                                lng,
+                            )
+                        )
+
+                    if prioridade < atual[0]:
+                        continue
+                    report.substituidos += 1
+
+                melhores[normalizado] = (
+                    prioridade,
+                    lat,
+                    lng,
+                    ordem,
+                    json.dumps(result, ensure_ascii=False),
+                )
+        except (OSError, ValueError) as e:
+            logger.error(f"Erro ao ler {arquivo}: {e}")
+            report.erros.append(arquivo)
+            continue
+
+        report.arquivos += 1
+        logger.info(f"{arquivo}: {len(melhores)} CEPs únicos até aqui")
+
+    # Gravando o arquivo consolidado (temporário + renomeação, a saída pode ser também uma das entradas):
+    temporario = f"{saida}.tmp"
+    with open(temporario, "w", encoding="utf8") as file:
+        file.write("{")
+        for i, cep in enumerate(sorted(melhores)):
+            prioridade, *_, payload = melhores[cep]
+            if i:
+                file.write(", ")
+            file.write(f"{json.dumps(cep)}: {payload}")
+            report.com_coordenadas += prioridade[0]
+        file.write("}")
+    os.replace(temporario, saida)
+
+    report.ceps = len(melhores)
+    logger.info(report.resumo())
+
+    return report
+
+
+def export_conflicts(report, filename):
+    """
+    Função que grava os conflitos de uma consolidação em um arquivo CSV.
+    """
+
+    with open(filename, "w", encoding="utf8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(
+            [
+                "cep",
+                "arquivo_a",
+                "latitude_a",
+                "longitude_a",
+                "arquivo_b",
+                "latitude_b",
+                "longitude_b",
+            ]
+        )
+        writer.writerows(report.conflitos)
+
+
+def remove_merged(report, arquivos):
+    """
+    Função que remove os arquivos consolidados com sucesso (nunca o próprio arquivo de saída).
+
+    Returns:
+        int: Quantidade de arquivos removidos
+    """
+
+    saida = os.path.abspath(report.saida)
+
+    removidos = 0
+    for arquivo in arquivos:
+        if arquivo in report.erros or os.path.abspath(arquivo) == saida:
+            continue
+        os.remove(arquivo)
+        removidos += 1
+
+    logger.info(f"{removidos} arquivos consolidados foram removidos")
+
+    return removidos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m cepfoliummap.merger",
+        description="Consolida arquivos de resultados (JSON no padrão da BrasilAPI) em um único arquivo.",
+    )
+    parser.add_argument(
+        "arquivos",
+        nargs="*",
+        help="Arquivos JSON a serem consolidados (padrão: consultas/*.json)",
+    )
+    parser.add_argument(
+        "-o",
+        "--saida",
+        default=SAIDA_PADRAO,
+        help=f"Arquivo consolidado (padrão: {SAIDA_PADRAO})",
+    )
+    parser.add_argument(
+        "--conflitos", help="Arquivo CSV onde os conflitos são gravados"
+    )
+    parser.add_argument(
+        "--tolerancia",
+        type=float,
+        default=MERGE_TOLERANCIA,
+        help=f"Diferença (em graus) a partir da qual coordenadas do mesmo CEP são um conflito (padrão: {MERGE_TOLERANCIA})",
+    )
+    parser.add_argument(
+        "--remover",
+        action="store_true",
+        help="Remover os arquivos consolidados (exceto a saída) ao final",
+    )
+    args = parser.parse_args(argv)
+
+    # Configurações iniciais:
+    initial_config()
+
+    arquivos = args.arquivos or sorted(glob.glob("consultas/*.json"))
+    if not arquivos:
+        parser.error("nenhum arquivo para consolidar")
+
+    report = merge_results(arquivos, args.saida, args.tolerancia)
+    print(report.resumo())
+
+    for conflito in report.conflitos[:20]:
+        print("Conflito: {} | {}: ({}, {}) x {}: ({}, {})".format(*conflito))
+    if args.conflitos:
+        export_conflicts(report, args.conflitos)
+
+    if args.remover:
+        remove_merged(report, arquivos)
+
+    return 1 if report.erros else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,298 @@
+"""
+Mapa dividido em partes (um arquivo HTML por "grupo" ou por UF) e uma página índice com links, contagens e limites.
+
+As partes são renderizadas em paralelo (processos) e, nas execuções seguintes no mesmo diretório, apenas as partes
+cujas linhas mudaram são renderizadas novamente (o resumo de cada parte fica em "particoes.json").
+"""
+
+import hashlib
+import html
+import json
+import logging
+import multiprocessing
+import os
+import re
+import shutil
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from cepfoliummap.blocos import SUFIXO_DIRETORIO
+from cepfoliummap.cep import ufs_from_ceps
+from cepfoliummap.compressao import remover
+from cepfoliummap.constants import (
+    MAPA_AGRUPAR_LOCAIS,
+    MAPA_ESCAPAR_TEXTO,
+    MAPA_MODO,
+    MAPA_PARTICOES,
+    PARTICOES_PROCESSOS,
+)
+
+logger = logging.getLogger(__name__)
+
+PARTICIONAR_GRUPO, PARTICIONAR_UF = MAPA_PARTICOES
+
+MANIFESTO = "particoes.json"
+INDICE = "index.html"
+SEM_UF = "Sem UF"
+
+# Alterar quando o HTML gerado mudar, para que todas as partes sejam renderizadas novamente:
+_VERSAO = 3
+
+
+def atribuir_ufs(dataframe, api_results):
+    """
+    Função que identifica a UF de cada linha: "state" do resultado da BrasilAPI ou, na falta dele, a faixa do CEP.
+
+    Args:
+        dataframe (pd.DataFrame): DataFrame com a coluna "cep"
+        api_results (dict): Dicionário {cep: resultado no padrão da BrasilAPI}
+
+    Returns:
+        pd.Series: UF de cada linha ("Sem UF" quando não identificada)
+    """
+
+    estados = pd.Series(
+        {cep: result.get("state") for cep, result in api_results.items() if result},
+        dtype=object,
+    )
+    ufs = dataframe["cep"].map(estados).astype(object)
+
+    faltantes = ufs.isna().to_numpy()
+    if faltantes.any():
+        ufs[faltantes] = ufs_from_ceps(dataframe.loc[faltantes, "cep"])
+
+    return ufs.fillna(SEM_UF)
+
+
+def _slug(nome):
+    texto = unicodedata.normalize("NFKD", str(nome)).encode("ascii", "ignore").decode()
+    return re.sub(r"[^A-Za-z0-9]+", "-", texto).strip("-").lower() or "particao"
+
+
+def _hash(dataframe, modo_mapa, agrupar):
+    conteudo = hashlib.sha1(
+        f"{_VERSAO}:{modo_mapa}:{agrupar}:{MAPA_ESCAPAR_TEXTO}".encode()
+    )
+    conteudo.update(
+        pd.util.hash_pandas_object(dataframe, index=False).to_numpy().tobytes()
+    )
+    conteudo.update(",".join(dataframe.columns).encode())
+    return conteudo.hexdigest()
+
+
+def _limites(dataframe):
+    latitudes = pd.to_numeric(dataframe["latitude"], errors="coerce")
+    longitudes = pd.to_numeric(dataframe["longitude"], errors="coerce")
+    localizados = latitudes.notna() & longitudes.notna()
+
+    if not localizados.any():
+        return 0, None
+
+    latitudes, longitudes = latitudes[localizados], longitudes[localizados]
+    return int(localizados.sum()), [
+        [round(float(latitudes.min()), 6), round(float(longitudes.min()), 6)],
+        [round(float(latitudes.max()), 6), round(float(longitudes.max()), 6)],
+    ]
+
+
+def _renderizar(dataframe, modo_mapa, agrupar, filename):
+    # Executado em um processo separado (o folium só é importado onde é usado):
+    from cepfoliummap.mapa import gerar_mapa, salvar_mapa
+
+    contadores = {}
+    salvar_mapa(gerar_mapa(dataframe, modo_mapa, contadores, agrupar), filename)
+    return contadores
+
+
+def salvar_particoes(
+    dataframe,
+    diretorio,
+    coluna,
+    modo_mapa=MAPA_MODO,
+    processos=PARTICOES_PROCESSOS,
+    contadores=None,
+    agrupar=MAPA_AGRUPAR_LOCAIS,
+):
+    """
+    Função que gera um mapa por valor de "coluna" e uma página índice ("index.html") no diretório informado.
+
+    Args:
+        dataframe (pd.DataFrame): Resultado de populate_dataframe_coordinates (com a coluna de partição)
+        diretorio (str): Diretório das partes; reutilizá-lo permite pular as partes que não mudaram
+        coluna (str): Coluna usada na divisão ("grupo" ou "uf")
+        modo_mapa (str): Modo de geração dos marcadores de cada parte (ver mapa.gerar_mapa)
+        processos (int): Processos usados na renderização; 0 usa todos os processadores
+        contadores (dict): Dicionário onde são registrados os contadores das partes (relatório) [opcional]
+        agrupar (bool): Um único marcador por local em cada parte (ver mapa.agrupar_locais)
+
+    Returns:
+        str: Caminho da página índice
+    """
+
+    diretorio = Path(diretorio)
+    diretorio.mkdir(parents=True, exist_ok=True)
+
+    manifesto_path = diretorio / MANIFESTO
+    try:
+        anteriores = json.loads(manifesto_path.read_text(encoding="utf8"))["particoes"]
+    except (OSError, ValueError, KeyError):
+        anteriores = {}
+
+    # Resumo de cada parte e as que precisam ser renderizadas:
+    particoes = {}
+    pendentes = []
+    arquivos = set()
+    for nome, parte in dataframe.groupby(
+        coluna, sort=True, dropna=False, observed=True
+    ):
+        nome = "-" if pd.isna(nome) else str(nome)
+
+        # Nomes diferentes podem gerar o mesmo arquivo (ex.: "São Paulo" e "Sao Paulo"):
+        arquivo, sufixo = f"{_slug(nome)}.html", 1
+        while arquivo in arquivos:
+            arquivo, sufixo = f"{_slug(nome)}-{sufixo}.html", sufixo + 1
+        arquivos.add(arquivo)
+
+        localizados, limites = _limites(parte)
+        resumo = {
+            "arquivo": arquivo,
+            "hash": _hash(parte, modo_mapa, agrupar),
+            "linhas": len(parte),
+            "localizados": localizados,
+            "limites": limites,
+        }
+        particoes[nome] = resumo
+
+        anterior = anteriores.get(nome, {})
+        if (
+            anterior.get("hash") != resumo["hash"]
+            or anterior.get("arquivo") != arquivo
+            or not (diretorio / arquivo).exists()
+        ):
+            pendentes.append((nome, parte))
+
+    logger.info(
+        f"Mapa particionado por {coluna}: {len(particoes)} partes, {len(pendentes)} a renderizar em {diretorio}"
+    )
+
+    # Renderizando (em paralelo quando houver mais de uma parte):
+    processos = min(processos or os.cpu_count() or 1, len(pendentes))
+    resultados = []
+    if processos > 1:
+        # "spawn": o processo atual pode ter threads (interface gráfica, event loop) e "fork" não é seguro
+        with ProcessPoolExecutor(
+            max_workers=processos, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            futures = [
+                executor.submit(
+                    _renderizar,
+                    parte,
+                    modo_mapa,
+                    agrupar,
+                    str(diretorio / particoes[nome]["arquivo"]),
+                )
+                for nome, parte in pendentes
+            ]
+            resultados = [future.result() for future in futures]
+    else:
+        resultados = [
+            _renderizar(
+                parte, modo_mapa, agrupar, str(diretorio / particoes[nome]["arquivo"])
+            )
+            for nome, parte in pendentes
+        ]
+
+    for (nome, _), resultado in zip(pendentes, resultados):
+        particoes[nome]["nao_marcados"] = resultado.get("nao_marcados", 0)
+    for nome, resumo in particoes.items():
+        if "nao_marcados" not in resumo:
+            resumo["nao_marcados"] = anteriores[nome].get("nao_marcados", 0)
+
+    # Partes que deixaram de existir:
+    for nome, anterior in anteriores.items():
+        if anterior.get("arquivo") not in arquivos:
+            arquivo = diretorio / anterior["arquivo"]
+            remover(arquivo)
+            shutil.rmtree(
+                arquivo.with_name(f"{arquivo.stem}{SUFIXO_DIRETORIO}"),
+                ignore_errors=True,
+            )
+
+    manifesto_path.write_text(
+        json.dumps(
+            {"versao": _VERSAO, "coluna": coluna, "particoes": particoes},
+            ensure_ascii=False,
+            indent=2,
+        ),
+        encoding="utf8",
+    )
+    indice = salvar_indice(particoes, diretorio / INDICE, coluna)
+
+    if contadores is not None:
+        contadores["particoes"] = len(particoes)
+        contadores["particoes_renderizadas"] = len(pendentes)
+        contadores["nao_marcados"] = sum(
+            resumo["nao_marcados"] for resumo in particoes.values()
+        )
+
+    return indice
+
+
+def salvar_indice(particoes, filename, coluna):
+    """
+    Função que grava a página índice: uma tabela (HTML estático, sem dependências) com link, linhas, linhas
+    localizadas e limites (sudoeste/nordeste) de cada parte.
+    """
+
+    linhas = []
+    for nome, resumo in particoes.items():
+        limites = resumo["limites"]
+        linhas.append(
+            "<tr>"
+            f'<td><a href="{html.escape(resumo["arquivo"])}">{html.escape(nome)}</a></td>'
+            f'<td class="n">{resumo["linhas"]}</td>'
+            f'<td class="n">{resumo["localizados"]}</td>'
+            f'<td class="n">{resumo["nao_marcados"]}</td>'
+            + (
+                f"<td>({limites[0][0]:.4f}, {limites[0][1]:.4f}) &ndash; ({limites[1][0]:.4f}, {limites[1][1]:.4f})</td>"
+                if limites
+                else "<td>-</td>"
+            )
+            + "</tr>"
+        )
+
+    total = sum(resumo["linhas"] for resumo in particoes.values())
+    tabela = "\n".join(linhas)
+    Path(filename).write_text(
+        f"""<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+<meta charset="utf-8">
+<title>CepFoliumMap - {html.escape(coluna)}</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; }}
+table {{ border-collapse: collapse; }}
+th, td {{ border-bottom: 1px solid #ddd; padding: 4px 12px; text-align: left; }}
+td.n {{ text-align: right; }}
+</style>
+</head>
+<body>
+<h1>Mapas por {html.escape(coluna)}</h1>
+<p>{len(particoes)} partes, {total} linhas | gerado em {datetime.now():%Y-%m-%d %H:%M:%S}</p>
+<table>
+<tr><th>{html.escape(coluna)}</th><th>linhas</th><th>localizadas</th><th>sem localização</th><th>limites (SO &ndash; NE)</th></tr>
+{tabela}
+</table>
+</body>
+</html>
+""",
+        encoding="utf8",
+    )
+
+    logger.info(f"Índice dos mapas salvo em {filename}")
+
+    return str(filename)
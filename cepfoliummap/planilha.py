@@ -0,0 +1,237 @@
+import csv
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from cepfoliummap.cep import ceps_categoricos, ceps_to_int, validate_ceps
+from cepfoliummap.constants import CSV_CHUNKSIZE
+
+logger = logging.getLogger(__name__)
+
+COLUNAS = ["cep", "grupo", "latitude", "longitude", "icon", "color", "texto"]
+FORMATOS = (".xls", ".xlsx", ".csv", ".parquet")
+
+# Colunas de texto lidas sem inferência de tipo (CEPs preservam zeros à esquerda):
+_DTYPES = {
+    "cep": "string",
+    "grupo": "string",
+    "icon": "string",
+    "color": "string",
+    "texto": "string",
+}
+# Colunas guardadas de forma compacta após a leitura: poucos valores distintos viram categorias e as coordenadas,
+# float32 (precisão abaixo de 1 metro):
+_CATEGORIAS = ("grupo", "icon", "color")
+_COORDENADAS = ("latitude", "longitude")
+
+
+def get_dataframe(filename, rejeitados=None):
+    """
+    Função que lê uma planilha (.xls, .xlsx, .csv ou .parquet) e retorna um DataFrame com as colunas "cep", "grupo", "latitude", "longitude", "icon", "color" e "texto".
+
+    Apenas as colunas necessárias são lidas; CEPs são normalizados (8 dígitos) e linhas sem CEP válido (ver
+    cep.validate_ceps) são removidas, sem nunca chegar às APIs. Para planilhas com milhões de linhas, as colunas
+    são compactas: "cep", "grupo", "icon" e "color" são categóricas e "latitude"/"longitude" são float32.
+
+    Args:
+        filename (str): Caminho da planilha
+        rejeitados (list): Lista onde são acrescentadas as linhas removidas (DataFrames com "linha", "cep",
+            "motivo", "grupo" e "texto"), para salvar_rejeitados [opcional]
+
+    Returns:
+        pd.DataFrame
+    """
+
+    extensao = Path(filename).suffix.lower()
+    if extensao == ".csv":
+        dataframe = read_csv(filename, rejeitados=rejeitados)
+    elif extensao == ".parquet":
+        dataframe = read_parquet(filename, rejeitados)
+    elif extensao in (".xls", ".xlsx"):
+        dataframe = read_excel(filename, rejeitados)
+    else:
+        raise ValueError(
+            f"Formato de planilha não suportado: {filename} ({', '.join(FORMATOS)})"
+        )
+
+    # Verificando se as colunas necessárias existem:
+    if "grupo" not in dataframe.columns:
+        dataframe["grupo"] = pd.Categorical.from_codes(
+            np.zeros(len(dataframe), dtype=np.int8), categories=["-"]
+        )
+    for coluna in COLUNAS:
+        if coluna not in dataframe.columns:
+            dataframe[coluna] = _coluna_vazia(coluna, len(dataframe))
+
+    # CEPs (já validados, como inteiros) -> categorias de 8 dígitos:
+    dataframe["cep"] = ceps_categoricos(dataframe["cep"].to_numpy(), dataframe.index)
+
+    logger.info(f"Planilha {filename}: {len(dataframe)} linhas")
+
+    return dataframe[COLUNAS]
+
+
+def _usecols(coluna):
+    return coluna in COLUNAS
+
+
+def _check_cep(dataframe, filename):
+    if "cep" not in dataframe.columns:
+        raise ValueError(f"A planilha {filename} não possui a coluna 'cep'")
+
+
+def _clean_ceps(dataframe, rejeitados=None):
+    # Normalizando CEPs (uma única operação vetorizada) e removendo as linhas sem CEP válido:
+    numeros = ceps_to_int(dataframe["cep"])
+    motivos = validate_ceps(dataframe["cep"], numeros)
+    invalidos = pd.notna(motivos)
+
+    if invalidos.any():
+        logger.warning(f"{int(invalidos.sum())} linhas sem CEP válido foram ignoradas")
+        if rejeitados is not None:
+            rejeitados.append(
+                pd.DataFrame(
+                    {
+                        # Linha na planilha (1 = cabeçalho):
+                        "linha": dataframe.index[invalidos] + 2,
+                        "cep": dataframe["cep"][invalidos].to_numpy(),
+                        "motivo": motivos[invalidos],
+                        **{
+                            coluna: dataframe[coluna][invalidos].to_numpy()
+                            for coluna in ("grupo", "texto")
+                            if coluna in dataframe.columns
+                        },
+                    }
+                )
+            )
+        dataframe = dataframe[~invalidos].copy()
+        numeros = numeros[~invalidos]
+
+    # Os CEPs seguem como inteiros até o fim da leitura (ver get_dataframe):
+    dataframe["cep"] = numeros.astype(np.uint32)
+
+    return _compactar(dataframe)
+
+
+def _compactar(dataframe):
+    for coluna in _CATEGORIAS:
+        if coluna in dataframe.columns:
+            dataframe[coluna] = dataframe[coluna].astype("category")
+    for coluna in _COORDENADAS:
+        if coluna in dataframe.columns:
+            dataframe[coluna] = pd.to_numeric(
+                dataframe[coluna], errors="coerce"
+            ).astype(np.float32)
+
+    return dataframe
+
+
+def _coluna_vazia(coluna, linhas):
+    if coluna in _COORDENADAS:
+        return np.full(linhas, np.nan, dtype=np.float32)
+    if coluna in _CATEGORIAS:
+        return pd.Categorical.from_codes(
+            np.full(linhas, -1, dtype=np.int8), categories=[]
+        )
+    return None
+
+
+def _concatenar(blocos):
+    # Coluna a coluna: categorias diferentes entre os blocos são unidas (pd.concat as converteria em objetos)
+    colunas = {}
+    for coluna in blocos[0].columns:
+        partes = [bloco[coluna] for bloco in blocos]
+        if isinstance(partes[0].dtype, pd.CategoricalDtype):
+            colunas[coluna] = union_categoricals(partes, ignore_order=True)
+        else:
+            colunas[coluna] = pd.concat(partes, ignore_index=True)
+
+    return pd.DataFrame(colunas)
+
+
+def salvar_rejeitados(rejeitados, filename):
+    """
+    Função que grava em CSV as linhas removidas por get_dataframe (CEPs rejeitados antes de qualquer consulta).
+
+    Args:
+        rejeitados (list): Lista preenchida por get_dataframe
+        filename (str): Caminho do arquivo CSV
+
+    Returns:
+        int: Quantidade de linhas gravadas
+    """
+
+    if not rejeitados:
+        return 0
+
+    dataframe = pd.concat(rejeitados, ignore_index=True)
+    Path(filename).parent.mkdir(parents=True, exist_ok=True)
+    dataframe.to_csv(filename, index=False, encoding="utf-8-sig")
+
+    contagens = dataframe["motivo"].value_counts()
+    logger.info(
+        f"{len(dataframe)} CEPs rejeitados ({', '.join(f'{motivo}: {n}' for motivo, n in contagens.items())}) salvos em {filename}"
+    )
+
+    return len(dataframe)
+
+
+def rejects_path(arquivo_mapa):
+    """
+    Função que retorna o caminho dos CEPs rejeitados de um mapa, ex.: "mapas/planilha.html" -> "mapas/planilha.rejeitados.csv".
+    """
+
+    caminho = Path(arquivo_mapa)
+    return str(caminho.with_name(f"{caminho.stem}.rejeitados.csv"))
+
+
+def read_excel(filename, rejeitados=None):
+    dataframe = pd.read_excel(filename, usecols=_usecols, dtype=_DTYPES)
+    _check_cep(dataframe, filename)
+    return _clean_ceps(dataframe, rejeitados)
+
+
+def read_parquet(filename, rejeitados=None):
+    # Apenas as colunas necessárias que existem no arquivo (requer pyarrow):
+    import pyarrow.parquet
+
+    colunas = pyarrow.parquet.read_schema(filename).names
+    dataframe = pd.read_parquet(filename, columns=[c for c in colunas if _usecols(c)])
+    _check_cep(dataframe, filename)
+    return _clean_ceps(dataframe, rejeitados)
+
+
+def read_csv(filename, chunksize=CSV_CHUNKSIZE, rejeitados=None):
+    """
+    Função que lê um CSV em blocos de "chunksize" linhas, validando os CEPs e compactando as colunas de cada bloco.
+
+    O separador (",", ";" ou tabulação) é detectado a partir do cabeçalho.
+    """
+
+    with open(filename, "r", encoding="utf-8-sig", newline="") as file:
+        cabecalho = file.readline()
+    try:
+        separador = csv.Sniffer().sniff(cabecalho, delimiters=",;\t").delimiter
+    except csv.Error:
+        separador = ","
+
+    blocos = []
+    with pd.read_csv(
+        filename,
+        sep=separador,
+        encoding="utf-8-sig",
+        usecols=_usecols,
+        dtype=_DTYPES,
+        chunksize=chunksize,
+    ) as reader:
+        for bloco in reader:
+            _check_cep(bloco, filename)
+            blocos.append(_clean_ceps(bloco, rejeitados))
+
+    if not blocos:
+        return pd.DataFrame({"cep": np.array([], dtype=np.uint32)})
+
+    return _concatenar(blocos)
@@ -0,0 +1,153 @@
+import logging
+
+import numpy as np
+
+from cepfoliummap.cep import ceps_to_int
+from cepfoliummap.constants import PREFIXO_MIN_PONTOS, PREFIXO_MODOS, PREFIXO_NIVEIS
+
+logger = logging.getLogger(__name__)
+
+MODOS = PREFIXO_MODOS
+MODO_DESLIGADO, MODO_FALLBACK, MODO_ANTES = MODOS
+
+# Precisão (dígitos do CEP) das coordenadas exatas:
+PRECISAO_EXATA = 8
+
+
+class PrefixIndex:
+    """
+    Índice espacial aproximado por prefixo de CEP, montado a partir de resultados já resolvidos.
+
+    Para cada nível (ex.: 5, 4 e 3 primeiros dígitos) guarda os prefixos ordenados (inteiros), o centróide
+    (latitude/longitude médias) e a quantidade de pontos. As consultas de colunas inteiras são vetorizadas com
+    np.searchsorted, do nível mais preciso para o menos preciso.
+    """
+
+    def __init__(self, ceps, latitudes, longitudes, niveis=PREFIXO_NIVEIS):
+        ceps = ceps_to_int(ceps)
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+
+        validos = (ceps >= 0) & np.isfinite(latitudes) & np.isfinite(longitudes)
+        ceps, latitudes, longitudes = (
+            ceps[validos],
+            latitudes[validos],
+            longitudes[validos],
+        )
+
+        self.niveis = {}
+        for nivel in sorted(niveis, reverse=True):
+            prefixos, inverso, contagens = np.unique(
+                ceps // 10 ** (8 - nivel), return_inverse=True, return_counts=True
+            )
+            self.niveis[nivel] = (
+                prefixos,
+                np.bincount(inverso, weights=latitudes) / contagens,
+                np.bincount(inverso, weights=longitudes) / contagens,
+                contagens,
+            )
+
+        logger.info(
+            f"Índice de prefixos: {len(ceps)} CEPs | "
+            + ", ".join(f"{n} dígitos: {len(v[0])}" for n, v in self.niveis.items())
+        )
+
+    @classmethod
+    def from_cache(cls, cache, niveis=PREFIXO_NIVEIS):
+        """
+        Função que monta o índice a partir de todos os CEPs com coordenadas do cache local.
+        """
+
+        return cls(*cache.coordinates(), niveis=niveis)
+
+    def lookup(self, ceps, min_pontos=PREFIXO_MIN_PONTOS):
+        """
+        Função que busca as coordenadas aproximadas de vários CEPs de uma só vez.
+
+        Args:
+            ceps (pd.Series|iterable): CEPs a serem buscados
+            min_pontos (int): Quantidade mínima de pontos conhecidos no prefixo para que o centróide seja usado
+
+        Returns:
+            tuple: (latitudes, longitudes, precisões) como arrays; NaN/0 quando não encontrado
+        """
+
+        ceps = ceps_to_int(ceps)
+
+        latitudes = np.full(len(ceps), np.nan)
+        longitudes = np.full(len(ceps), np.nan)
+        precisoes = np.zeros(len(ceps), dtype=np.int8)
+
+        pendentes = ceps >= 0
+        for nivel, (prefixos, lats, lngs, contagens) in self.niveis.items():
+            if not pendentes.any() or not len(prefixos):
+                break
+
+            buscados = ceps // 10 ** (8 - nivel)
+            posicoes = np.searchsorted(prefixos, buscados)
+            posicoes[posicoes == len(prefixos)] = 0
+
+            encontrados = (
+                pendentes
+                & (prefixos[posicoes] == buscados)
+                & (contagens[posicoes] >= min_pontos)
+            )
+
+            latitudes[encontrados] = lats[posicoes[encontrados]]
+            longitudes[encontrados] = lngs[posicoes[encontrados]]
+            precisoes[encontrados] = nivel
+            pendentes &= ~encontrados
+
+        return latitudes, longitudes, precisoes
+
+
+def aplicar_indice_prefixos(dataframe, indice, nao_encontrados=()):
+    """
+    Função que preenche, com o centróide do prefixo do CEP, as linhas que continuam sem coordenadas.
+
+    A coluna "precisao" registra quantos dígitos do CEP sustentam a coordenada de cada linha: 8 para coordenadas
+    exatas (planilha/API), 5/4/3 para centróides de prefixo e 0 para linhas sem coordenadas. CEPs confirmados como
+    inexistentes continuam sem coordenadas.
+
+    Args:
+        dataframe (pd.DataFrame): Resultado de populate_dataframe_coordinates
+        indice (PrefixIndex): Índice de prefixos
+        nao_encontrados (set): CEPs confirmados como inexistentes pelas APIs (ver cache.is_not_found)
+
+    Returns:
+        pd.DataFrame: O próprio DataFrame, atualizado
+    """
+
+    sem_coordenadas = (
+        dataframe["latitude"].isna() | dataframe["longitude"].isna()
+    ).to_numpy()
+
+    precisao = np.where(sem_coordenadas, 0, PRECISAO_EXATA).astype(np.int8)
+
+    aproximar = sem_coordenadas
+    if len(nao_encontrados):
+        aproximar = aproximar & ~dataframe["cep"].isin(nao_encontrados).to_numpy()
+
+    if aproximar.any():
+        latitudes, longitudes, precisoes = indice.lookup(
+            dataframe.loc[aproximar, "cep"]
+        )
+        encontrados = precisoes > 0
+
+        # Mesmo dtype das colunas (float32, ver planilha.get_dataframe), sem convertê-las:
+        linhas = dataframe.index[aproximar][encontrados]
+        for coluna, valores in (("latitude", latitudes), ("longitude", longitudes)):
+            dataframe.loc[linhas, coluna] = valores[encontrados].astype(
+                dataframe[coluna].dtype
+            )
+        precisao[np.flatnonzero(aproximar)[encontrados]] = precisoes[encontrados]
+
+    if sem_coordenadas.any():
+        logger.info(
+            f"Índice de prefixos: {int((precisao[sem_coordenadas] > 0).sum())} de {int(sem_coordenadas.sum())} linhas sem coordenadas foram aproximadas"
+            f" ({int(sem_coordenadas.sum() - aproximar.sum())} de CEPs inexistentes ignoradas)"
+        )
+
+    dataframe["precisao"] = precisao
+
+    return dataframe
@@ -0,0 +1,231 @@
+"""
+Provedores de CEPs (BrasilAPI v2, BrasilAPI v1 e Geocode) e consultas "hedged" entre eles.
+
+Uma consulta "hedged" começa no primeiro provedor da cadeia; se ele não responder até o percentil HEDGE_PERCENTIL
+das suas latências recentes, uma requisição de reserva é feita ao próximo provedor (sem cancelar a primeira), e
+assim por diante. O atraso conta apenas o tempo da requisição em andamento: a espera por uma vaga no limitador e
+entre novas tentativas não dispara reservas. A primeira resposta com coordenadas vence e as demais requisições são
+canceladas. Falhas passam imediatamente ao próximo provedor. Cada provedor tem o seu limitador e, com ele, o seu
+timeout adaptativo; as versões da BrasilAPI dividem a mesma concorrência e taxa (ver AdaptiveLimiter.orcamento).
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable
+
+from cepfoliummap.brasilapi import buscar_cep
+from cepfoliummap.cache import SOURCE_GEOCODE, get_coordinates, set_coordinates
+from cepfoliummap.constants import (
+    BRASILAPI_URL,
+    BRASILAPI_V1_URL,
+    HEDGE_ATRASO_INICIAL,
+    HEDGE_PERCENTIL,
+)
+from cepfoliummap.geocode import (
+    consume_geocode_api,
+    extract_coordinates_from_json,
+    format_cep,
+)
+
+logger = logging.getLogger(__name__)
+
+PROVEDOR_BRASILAPI = "brasilapi"
+PROVEDOR_BRASILAPI_V1 = "brasilapi_v1"
+PROVEDOR_GEOCODE = "geocode"
+PROVEDORES = (PROVEDOR_BRASILAPI, PROVEDOR_BRASILAPI_V1, PROVEDOR_GEOCODE)
+
+
+@dataclass
+class Provedor:
+    """
+    Uma fonte de resultados no padrão da BrasilAPI.
+
+    "consultar" é uma função assíncrona (client, limiter, cep, ao_enviar=None) que retorna o resultado, um dicionário
+    vazio (CEP não encontrado) ou None (falha após as novas tentativas).
+    """
+
+    nome: str
+    limiter: object
+    consultar: Callable
+
+    def atraso_hedge(self, percentil=HEDGE_PERCENTIL):
+        """
+        Tempo de espera (em segundos) por uma resposta antes da requisição de reserva.
+        """
+
+        atraso = self.limiter.latencias.percentil(percentil)
+        return HEDGE_ATRASO_INICIAL if atraso is None else atraso
+
+
+class _Relogio:
+    """
+    Atraso de uma requisição "hedged": "disparo" é concluído quando a requisição fica em andamento (com a vaga no
+    limitador) por Provedor.atraso_hedge segundos, contados novamente a cada tentativa. Passado como "ao_enviar".
+    """
+
+    def __init__(self, provedor):
+        self.provedor = provedor
+        self.segundos = None
+        self.disparo = asyncio.get_running_loop().create_future()
+        self._handle = None
+
+    def __call__(self, enviando):
+        self.cancelar()
+        if enviando and not self.disparo.done():
+            self.segundos = self.provedor.atraso_hedge()
+            self._handle = asyncio.get_running_loop().call_later(
+                self.segundos, self._disparar
+            )
+
+    def cancelar(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def _disparar(self):
+        self._handle = None
+        if not self.disparo.done():
+            self.disparo.set_result(None)
+
+
+async def consultar_geocode(client, limiter, cep, api_key=None, ao_enviar=None):
+    """
+    Função que consulta o Geocode e retorna o resultado no padrão da BrasilAPI (apenas "cep" e coordenadas).
+    """
+
+    cep_formatado = format_cep(cep)
+    if not cep_formatado:
+        return {}
+
+    response = await consume_geocode_api(
+        client, limiter, cep_formatado, api_key, ao_enviar
+    )
+    if not response:
+        return None
+
+    try:
+        lat, lng = extract_coordinates_from_json(response.json())
+    except Exception as e:
+        logger.warning("Resposta inválida do Geocode para o CEP %s: %s", cep, e)
+        return None
+    if not (lat and lng):
+        return {}
+
+    result = {"cep": cep, "location": {"type": "Point", "coordinates": {}}}
+    set_coordinates(result, lat, lng, SOURCE_GEOCODE)
+    return result
+
+
+def criar_provedores(limiters, api_key=None):
+    """
+    Função que cria os provedores a partir dos limitadores do motor.
+
+    Args:
+        limiters (dict): Dicionário {nome do provedor: AdaptiveLimiter}
+        api_key (str): Chave do Geocode [opcional]
+
+    Returns:
+        dict: Dicionário {nome do provedor: Provedor}
+    """
+
+    consultas = {
+        PROVEDOR_BRASILAPI: partial(buscar_cep, url=BRASILAPI_URL),
+        PROVEDOR_BRASILAPI_V1: partial(buscar_cep, url=BRASILAPI_V1_URL),
+        PROVEDOR_GEOCODE: partial(consultar_geocode, api_key=api_key),
+    }
+
+    return {
+        nome: Provedor(nome, limiters[nome], consultar)
+        for nome, consultar in consultas.items()
+    }
+
+
+async def consultar_com_hedge(client, provedores, cep, contadores=None):
+    """
+    Função que consulta um CEP na cadeia de provedores, com requisições de reserva ("hedged").
+
+    Sem resposta do último provedor iniciado até o seu atraso (Provedor.atraso_hedge, contado a partir do envio da
+    requisição e não da espera no limitador), o próximo da cadeia é consultado em paralelo; após uma falha,
+    imediatamente. A primeira resposta com coordenadas vence e cancela as
+    demais. Respostas sem coordenadas não iniciam novos provedores, mas as requisições em andamento ainda podem
+    trazer coordenadas; ao final, vence a primeira resposta com o CEP encontrado (ou o CEP não encontrado).
+
+    Args:
+        client (httpx.AsyncClient): Cliente HTTP compartilhado pela execução
+        provedores (list): Cadeia de Provedor (o mesmo provedor pode aparecer mais de uma vez)
+        cep (str): CEP a ser consultado
+        contadores (collections.Counter): Contadores "hedges" (requisições de reserva) e "hedges_vencedores"
+            (respostas vencedoras vindas de uma requisição de reserva) [opcional]
+
+    Returns:
+        dict: Resultado no padrão da BrasilAPI, um dicionário vazio caso o CEP não seja encontrado ou None caso
+            todos os provedores falhem
+    """
+
+    proximos = list(provedores)
+    tarefas = {}  # tarefa -> (posição na cadeia, provedor)
+    respondido = None  # Primeira resposta sem coordenadas: (posição, resultado)
+
+    def iniciar():
+        provedor = proximos.pop(0)
+        posicao = len(provedores) - len(proximos) - 1
+        if posicao and contadores is not None:
+            contadores["hedges"] += 1
+        relogio = _Relogio(provedor)
+        tarefa = asyncio.create_task(
+            provedor.consultar(client, provedor.limiter, cep, ao_enviar=relogio)
+        )
+        tarefas[tarefa] = (posicao, relogio)
+        return relogio
+
+    def vencedor(posicao, result):
+        if posicao and contadores is not None:
+            contadores["hedges_vencedores"] += 1
+        return result
+
+    ultimo = iniciar()
+    try:
+        while tarefas:
+            esperar = set(tarefas)
+            if proximos and respondido is None:
+                esperar.add(ultimo.disparo)
+            feitas, _ = await asyncio.wait(esperar, return_when=asyncio.FIRST_COMPLETED)
+
+            # Sem resposta dentro do atraso: requisição de reserva ao próximo provedor
+            if ultimo.disparo in feitas:
+                feitas.discard(ultimo.disparo)
+                if not feitas:
+                    logger.debug(
+                        "CEP %s: sem resposta de %s em %.2fs, consultando %s",
+                        cep,
+                        ultimo.provedor.nome,
+                        ultimo.segundos,
+                        proximos[0].nome,
+                    )
+                    ultimo = iniciar()
+                    continue
+
+            falhas = 0
+            for tarefa in feitas:
+                posicao, _ = tarefas.pop(tarefa)
+                result = tarefa.result()
+
+                if result and get_coordinates(result) != (None, None):
+                    return vencedor(posicao, result)
+                if result is None:
+                    falhas += 1
+                elif respondido is None or (result and not respondido[1]):
+                    respondido = (posicao, result)
+
+            # Falha: próximo provedor, sem esperar o atraso
+            for _ in range(falhas):
+                if proximos and respondido is None:
+                    ultimo = iniciar()
+
+        return vencedor(*respondido) if respondido else None
+    finally:
+        for tarefa, (_, relogio) in tarefas.items():
+            tarefa.cancel()
+            relogio.cancelar()
@@ -0,0 +1,370 @@
+import asyncio
+import contextvars
+import logging
+import random
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+from cepfoliummap.constants import (
+    LATENCIA_JANELA,
+    LATENCIA_MIN_AMOSTRAS,
+    REQUEST_TIMEOUT,
+    RETRY_BACKOFF_BASE,
+    RETRY_BACKOFF_MAX,
+    RETRY_MAX_TENTATIVAS,
+    TIMEOUT_MINIMO,
+    TIMEOUT_MULTIPLICADOR,
+    TIMEOUT_PERCENTIL,
+)
+
+logger = logging.getLogger(__name__)
+
+# Status HTTP tratados como sinal de limitação (throttle) pela API:
+THROTTLE_STATUS = (429, 503)
+
+# Métricas das requisições da execução atual ({AdaptiveLimiter: RequestMetrics}), quando há um relatório: cada execução
+# (RunReport.observar) as define no próprio contexto, herdado pelas tarefas que ela cria (consultas, reservas "hedged").
+# Os limitadores são compartilhados, mas execuções simultâneas do mesmo motor (serviço) não misturam as métricas:
+metricas_execucao = contextvars.ContextVar("metricas_execucao", default=None)
+
+
+class ThrottledError(Exception):
+    """
+    A API sinalizou que as requisições devem diminuir (429, 503 ou corpo de resposta equivalente).
+    """
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TransientError(Exception):
+    """
+    Falha temporária (5xx) que deve ser tentada novamente.
+    """
+
+
+def parse_retry_after(value):
+    """
+    Função que interpreta o cabeçalho "Retry-After" (segundos ou data HTTP).
+
+    Returns:
+        float: Segundos de espera, ou None caso o cabeçalho não exista ou seja inválido
+    """
+
+    if not value:
+        return None
+
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff(tentativa):
+    """
+    Espera exponencial com "full jitter": aleatória entre 0 e min(máximo, base * 2^tentativa).
+    """
+
+    return random.uniform(0, min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * 2**tentativa))
+
+
+class LatencyTracker:
+    """
+    Latências das requisições mais recentes a uma API (janela deslizante), usadas no timeout adaptativo e no atraso
+    das consultas "hedged". Requisições que estouram o timeout entram com o tempo decorrido; canceladas não entram.
+    """
+
+    def __init__(self, janela=LATENCIA_JANELA, min_amostras=LATENCIA_MIN_AMOSTRAS):
+        self.amostras = deque(maxlen=janela)
+        self.min_amostras = min_amostras
+
+    def __len__(self):
+        return len(self.amostras)
+
+    def registrar(self, segundos):
+        self.amostras.append(segundos)
+
+    def percentil(self, p):
+        """
+        Returns:
+            float: Percentil "p" (0 a 100) das latências, ou None enquanto houver menos de "min_amostras" amostras
+        """
+
+        if len(self.amostras) < max(self.min_amostras, 1):
+            return None
+
+        ordenadas = sorted(self.amostras)
+        return ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * p / 100))]
+
+
+class AdaptiveLimiter:
+    """
+    Limitador adaptativo de concorrência e de requisições por segundo para uma API (AIMD).
+
+    A cada resposta saudável a concorrência e a taxa aumentam aos poucos (até os máximos); a cada sinal de limitação
+    (429/503/"Throttled!") ou falha temporária elas são reduzidas pela metade, respeitando o "Retry-After" quando
+    informado. Com "orcamento", a concorrência e a taxa são as de outro limitador (ex.: as versões 1 e 2 da BrasilAPI
+    dividem os mesmos limites), mantendo aqui apenas as estatísticas e as latências (timeout adaptativo). Uso:
+
+        async with limiter:
+            response = await client.get(url)
+    """
+
+    def __init__(
+        self,
+        name,
+        max_at_once,
+        max_per_second,
+        max_at_once_limit=None,
+        max_per_second_limit=None,
+        min_per_second=0.1,
+        orcamento=None,
+    ):
+        self.name = name
+        self.orcamento = orcamento
+        self.max_at_once = float(max_at_once)
+        self.max_per_second = float(max_per_second)
+        self.max_at_once_limit = max(max_at_once_limit or max_at_once, max_at_once)
+        self.max_per_second_limit = max(
+            max_per_second_limit or max_per_second, max_per_second
+        )
+        self.min_per_second = min(min_per_second, max_per_second)
+
+        # Estatísticas:
+        self.sucessos = 0
+        self.throttles = 0
+        self.falhas = 0
+        self.retries = 0
+
+        # Latências recentes (timeout adaptativo e consultas "hedged"):
+        self.latencias = LatencyTracker()
+
+        self._em_uso = 0
+        self._proximo = 0.0
+        self._pausa_ate = 0.0
+        self._ultima_reducao = 0.0
+        self._condition = asyncio.Condition()
+
+    async def __aenter__(self):
+        if self.orcamento is not None:
+            await self.orcamento.__aenter__()
+            return self
+
+        # Concorrência:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._em_uso < int(self.max_at_once))
+            self._em_uso += 1
+
+        # Taxa (um "horário" reservado por requisição):
+        agora = time.monotonic()
+        horario = max(agora, self._proximo, self._pausa_ate)
+        self._proximo = horario + 1 / self.max_per_second
+
+        if horario > agora:
+            try:
+                await asyncio.sleep(horario - agora)
+            except asyncio.CancelledError:
+                # Cancelado (ex.: consulta "hedged" já respondida) antes de entrar no bloco "async with":
+                await self.__aexit__(None, None, None)
+                raise
+
+        return self
+
+    async def __aexit__(self, *exc):
+        if self.orcamento is not None:
+            return await self.orcamento.__aexit__(*exc)
+
+        async with self._condition:
+            self._em_uso -= 1
+            self._condition.notify_all()
+
+    def timeout(self):
+        """
+        Timeout (em segundos) da próxima requisição: TIMEOUT_MULTIPLICADOR vezes o percentil TIMEOUT_PERCENTIL das
+        latências recentes, entre TIMEOUT_MINIMO e REQUEST_TIMEOUT (usado enquanto há poucas amostras).
+        """
+
+        latencia = self.latencias.percentil(TIMEOUT_PERCENTIL)
+        if latencia is None:
+            return REQUEST_TIMEOUT
+        return min(
+            REQUEST_TIMEOUT, max(TIMEOUT_MINIMO, latencia * TIMEOUT_MULTIPLICADOR)
+        )
+
+    def set_limits(self, max_at_once=None, max_per_second=None):
+        """
+        Função que redefine os valores (atuais e máximos) de concorrência e/ou de requisições por segundo.
+        """
+
+        if max_at_once is not None:
+            self.max_at_once = self.max_at_once_limit = float(max_at_once)
+        if max_per_second is not None:
+            self.max_per_second = self.max_per_second_limit = float(max_per_second)
+            self.min_per_second = min(self.min_per_second, self.max_per_second)
+
+    # --------------
+    def success(self):
+        self.sucessos += 1
+        self._limites()._increase()
+
+    def throttled(self, retry_after=None):
+        self.throttles += 1
+        limites = self._limites()
+        limites._decrease()
+
+        if retry_after:
+            limites._pausa_ate = max(limites._pausa_ate, time.monotonic() + retry_after)
+
+        logger.warning(
+            "%s: limitação detectada | %.2f req/s, %d simultâneas%s",
+            self.name,
+            limites.max_per_second,
+            limites.max_at_once,
+            f" | aguardando {retry_after:.0f}s" if retry_after else "",
+        )
+
+    def failure(self):
+        self.falhas += 1
+        self._limites()._decrease()
+
+    def _limites(self):
+        # Limitador que detém a concorrência e a taxa:
+        return self if self.orcamento is None else self.orcamento._limites()
+
+    def _increase(self):
+        # Aumento aditivo (aprox. +1 a cada "janela" de requisições saudáveis):
+        self.max_at_once = min(
+            self.max_at_once_limit, self.max_at_once + 1 / self.max_at_once
+        )
+        self.max_per_second = min(
+            self.max_per_second_limit, self.max_per_second + 1 / self.max_per_second
+        )
+
+    def _decrease(self):
+        # Várias requisições simultâneas recebem o mesmo sinal; apenas uma redução por intervalo:
+        agora = time.monotonic()
+        if agora - self._ultima_reducao < max(1.0, 1 / self.max_per_second):
+            return
+        self._ultima_reducao = agora
+
+        # Redução multiplicativa:
+        self.max_at_once = max(1.0, self.max_at_once / 2)
+        self.max_per_second = max(self.min_per_second, self.max_per_second / 2)
+
+        # A taxa menor vale também para as requisições já agendadas:
+        self._proximo = min(self._proximo, agora) + 1 / self.max_per_second
+
+
+def _registrar(limiter, metricas, status, segundos):
+    limiter.latencias.registrar(segundos)
+    if metricas is not None:
+        metricas.registrar(status, segundos)
+
+
+def _contar(metricas, evento):
+    if metricas is not None:
+        metricas.limitador[evento] += 1
+
+
+async def request_with_retry(limiter, send, descricao="", ao_enviar=None):
+    """
+    Função que executa uma requisição respeitando o limitador e tentando novamente em caso de limitação ou falha
+    temporária, com espera exponencial (com jitter) ou a informada pelo "Retry-After".
+
+    Args:
+        limiter (AdaptiveLimiter): Limitador da API
+        send (callable): Função assíncrona sem argumentos que faz a requisição e retorna o httpx.Response; pode
+            lançar ThrottledError/TransientError após inspecionar o corpo da resposta. Para o timeout adaptativo,
+            a requisição deve usar "timeout=limiter.timeout()"
+        descricao (str): Descrição da requisição para os logs
+        ao_enviar (callable): Chamada com True quando a requisição obtém a vaga no limitador e é enviada e com False
+            quando ela termina (a espera na fila do limitador e entre tentativas fica de fora) [opcional]
+
+    Returns:
+        httpx.Response: Resposta sem sinal de limitação (inclusive 4xx, que não são tentados novamente)
+
+    Raises:
+        ThrottledError|TransientError|httpx.TransportError: Caso todas as tentativas falhem
+    """
+
+    # Importado na primeira requisição, e não com o módulo (o motor é importado sem o httpx):
+    import httpx
+
+    metricas = (metricas_execucao.get() or {}).get(limiter)
+
+    for tentativa in range(RETRY_MAX_TENTATIVAS + 1):
+        try:
+            async with limiter:
+                inicio = time.perf_counter()
+                if ao_enviar is not None:
+                    ao_enviar(True)
+                try:
+                    response = await send()
+                except asyncio.CancelledError:
+                    # Cancelada (ex.: consulta "hedged" já respondida): a duração não é uma latência da API
+                    if metricas is not None:
+                        metricas.registrar(
+                            "CancelledError", time.perf_counter() - inicio
+                        )
+                    raise
+                except Exception as e:
+                    _registrar(
+                        limiter,
+                        metricas,
+                        type(e).__name__,
+                        time.perf_counter() - inicio,
+                    )
+                    raise
+                finally:
+                    if ao_enviar is not None:
+                        ao_enviar(False)
+                _registrar(
+                    limiter,
+                    metricas,
+                    response.status_code,
+                    time.perf_counter() - inicio,
+                )
+
+            if response.status_code in THROTTLE_STATUS:
+                raise ThrottledError(
+                    f"HTTP {response.status_code}",
+                    retry_after=parse_retry_after(response.headers.get("Retry-After")),
+                )
+            if response.status_code >= 500:
+                raise TransientError(f"HTTP {response.status_code}")
+
+            limiter.success()
+            _contar(metricas, "sucessos")
+            return response
+        except ThrottledError as e:
+            limiter.throttled(e.retry_after)
+            _contar(metricas, "throttles")
+            espera = e.retry_after if e.retry_after is not None else backoff(tentativa)
+            erro = e
+        except (TransientError, httpx.TimeoutException, httpx.TransportError) as e:
+            limiter.failure()
+            _contar(metricas, "falhas")
+            espera = backoff(tentativa)
+            erro = e
+
+        if tentativa == RETRY_MAX_TENTATIVAS:
+            raise erro
+
+        limiter.retries += 1
+        _contar(metricas, "retries")
+        logger.debug(
+            "%s: %s | %s: %s | nova tentativa em %.1fs",
+            limiter.name,
+            descricao,
+            type(erro).__name__,
+            erro,
+            espera,
+        )
+        await asyncio.sleep(espera)
@@ -0,0 +1,219 @@
+import json
+import logging
+import platform
+import time
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from cepfoliummap.ratelimit import metricas_execucao
+
+logger = logging.getLogger(__name__)
+
+PERCENTIS = (50, 90, 99)
+EVENTOS_LIMITADOR = ("sucessos", "throttles", "falhas", "retries")
+
+
+class RequestMetrics:
+    """
+    Latências, status e eventos do limitador (sucessos, throttles, falhas e novas tentativas) das requisições de uma
+    execução a uma API, registrados por request_with_retry quando a execução tem métricas (ratelimit.metricas_execucao);
+    sem métricas, nada é registrado.
+    """
+
+    def __init__(self):
+        self.latencias = array("d")
+        self.status = Counter()
+        self.limitador = Counter()
+
+    def registrar(self, status, segundos):
+        """
+        Args:
+            status (int|str): Status HTTP, ou o nome da exceção quando não há resposta (ex.: "ConnectTimeout")
+            segundos (float): Duração da requisição (sem a espera do limitador)
+        """
+
+        self.latencias.append(segundos)
+        self.status[str(status)] += 1
+
+    def to_dict(self):
+        latencias = np.frombuffer(self.latencias) * 1000 if self.latencias else None
+
+        return {
+            "requisicoes": len(self.latencias),
+            "status": dict(sorted(self.status.items())),
+            "latencia_ms": (
+                {
+                    **{
+                        f"p{p}": round(float(v), 1)
+                        for p, v in zip(PERCENTIS, np.percentile(latencias, PERCENTIS))
+                    },
+                    "media": round(float(latencias.mean()), 1),
+                    "max": round(float(latencias.max()), 1),
+                }
+                if latencias is not None
+                else {}
+            ),
+        }
+
+
+class RunReport:
+    """
+    Relatório de desempenho de uma execução: duração de cada etapa, contadores (cache, índice, Geocode, marcadores)
+    e, por API, latências, status e estatísticas do limitador. Uso:
+
+        relatorio = RunReport(arquivo)
+        with relatorio.etapa("leitura"):
+            ...
+        relatorio.contadores["cache_hits"] = 10
+        relatorio.salvar("mapas/planilha.relatorio.json")
+    """
+
+    def __init__(self, arquivo):
+        self.arquivo = arquivo
+        self.inicio = datetime.now()
+        self.etapas = {}
+        self.contadores = {}
+        self.apis = {}
+
+        self._limiters = {}
+        self._token = None
+        self._perf_inicio = time.perf_counter()
+
+    @contextmanager
+    def etapa(self, nome):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.etapas[nome] = self.etapas.get(nome, 0.0) + (
+                time.perf_counter() - inicio
+            )
+
+    # --------------
+    def observar(self, limiters):
+        """
+        Função que passa a registrar as requisições desta execução aos limitadores (no contexto atual, e não nos
+        limitadores, que são compartilhados com as demais execuções do motor).
+
+        Args:
+            limiters (dict): Dicionário {nome da API: AdaptiveLimiter}
+        """
+
+        for nome, limiter in limiters.items():
+            self.apis[nome] = RequestMetrics()
+            self._limiters[nome] = limiter
+        self._token = metricas_execucao.set(
+            {limiter: self.apis[nome] for nome, limiter in limiters.items()}
+        )
+
+    def encerrar(self):
+        """
+        Função que deixa de registrar as requisições (chamada ao final da execução, mesmo com erro).
+        """
+
+        if self._token is not None:
+            metricas_execucao.reset(self._token)
+            self._token = None
+
+    # --------------
+    def to_dict(self):
+        apis = {}
+        for nome, metricas in self.apis.items():
+            apis[nome] = metricas.to_dict()
+            if nome in self._limiters:
+                limiter = self._limiters[nome]
+                apis[nome]["limitador"] = {
+                    **{chave: metricas.limitador[chave] for chave in EVENTOS_LIMITADOR},
+                    "max_at_once": round(limiter.max_at_once, 2),
+                    "max_per_second": round(limiter.max_per_second, 2),
+                }
+
+        return {
+            "arquivo": self.arquivo,
+            "inicio": self.inicio.isoformat(timespec="seconds"),
+            "duracao_s": round(time.perf_counter() - self._perf_inicio, 3),
+            "etapas_s": {
+                nome: round(segundos, 3) for nome, segundos in self.etapas.items()
+            },
+            "contadores": self.contadores,
+            "apis": apis,
+            "ambiente": {
+                "python": platform.python_version(),
+                "plataforma": platform.platform(),
+            },
+        }
+
+    def salvar(self, filename):
+        Path(filename).parent.mkdir(parents=True, exist_ok=True)
+        with open(filename, "w", encoding="utf8") as file:
+            json.dump(self.to_dict(), file, ensure_ascii=False, indent=2)
+
+        logger.info(f"Relatório de desempenho salvo em {filename}")
+
+        return filename
+
+    def resumo(self):
+        """
+        Texto curto com os principais números da execução, ex.:
+        "12.3s (leitura 0.1s, consulta 11.5s, mapa 0.7s) | cache 80% | brasilapi: 200 req, p90 150ms, 3 throttles".
+        """
+
+        partes = [
+            f"{time.perf_counter() - self._perf_inicio:.1f}s ("
+            + ", ".join(f"{nome} {s:.1f}s" for nome, s in self.etapas.items())
+            + ")"
+        ]
+
+        ceps = self.contadores.get("ceps_unicos")
+        if ceps:
+            hits = self.contadores.get("indice_hits", 0) + self.contadores.get(
+                "cache_hits", 0
+            )
+            partes.append(f"cache/índice {hits * 100 // ceps}%")
+
+        if self.contadores.get("ceps_rejeitados"):
+            partes.append(f"{self.contadores['ceps_rejeitados']} CEPs rejeitados")
+
+        inexistentes = self.contadores.get("nao_encontrados", 0) + self.contadores.get(
+            "cache_nao_encontrados", 0
+        )
+        if inexistentes:
+            partes.append(f"{inexistentes} CEPs inexistentes")
+
+        for nome, dados in self.to_dict()["apis"].items():
+            if not dados["requisicoes"]:
+                continue
+            texto = f"{nome}: {dados['requisicoes']} req, p90 {dados['latencia_ms']['p90']:.0f}ms"
+            if throttles := dados.get("limitador", {}).get("throttles"):
+                texto += f", {throttles} throttles"
+            partes.append(texto)
+
+        if self.contadores.get("hedges"):
+            partes.append(
+                f"{self.contadores['hedges']} reservas ({self.contadores.get('hedges_vencedores', 0)} vencedoras)"
+            )
+
+        if self.contadores.get("nao_marcados"):
+            partes.append(f"{self.contadores['nao_marcados']} sem localização")
+
+        if self.contadores.get("html_bytes"):
+            texto = f"HTML {self.contadores['html_bytes'] / 1e6:.1f} MB"
+            if self.contadores.get("blocos"):
+                texto += f" + {self.contadores['blocos']} blocos ({self.contadores['blocos_alterados']} alterados)"
+            partes.append(texto)
+
+        return " | ".join(partes)
+
+
+def report_path(arquivo_mapa):
+    """
+    Função que retorna o caminho do relatório de um mapa, ex.: "mapas/planilha.html" -> "mapas/planilha.relatorio.json".
+    """
+
+    caminho = Path(arquivo_mapa)
+    return str(caminho.with_name(f"{caminho.stem}.relatorio.json"))
@@ -0,0 +1,347 @@
+"""
+Serviço que vigia um diretório de entrada e gera o mapa de cada planilha nova ou alterada:
+
+    python -m cepfoliummap --vigiar entrada/ --saida mapas/ --paralelismo 2
+
+As planilhas encontradas entram em uma fila persistente (SQLite, SERVICO_FILA), que sobrevive a reinícios: planilhas
+que estavam sendo processadas quando o serviço parou voltam para a fila, e uma planilha só é processada novamente se
+for alterada. Uma planilha que falha (ou interrompe o serviço) SERVICO_TENTATIVAS vezes fica no estado "falhou".
+
+Até SERVICO_PARALELISMO planilhas são processadas ao mesmo tempo pelo mesmo motor, compartilhando o cliente HTTP, os
+limitadores (um único orçamento de requisições por API) e os resultados em memória (um CEP presente em várias
+planilhas é consultado uma única vez). As etapas síncronas (leitura, coordenadas e mapa) rodam em threads, sem
+bloquear as consultas das demais planilhas.
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+from cepfoliummap.constants import (
+    SERVICO_FILA,
+    SERVICO_INTERVALO,
+    SERVICO_PARALELISMO,
+    SERVICO_TENTATIVAS,
+)
+from cepfoliummap.planilha import FORMATOS
+
+logger = logging.getLogger(__name__)
+
+ESTADO_PENDENTE = "pendente"
+ESTADO_EXECUTANDO = "executando"
+ESTADO_CONCLUIDO = "concluido"
+ESTADO_FALHOU = "falhou"
+
+
+class JobQueue:
+    """
+    Fila persistente (SQLite) das planilhas a processar.
+
+    Cada planilha é identificada pelo caminho e pela assinatura (tamanho e data de modificação): a mesma versão de um
+    arquivo entra na fila uma única vez, e uma versão alterada entra como uma nova tarefa. Após "tentativas" erros
+    (ou interrupções do serviço), a tarefa fica no estado "falhou" até o arquivo ser alterado.
+    """
+
+    def __init__(self, filename=SERVICO_FILA, tentativas=SERVICO_TENTATIVAS):
+        self.filename = filename
+        self.tentativas = max(tentativas, 1)
+
+        Path(filename).parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(filename)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS tarefas (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                arquivo TEXT NOT NULL,
+                assinatura TEXT NOT NULL,
+                estado TEXT NOT NULL,
+                tentativas INTEGER NOT NULL DEFAULT 0,
+                criada_em REAL NOT NULL,
+                iniciada_em REAL,
+                concluida_em REAL,
+                mapa TEXT,
+                erro TEXT,
+                UNIQUE (arquivo, assinatura)
+            )
+            """)
+        self.connection.commit()
+
+        logger.debug(f"Fila de planilhas aberta: {filename}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def adicionar(self, arquivo, assinatura):
+        """
+        Função que coloca uma planilha na fila, caso essa versão dela ainda não tenha entrado.
+
+        Returns:
+            bool: Verdadeiro se a planilha entrou na fila
+        """
+
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT OR IGNORE INTO tarefas (arquivo, assinatura, estado, criada_em) VALUES (?, ?, ?, ?)",
+                (arquivo, assinatura, ESTADO_PENDENTE, time.time()),
+            )
+
+        return cursor.rowcount == 1
+
+    def recuperar(self):
+        """
+        Função que devolve à fila as planilhas que estavam sendo processadas quando o serviço foi interrompido (as que
+        já esgotaram as tentativas, ex.: derrubaram o serviço em todas elas, ficam no estado "falhou").
+
+        Returns:
+            int: Quantidade de planilhas devolvidas
+        """
+
+        with self.connection:
+            self.connection.execute(
+                "UPDATE tarefas SET estado = ?, concluida_em = ?, erro = ? WHERE estado = ? AND tentativas >= ?",
+                (
+                    ESTADO_FALHOU,
+                    time.time(),
+                    "Serviço interrompido durante o processamento",
+                    ESTADO_EXECUTANDO,
+                    self.tentativas,
+                ),
+            )
+            cursor = self.connection.execute(
+                "UPDATE tarefas SET estado = ? WHERE estado = ?",
+                (ESTADO_PENDENTE, ESTADO_EXECUTANDO),
+            )
+
+        return cursor.rowcount
+
+    def proxima(self):
+        """
+        Função que retira da fila a planilha pendente mais antiga (que não esteja sendo processada em outra versão),
+        dando preferência às que ainda não falharam.
+
+        Returns:
+            tuple: (id, arquivo), ou None se não houver planilhas pendentes
+        """
+
+        with self.connection:
+            tarefa = self.connection.execute(
+                """
+                SELECT id, arquivo FROM tarefas
+                WHERE estado = ? AND arquivo NOT IN (SELECT arquivo FROM tarefas WHERE estado = ?)
+                ORDER BY tentativas, id LIMIT 1
+                """,
+                (ESTADO_PENDENTE, ESTADO_EXECUTANDO),
+            ).fetchone()
+
+            if tarefa:
+                self.connection.execute(
+                    "UPDATE tarefas SET estado = ?, tentativas = tentativas + 1, iniciada_em = ? WHERE id = ?",
+                    (ESTADO_EXECUTANDO, time.time(), tarefa[0]),
+                )
+
+        return tarefa
+
+    def concluir(self, id, mapa):
+        self._finalizar(id, ESTADO_CONCLUIDO, mapa=mapa)
+
+    def falhar(self, id, erro):
+        """
+        Função que registra o erro de uma tarefa e a devolve à fila, caso ainda tenha tentativas.
+
+        Returns:
+            bool: Verdadeiro se a tarefa voltou para a fila
+        """
+
+        with self.connection:
+            cursor = self.connection.execute(
+                "UPDATE tarefas SET estado = ?, erro = ? WHERE id = ? AND tentativas < ?",
+                (ESTADO_PENDENTE, erro, id, self.tentativas),
+            )
+        if cursor.rowcount:
+            return True
+
+        self._finalizar(id, ESTADO_FALHOU, erro=erro)
+        return False
+
+    def _finalizar(self, id, estado, mapa=None, erro=None):
+        with self.connection:
+            self.connection.execute(
+                "UPDATE tarefas SET estado = ?, concluida_em = ?, mapa = ?, erro = ? WHERE id = ?",
+                (estado, time.time(), mapa, erro, id),
+            )
+
+    def contagens(self):
+        """
+        Função que retorna a quantidade de planilhas em cada estado, ex.: {"pendente": 2, "concluido": 10}.
+        """
+
+        return dict(
+            self.connection.execute(
+                "SELECT estado, COUNT(*) FROM tarefas GROUP BY estado"
+            ).fetchall()
+        )
+
+
+def nome_mapa(arquivo):
+    """
+    Função que retorna o nome do mapa de uma planilha, com a extensão dela: "p.csv" e "p.xlsx" no mesmo diretório
+    geram "p_csv.html" e "p_xlsx.html", e não o mesmo mapa.
+    """
+
+    arquivo = Path(arquivo)
+    return f"{arquivo.stem}_{arquivo.suffix.lstrip('.').lower()}.html"
+
+
+def _listar(diretorio):
+    # Planilhas do diretório e a assinatura de cada uma (arquivos temporários do Excel e ocultos são ignorados):
+    planilhas = {}
+    for entrada in os.scandir(diretorio):
+        if (
+            not entrada.is_file()
+            or entrada.name.startswith(("~$", "."))
+            or Path(entrada.name).suffix.lower() not in FORMATOS
+        ):
+            continue
+        stat = entrada.stat()
+        planilhas[os.path.abspath(entrada.path)] = f"{stat.st_size}:{stat.st_mtime_ns}"
+
+    return planilhas
+
+
+async def vigiar(diretorio, fila, novas, intervalo=SERVICO_INTERVALO):
+    """
+    Função que verifica o diretório a cada "intervalo" segundos e coloca na fila as planilhas novas ou alteradas.
+
+    Uma planilha só entra na fila quando o tamanho e a data de modificação não mudam entre duas verificações (o
+    arquivo pode estar sendo copiado para o diretório).
+
+    Args:
+        diretorio (str): Diretório de entrada
+        fila (JobQueue): Fila persistente das planilhas
+        novas (asyncio.Event): Sinalizado quando planilhas entram na fila
+        intervalo (float): Segundos entre as verificações
+    """
+
+    anteriores = {}
+    enfileiradas = set()
+
+    while True:
+        try:
+            atuais = await asyncio.to_thread(_listar, diretorio)
+        except OSError as e:
+            logger.error(f"Erro ao listar o diretório {diretorio}: {e}")
+            atuais = {}
+
+        for arquivo, assinatura in atuais.items():
+            if anteriores.get(arquivo) != assinatura:
+                continue
+            if (arquivo, assinatura) in enfileiradas:
+                continue
+            enfileiradas.add((arquivo, assinatura))
+
+            if fila.adicionar(arquivo, assinatura):
+                logger.info(f"Planilha na fila: {arquivo}")
+                novas.set()
+
+        anteriores = atuais
+        await asyncio.sleep(intervalo)
+
+
+async def processar(engine, fila, novas, saida, intervalo=SERVICO_INTERVALO, **opcoes):
+    """
+    Função que processa as planilhas da fila, uma por vez, até ser cancelada.
+
+    Args:
+        engine (CepFoliumMapEngine): Motor compartilhado por todas as planilhas
+        fila (JobQueue): Fila persistente das planilhas
+        novas (asyncio.Event): Sinalizado quando planilhas entram na fila
+        saida (Path): Diretório dos mapas
+        intervalo (float): Espera máxima (em segundos) por novas planilhas antes de verificar a fila novamente
+        opcoes: Demais argumentos de CepFoliumMapEngine.executar
+    """
+
+    while True:
+        tarefa = fila.proxima()
+        if tarefa is None:
+            novas.clear()
+            try:
+                await asyncio.wait_for(novas.wait(), intervalo)
+            except TimeoutError:
+                pass
+            continue
+
+        id, arquivo = tarefa
+        logger.info(f"Processando a planilha {arquivo}")
+        try:
+            mapa = await engine.executar(
+                arquivo,
+                arquivo_mapa=str(saida / nome_mapa(arquivo)),
+                **opcoes,
+            )
+        except Exception as e:
+            logger.exception(e)
+            if fila.falhar(id, f"{type(e).__name__}: {e}"):
+                logger.error(
+                    f"Erro ao processar o arquivo {arquivo}; ele voltou para a fila"
+                )
+            else:
+                logger.error(
+                    f"Erro ao processar o arquivo {arquivo}; tentativas esgotadas ({fila.tentativas})"
+                )
+        else:
+            fila.concluir(id, mapa)
+
+
+async def servir(
+    engine,
+    entrada,
+    saida="mapas/",
+    fila_path=SERVICO_FILA,
+    paralelismo=SERVICO_PARALELISMO,
+    intervalo=SERVICO_INTERVALO,
+    tentativas=SERVICO_TENTATIVAS,
+    **opcoes,
+):
+    """
+    Função que vigia o diretório de entrada e processa as planilhas da fila até ser cancelada (ex.: Ctrl+C).
+
+    Args:
+        engine (CepFoliumMapEngine): Motor (já aberto) compartilhado por todas as planilhas
+        entrada (str): Diretório vigiado
+        saida (str): Diretório dos mapas
+        fila_path (str): Arquivo da fila persistente
+        paralelismo (int): Quantidade de planilhas processadas ao mesmo tempo
+        intervalo (float): Segundos entre as verificações do diretório
+        tentativas (int): Tentativas por planilha antes de ela ser marcada como "falhou"
+        opcoes: Demais argumentos de CepFoliumMapEngine.executar
+    """
+
+    saida = Path(saida)
+    saida.mkdir(parents=True, exist_ok=True)
+
+    with JobQueue(fila_path, tentativas) as fila:
+        if recuperadas := fila.recuperar():
+            logger.warning(
+                f"{recuperadas} planilhas interrompidas voltaram para a fila"
+            )
+        logger.info(
+            f"Vigiando {entrada} ({paralelismo} planilhas por vez); fila: {fila.contagens()}"
+        )
+
+        novas = asyncio.Event()
+        novas.set()
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(vigiar(entrada, fila, novas, intervalo))
+            for _ in range(max(paralelismo, 1)):
+                tg.create_task(
+                    processar(engine, fila, novas, saida, intervalo, **opcoes)
+                )
@@ -0,0 +1,98 @@
+import asyncio
+import concurrent.futures
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncWorker:
+    """
+    Event loop (asyncio) de longa duração executado em uma thread própria.
+
+    Permite que a interface gráfica (ou qualquer código síncrono) agende corrotinas sem bloquear a thread principal:
+
+        worker = AsyncWorker()
+        future = worker.submit(engine.executar(arquivo))  # TaskFuture (concurrent.futures.Future)
+        future.cancel()  # Pede o cancelamento da corrotina no event loop
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(
+            target=self._run,
+            name="cepfoliummap-worker",
+            daemon=True,
+        )
+        self.thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        logger.debug("Event loop em segundo plano iniciado")
+        self.loop.run_forever()
+
+    def submit(self, coro):
+        """
+        Função que agenda uma corrotina no event loop da thread do worker.
+
+        Args:
+            coro (coroutine): Corrotina a ser executada
+
+        Returns:
+            TaskFuture: Concluído apenas quando a corrotina termina de fato (inclusive após um cancelamento)
+        """
+
+        future = TaskFuture(self.loop)
+        self.loop.call_soon_threadsafe(future._iniciar, coro)
+        return future
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
+        logger.debug("Event loop em segundo plano finalizado")
+
+
+class TaskFuture(concurrent.futures.Future):
+    """
+    Resultado de uma corrotina agendada no AsyncWorker.
+
+    Ao contrário do Future de asyncio.run_coroutine_threadsafe, cancel() apenas pede o cancelamento da tarefa no event
+    loop: o Future só é concluído (como cancelado, com erro ou com o resultado) quando a tarefa termina, depois dos
+    seus blocos "finally" (ex.: os CEPs consultados gravados no cache). Assim, quem espera por ele (callbacks, result(),
+    concurrent.futures.wait) sabe que a corrotina não está mais em execução.
+    """
+
+    def __init__(self, loop):
+        super().__init__()
+        self._loop = loop
+        self._task = None
+
+    def cancel(self):
+        """
+        Função que pede o cancelamento da corrotina (thread-safe).
+
+        Returns:
+            bool: Falso se a corrotina já terminou
+        """
+
+        if self.done():
+            return False
+        self._loop.call_soon_threadsafe(self._cancelar)
+        return True
+
+    # Executados na thread do event loop:
+    def _iniciar(self, coro):
+        self._task = self._loop.create_task(coro)
+        self._task.add_done_callback(self._concluir)
+
+    def _cancelar(self):
+        if self._task is not None:
+            self._task.cancel()
+
+    def _concluir(self, task):
+        if task.cancelled():
+            super().cancel()
+        elif task.exception() is not None:
+            self.set_exception(task.exception())
+        else:
+            self.set_result(task.result())
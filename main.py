@@ -1,8 +1,11 @@
+import multiprocessing
 import tkinter as tk
 from tkinter import ttk
 
+from cepfoliummap.aquecimento import aquecer_em_segundo_plano
 from cepfoliummap.config import initial_config
-from cepfoliummap.frames import CepFoliumMapFrame
+from cepfoliummap.constants import AQUECIMENTO
+from cepfoliummap.frames import CepFoliumMapFrame, DataMergerFrame
 
 
 class App(tk.Tk):
@@ -18,6 +21,7 @@ class App(tk.Tk):
         # Frames
         self.frames = {
             "Folium Map": CepFoliumMapFrame(self.notebook),
+            "Data Merger": DataMergerFrame(self.notebook),
         }
 
         # Adicionando frames ao notebook:
@@ -28,6 +32,10 @@ class App(tk.Tk):
         self.notebook.pack(expand=True, fill="both")
 
     def run(self):
+        # Dependências pesadas são importadas depois que a janela é desenhada:
+        if AQUECIMENTO:
+            self.after_idle(aquecer_em_segundo_plano)
+
         self.mainloop()
 
 
@@ -41,4 +49,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Processos filhos (renderização das partes do mapa) no executável gerado pelo PyInstaller:
+    multiprocessing.freeze_support()
     main()